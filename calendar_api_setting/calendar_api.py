@@ -1,6 +1,7 @@
 # calendar_api_settings\calendar_api.py
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, time
+from zoneinfo import ZoneInfo
 from utils.company_utils import get_company_name, get_company_data
 from utils.excel_utils import load_dataframe
 from config import EXCEL_FILE_PATH
@@ -13,7 +14,7 @@ except ImportError:
     print("[ERROR] Bibliotecas de Google no instaladas. Ejecuta: pip install --upgrade google-api-python-client google-auth-httplib2 google-auth-oauthlib")
     raise
 
-from config import SERVICE_ACCOUNT_FILE, CALENDAR_ID
+from config import SERVICE_ACCOUNT_FILE, CALENDAR_ID, CALENDAR_TIMEZONE
 from utils.common_functions import show_error_dialog
 from PyQt6.QtGui import QColor, QTextCharFormat
 from PyQt6.QtCore import QDate
@@ -96,6 +97,47 @@ def get_events():
         print(f"Error al obtener los eventos: {str(e)}")
         return []
     
+def get_events_between(start_date, end_date):
+    """
+    Obtener en una sola consulta los eventos que se solapan con un rango de fechas.
+    Los días se delimitan en la zona horaria del calendario (no en UTC), para no perder
+    ni asignar a otro día los eventos cercanos a la medianoche.
+    Args:
+        start_date (date): Primer día del rango (incluido).
+        end_date (date): Último día del rango (incluido).
+    Returns:
+        list: Lista de eventos.
+    """
+    credentials = get_credentials()
+    service = build('calendar', 'v3', credentials=credentials)
+
+    tz = ZoneInfo(CALENDAR_TIMEZONE)
+    time_min = datetime.combine(start_date, time.min, tzinfo=tz).isoformat()
+    # timeMax es exclusivo: medianoche local del día siguiente
+    time_max = datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=tz).isoformat()
+
+    eventos_lista = []
+    page_token = None
+    try:
+        while True:
+            eventos = service.events().list(
+                calendarId=CALENDAR_ID,
+                singleEvents=True,
+                orderBy='startTime',
+                timeMin=time_min,
+                timeMax=time_max,
+                timeZone=CALENDAR_TIMEZONE,
+                pageToken=page_token,
+                fields='nextPageToken,items(id,summary,start,end,location,description,extendedProperties)'
+            ).execute()
+            eventos_lista.extend(eventos.get('items', []))
+            page_token = eventos.get('nextPageToken')
+            if not page_token:
+                return eventos_lista
+    except Exception as e:
+        print(f"[ERROR] al obtener los eventos entre {start_date} y {end_date}: {e}")
+        return eventos_lista
+
 def get_events_by_month(month_str):
     """
     Obtener eventos de un mes específico en formato 'YYYY-MM'.
@@ -11,6 +11,7 @@ IMAP_PORT = 993
 EXCEL_FILE_PATH = r'data\db.xlsx'
 SERVICE_ACCOUNT_FILE = './calendar_api_setting/service-account-file.json'
 CALENDAR_ID = 'ID_CALENDAR' 
+CALENDAR_TIMEZONE = 'Europe/Madrid'
 ICON_DIR = os.path.join(os.path.dirname(__file__), 'data', 'icon')
 
 CREDENTIALS_PATH = os.path.abspath(
@@ -0,0 +1,111 @@
+# ia_processor/benchmark_cpu_inference.py
+"""
+Compara los modos de inferencia en CPU de un modelo de Hugging Face (fp32, int8, onnx) sobre los
+textos de factura de training_data.json: tiempo de carga, latencia p50/p95 por documento,
+documentos/s, memoria máxima y F1 de entidades frente a las predicciones fp32.
+
+Cada modo se ejecuta en su propio proceso para que la memoria máxima sea solo la suya.
+
+Uso:
+    python -m ia_processor.benchmark_cpu_inference
+    python -m ia_processor.benchmark_cpu_inference --model bert_spanish --modes fp32 int8 --threads 4
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from ia_processor.config import TRAINING_DATA_FILE, EVALUATION_OUT_DIR
+from ia_processor.utils.eval_metrics import entity_f1, percentile, peak_rss_mb
+
+MODES = ["fp32", "int8", "onnx"]
+
+
+def run_mode(model_key, mode, texts, num_threads=None):
+    """Trabajo de cada proceso: carga el modelo en ese modo y mide la inferencia documento a documento."""
+    from ia_processor.models import get_model
+
+    start = time.perf_counter()
+    model = get_model(model_key, optimize=None if mode == "fp32" else mode, num_threads=num_threads)
+    load_seconds = time.perf_counter() - start
+
+    # Calentamiento (primera llamada: asignación de buffers, compilación de kernels)
+    model._predict_batch(texts[:1], 1)
+
+    latencies, predictions = [], []
+    for text in texts:
+        start = time.perf_counter()
+        # Sin la caché de predicciones de predict_batch: se mide la inferencia real
+        entities = model._predict_batch([text], 1)[0]
+        latencies.append(time.perf_counter() - start)
+        predictions.append([(e["start"], e["end"], e["label"]) for e in entities])
+
+    total = sum(latencies)
+    return {
+        "mode": mode,
+        "effective_mode": model.get_info().get("optimize", mode),
+        "load_seconds": load_seconds,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "docs_per_sec": len(texts) / total if total else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "predictions": predictions
+    }
+
+
+def benchmark(model_key, modes, texts, num_threads=None):
+    results = {}
+    for mode in modes:
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            try:
+                results[mode] = executor.submit(run_mode, model_key, mode, texts, num_threads).result()
+            except Exception as e:
+                print(f"[ERROR] Modo {mode} falló: {e}")
+
+    baseline = results.get("fp32")
+    for result in results.values():
+        if baseline is None:
+            result["f1_vs_fp32"] = None
+            continue
+        gold = [(i, *ent) for i, ents in enumerate(baseline["predictions"]) for ent in ents]
+        predicted = [(i, *ent) for i, ents in enumerate(result["predictions"]) for ent in ents]
+        result["f1_vs_fp32"] = entity_f1(gold, predicted)["f1"]
+    return results
+
+
+def print_report(results):
+    print("\n=== Inferencia en CPU ===")
+    print(f"{'modo':<8}{'carga':>8}{'p50':>9}{'p95':>9}{'docs/s':>9}{'RSS MB':>9}{'F1/fp32':>9}")
+    for mode, r in results.items():
+        f1 = f"{r['f1_vs_fp32']:.3f}" if r["f1_vs_fp32"] is not None else "-"
+        rss = f"{r['peak_rss_mb']:.0f}" if r["peak_rss_mb"] is not None else "-"
+        label = mode if r["effective_mode"] == mode else f"{mode}>{r['effective_mode']}"
+        print(f"{label:<8}{r['load_seconds']:>7.1f}s{r['latency_p50'] * 1000:>7.0f}ms"
+              f"{r['latency_p95'] * 1000:>7.0f}ms{r['docs_per_sec']:>9.2f}{rss:>9}{f1:>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de los modos de inferencia en CPU.")
+    parser.add_argument("--model", default="plan_tl", help="Clave de get_model (modelo de Hugging Face).")
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--threads", type=int, default=None, help="Hilos de torch (por defecto, los de torch).")
+    args = parser.parse_args(argv)
+
+    with open(TRAINING_DATA_FILE, "r", encoding="utf-8") as f:
+        texts = [example["text"] for example in json.load(f)]
+    print(f"[INFO] {len(texts)} textos de factura, modelo {args.model}, modos {', '.join(args.modes)}")
+
+    results = benchmark(args.model, args.modes, texts, args.threads)
+    print_report(results)
+
+    EVALUATION_OUT_DIR.mkdir(parents=True, exist_ok=True)
+    report_path = EVALUATION_OUT_DIR / f"benchmark_cpu_{args.model}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=4)
+    print(f"[INFO] Informe guardado en: {report_path}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# ia_processor/benchmark_image_ocr.py
+"""
+Compara el OCR de imágenes con y sin preprocesado (utils/image_preprocessing.py):
+- Tiempo por imagen (preprocesado + Tesseract).
+- Exactitud de caracteres frente a los textos de referencia (difflib, 0-1).
+
+Las referencias son los .txt de ia_processor/output/imagenes con el mismo nombre que la imagen
+de data/imagenes; con --references se puede usar otra carpeta (p. ej. textos corregidos a mano).
+
+Uso:
+    python -m ia_processor.benchmark_image_ocr
+    python -m ia_processor.benchmark_image_ocr --references ruta/a/textos_corregidos
+"""
+import argparse
+import difflib
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytesseract
+from PIL import Image
+
+from ia_processor.config import IMAGES_DIR, OUTPUT_DIR, EVALUATION_OUT_DIR, OCR_LANG
+from ia_processor.utils.image_preprocessing import preprocess_for_ocr
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def char_accuracy(reference, text):
+    """Parecido carácter a carácter (espacios normalizados) entre el texto y la referencia."""
+    reference = " ".join(reference.split())
+    text = " ".join(text.split())
+    if not reference and not text:
+        return 1.0
+    return difflib.SequenceMatcher(None, reference, text, autojunk=False).ratio()
+
+
+def collect_pairs(images_dir=IMAGES_DIR, references_dir=OUTPUT_DIR / "imagenes"):
+    """Pares (imagen, texto de referencia) emparejados por nombre."""
+    images = {path.stem: path for path in Path(images_dir).glob("*") if path.suffix.lower() in IMAGE_EXTENSIONS}
+    pairs = []
+    for reference in sorted(Path(references_dir).glob("*.txt")):
+        image = images.get(reference.stem)
+        if image is None:
+            print(f"[WARNING] Sin imagen para la referencia: {reference.name}")
+            continue
+        pairs.append((image, reference))
+    return pairs
+
+
+def run_ocr(image_path, preprocess):
+    start = time.perf_counter()
+    image = Image.open(image_path)
+    if preprocess:
+        image = preprocess_for_ocr(image)
+    text = pytesseract.image_to_string(image, lang=OCR_LANG)
+    return text, time.perf_counter() - start
+
+
+def benchmark(pairs):
+    """
+    Returns:
+        dict: modo ('raw' | 'preprocessed') -> {'images', 'seconds', 'mean_seconds',
+                                                 'mean_accuracy', 'documents'}
+    """
+    stats = {mode: {"images": 0, "seconds": 0.0, "documents": []} for mode in ("raw", "preprocessed")}
+    for image_path, reference_path in pairs:
+        reference = reference_path.read_text(encoding="utf-8")
+        for mode in stats:
+            try:
+                text, elapsed = run_ocr(image_path, preprocess=(mode == "preprocessed"))
+            except Exception as e:
+                print(f"[ERROR] OCR ({mode}) falló en {image_path.name}: {e}")
+                continue
+            entry = stats[mode]
+            entry["images"] += 1
+            entry["seconds"] += elapsed
+            entry["documents"].append({
+                "image": image_path.name,
+                "seconds": round(elapsed, 4),
+                "accuracy": round(char_accuracy(reference, text), 4)
+            })
+
+    for entry in stats.values():
+        accuracies = [doc["accuracy"] for doc in entry["documents"]]
+        entry["mean_seconds"] = entry["seconds"] / entry["images"] if entry["images"] else 0.0
+        entry["mean_accuracy"] = sum(accuracies) / len(accuracies) if accuracies else None
+    return stats
+
+
+def print_report(stats):
+    print("\n=== OCR de imágenes ===")
+    print(f"{'modo':<14}{'imágenes':>9}{'tiempo':>10}{'s/imagen':>10}{'exactitud':>11}")
+    for mode, entry in stats.items():
+        accuracy = f"{entry['mean_accuracy']:.3f}" if entry["mean_accuracy"] is not None else "-"
+        print(f"{mode:<14}{entry['images']:>9}{entry['seconds']:>9.2f}s{entry['mean_seconds']:>10.2f}{accuracy:>11}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del preprocesado de imágenes para OCR.")
+    parser.add_argument("--images", default=str(IMAGES_DIR))
+    parser.add_argument("--references", default=str(OUTPUT_DIR / "imagenes"))
+    args = parser.parse_args(argv)
+
+    pairs = collect_pairs(args.images, args.references)
+    if not pairs:
+        print(f"[INFO] No hay imágenes con referencia en {args.images}.")
+        return {}
+    print(f"[INFO] {len(pairs)} imágenes con texto de referencia")
+
+    stats = benchmark(pairs)
+    print_report(stats)
+
+    EVALUATION_OUT_DIR.mkdir(parents=True, exist_ok=True)
+    report_path = EVALUATION_OUT_DIR / f"benchmark_image_ocr_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(stats, f, ensure_ascii=False, indent=4)
+    print(f"[INFO] Informe guardado en: {report_path}")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
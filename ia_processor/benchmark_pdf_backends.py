@@ -0,0 +1,120 @@
+# ia_processor/benchmark_pdf_backends.py
+"""
+Compara los backends de extracción de PDFs sobre data/pdf/<TIPO>:
+- Velocidad (segundos, páginas/s) de cada backend.
+- Concordancia de las entidades que extrae extract_entities_from_factura sobre el texto
+  normalizado, tomando pdfplumber como referencia (Jaccard sobre pares etiqueta/texto).
+
+Uso:
+    python -m ia_processor.benchmark_pdf_backends
+    python -m ia_processor.benchmark_pdf_backends --types FACTURA --backends pdfium hybrid
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+
+from ia_processor.config import DOCUMENT_TYPES, EVALUATION_OUT_DIR
+from ia_processor.extract_pdfs import collect_jobs, normalize_text
+from ia_processor.generate_training_data import extract_entities_from_factura
+from ia_processor.utils.pdf_backends import PDF_BACKENDS, get_pdf_backend
+
+REFERENCE_BACKEND = "pdfplumber"
+
+
+def entity_set(text):
+    """Entidades como pares (etiqueta, texto), comparables entre textos con distintos offsets."""
+    return {(label, text[start:end]) for start, end, label in extract_entities_from_factura(text)}
+
+
+def agreement(reference, candidate):
+    if not reference and not candidate:
+        return 1.0
+    return len(reference & candidate) / len(reference | candidate)
+
+
+def benchmark(pdf_paths, backends):
+    """
+    Returns:
+        dict: backend -> {'files', 'pages', 'seconds', 'pages_per_sec', 'fallback_pages',
+                          'errors', 'entity_agreement', 'documents'}
+    """
+    names = [REFERENCE_BACKEND] + [name for name in backends if name != REFERENCE_BACKEND]
+    stats = {name: {"files": 0, "pages": 0, "seconds": 0.0, "fallback_pages": 0, "errors": 0,
+                    "documents": []} for name in names}
+
+    for pdf_path in pdf_paths:
+        reference = None
+        for name in names:
+            start = time.perf_counter()
+            try:
+                pages = get_pdf_backend(name).extract_pages(str(pdf_path))
+            except Exception as e:
+                print(f"[ERROR] {name} falló en {pdf_path.name}: {e}")
+                stats[name]["errors"] += 1
+                continue
+            elapsed = time.perf_counter() - start
+
+            entities = entity_set(normalize_text(page["text"] for page in pages))
+            if name == REFERENCE_BACKEND:
+                reference = entities
+            entry = stats[name]
+            entry["files"] += 1
+            entry["pages"] += len(pages)
+            entry["seconds"] += elapsed
+            if name != REFERENCE_BACKEND:
+                # Páginas que el híbrido tuvo que pasar por pdfplumber
+                entry["fallback_pages"] += sum(1 for page in pages if page.get("backend") == REFERENCE_BACKEND)
+            entry["documents"].append({
+                "pdf": pdf_path.name,
+                "seconds": round(elapsed, 4),
+                "entities": sorted(f"{label}:{value}" for label, value in entities),
+                "agreement": agreement(reference, entities) if reference is not None else None
+            })
+
+    for entry in stats.values():
+        scores = [doc["agreement"] for doc in entry["documents"] if doc["agreement"] is not None]
+        entry["pages_per_sec"] = entry["pages"] / entry["seconds"] if entry["seconds"] else 0.0
+        entry["entity_agreement"] = sum(scores) / len(scores) if scores else None
+    return stats
+
+
+def print_report(stats):
+    print("\n=== Backends de PDF ===")
+    print(f"{'backend':<12}{'ficheros':>9}{'páginas':>9}{'tiempo':>10}{'págs/s':>10}{'respaldo':>10}{'acuerdo':>9}")
+    for name, entry in stats.items():
+        acuerdo = f"{entry['entity_agreement']:.3f}" if entry["entity_agreement"] is not None else "-"
+        print(f"{name:<12}{entry['files']:>9}{entry['pages']:>9}{entry['seconds']:>9.2f}s"
+              f"{entry['pages_per_sec']:>10.1f}{entry['fallback_pages']:>10}{acuerdo:>9}")
+    for name, entry in stats.items():
+        discrepancias = [doc["pdf"] for doc in entry["documents"] if doc["agreement"] not in (None, 1.0)]
+        if discrepancias:
+            print(f"[INFO] {name}: entidades distintas de {REFERENCE_BACKEND} en {len(discrepancias)} PDFs: "
+                  f"{', '.join(discrepancias[:5])}{'...' if len(discrepancias) > 5 else ''}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de backends de extracción de PDFs.")
+    parser.add_argument("--types", nargs="+", default=DOCUMENT_TYPES, choices=DOCUMENT_TYPES)
+    parser.add_argument("--backends", nargs="+", default=list(PDF_BACKENDS), choices=list(PDF_BACKENDS))
+    args = parser.parse_args(argv)
+
+    pdf_paths = [pdf for pdf, _ in collect_jobs(args.types)]
+    if not pdf_paths:
+        print("[INFO] No hay PDFs que comparar.")
+        return {}
+    print(f"[INFO] {len(pdf_paths)} PDFs en {', '.join(args.types)}")
+
+    stats = benchmark(pdf_paths, args.backends)
+    print_report(stats)
+
+    EVALUATION_OUT_DIR.mkdir(parents=True, exist_ok=True)
+    report_path = EVALUATION_OUT_DIR / f"benchmark_pdf_backends_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(stats, f, ensure_ascii=False, indent=4)
+    print(f"[INFO] Informe guardado en: {report_path}")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# ia_processor/classify_documents.py
+"""
+Clasifica los documentos de una carpeta (ALTA / FACTURA / LIQUIDACION / OTROS) y extrae de cada
+uno solo las entidades de su tipo.
+
+Uso:
+    python -m ia_processor.classify_documents --train                 # entrena con data/pdf/<TIPO>
+    python -m ia_processor.classify_documents ruta/a/pdfs_nuevos       # clasifica y extrae
+    python -m ia_processor.classify_documents ruta/a/pdfs --no-extract # solo clasifica
+
+El informe (tipo, confianza, puntuaciones y entidades por documento) se guarda en output/classified.
+"""
+import argparse
+import json
+from collections import Counter
+from datetime import datetime
+
+from ia_processor.config import PDF_DIR, CLASSIFIED_DIR
+from ia_processor.utils.document_classifier import DocumentClassifier, classify_folder, training_examples
+from ia_processor.utils.entity_extractor import LABELS, extract_entities_from_text
+from ia_processor.utils.ocr_utils import extract_text_from_file
+
+
+def train(pdf_dir=PDF_DIR):
+    texts, labels = training_examples(pdf_dir)
+    if len(set(labels)) < 2:
+        print("[ERROR] Hacen falta documentos de al menos dos tipos para entrenar.")
+        return None
+    print(f"[INFO] Entrenando con {len(texts)} documentos: {dict(Counter(labels))}")
+    classifier = DocumentClassifier().fit(texts, labels)
+    classifier.save()
+    return classifier
+
+
+def classify_and_extract(folder, batch_size=32, extract=True):
+    results = []
+    for result in classify_folder(folder, batch_size=batch_size):
+        result.pop("text")
+        entities = []
+        # El texto completo solo se extrae si hay reglas para el tipo detectado (ALTA y OTROS no tienen)
+        if extract and result["doc_type"] in LABELS:
+            full_text = extract_text_from_file(result["path"])
+            entities = [
+                {"start": start, "end": end, "label": label, "text": full_text[start:end]}
+                for start, end, label in extract_entities_from_text(full_text, result["doc_type"])
+            ]
+        result["entities"] = entities
+        print(f"[INFO] {result['doc_type']:<12} {result['confidence']:.2f}  {result['path']}  "
+              f"({len(entities)} entidades)")
+        results.append(result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clasificación de documentos y extracción por tipo.")
+    parser.add_argument("folder", nargs="?", help="Carpeta con los documentos a clasificar.")
+    parser.add_argument("--train", action="store_true", help="Entrenar el clasificador con data/pdf/<TIPO>.")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--no-extract", action="store_true", help="Solo clasificar, sin extraer entidades.")
+    args = parser.parse_args(argv)
+
+    if args.train:
+        train()
+    if not args.folder:
+        return []
+
+    results = classify_and_extract(args.folder, args.batch_size, extract=not args.no_extract)
+    print(f"[INFO] Documentos por tipo: {dict(Counter(r['doc_type'] for r in results))}")
+
+    CLASSIFIED_DIR.mkdir(parents=True, exist_ok=True)
+    report_path = CLASSIFIED_DIR / f"clasificacion_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=4)
+    print(f"[INFO] Informe guardado en: {report_path}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -21,14 +21,26 @@ OUTPUT_DIR = IA_PROCESSOR_DIR / "output"
 CLASSIFIED_DIR = OUTPUT_DIR / "classified"
 RESULTS_DIR = IA_PROCESSOR_DIR / "results"
 FACTURA_DIR = PDF_DIR / "FACTURA" 
+# Tipos de documento (subcarpetas de data/pdf y de ia_processor/output)
+DOCUMENT_TYPES = ["ALTA", "FACTURA", "LIQUIDACION", "OTROS"]
 FACTURA_OUT_DIR = OUTPUT_DIR / "FACTURA"
 #
 ENTITIES_OUT_DIR = OUTPUT_DIR / "ENTIDADES"
 EVALUATION_OUT_DIR = OUTPUT_DIR / "EVALUACIONES"
+# Caché de extracciones de texto (clave: SHA-256 del fichero + versión del extractor)
+EXTRACTION_CACHE_FILE = OUTPUT_DIR / "extraction_cache.sqlite"
+# OCR de páginas escaneadas (sin capa de texto): resolución de rasterizado e idioma de Tesseract
+OCR_DPI = 300
+OCR_LANG = "spa"
 # --- Modelos ---
 MODELS_DIR = IA_PROCESSOR_DIR / "models"
 MODEL_PATH = MODELS_DIR / "spacy_model"  # ruta al modelo entrenado
 MODEL_OUTPUT_DIR = MODEL_PATH  # alias para compatibilidad
+# Exportaciones ONNX de los modelos de Hugging Face (modo CPU 'onnx')
+ONNX_MODELS_DIR = MODELS_DIR / "onnx"
+# Clasificador de documentos (TF-IDF) y confianza mínima para aceptar su predicción
+DOCUMENT_CLASSIFIER_FILE = MODELS_DIR / "document_classifier.joblib"
+CLASSIFIER_MIN_CONFIDENCE = 0.5
 
 # --- Archivos de datos ---
 TRAINING_DATA_FILE = TRAINING_DIR / "training_data.json"
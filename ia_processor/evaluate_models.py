@@ -0,0 +1,170 @@
+# ia_processor/evaluate_models.py
+"""
+Evaluación de todos los modelos de get_model sobre la parte de test de training_data.json.
+
+Por modelo se mide:
+- Precisión / recall / F1 por etiqueta y global (micro, coincidencia exacta de span y etiqueta).
+- Tiempo de carga, latencia p50/p95 por documento, documentos/s (uno a uno y por lotes).
+- Memoria residente máxima (cada modelo se evalúa en su propio proceso).
+
+La partición test es estable entre ejecuciones (por hash del texto, ver utils/data_split.py) y
+es la que los scripts de entrenamiento dejan fuera (con el mismo --test-size). El informe JSON
+se escribe con claves ordenadas y cifras redondeadas para poder compararlo con diff o con --compare.
+
+Uso:
+    python -m ia_processor.evaluate_models
+    python -m ia_processor.evaluate_models --models custom lg --test-size 0.3
+    python -m ia_processor.evaluate_models --compare output/EVALUACIONES/evaluacion_modelos_anterior.json
+"""
+import argparse
+import hashlib
+import json
+import platform
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from ia_processor.config import TRAINING_DATA_FILE, EVALUATION_OUT_DIR
+from ia_processor.utils.data_split import DEFAULT_TEST_SIZE, split_examples
+from ia_processor.utils.eval_metrics import per_label_prf, percentile, peak_rss_mb
+
+REPORT_DECIMALS = 4
+
+
+def evaluate_model(model_key, examples, batch_size=8):
+    """Trabajo de cada proceso: carga el modelo, mide latencia y throughput y calcula las métricas."""
+    from ia_processor.models import get_model
+
+    texts = [example["text"] for example in examples]
+    start = time.perf_counter()
+    model = get_model(model_key)
+    load_seconds = time.perf_counter() - start
+
+    # Calentamiento fuera de las mediciones
+    model._predict_batch(texts[:1], 1)
+
+    latencies, predictions = [], []
+    for text in texts:
+        start = time.perf_counter()
+        # Sin la caché de predicciones de predict_batch: se mide la inferencia real
+        entities = model._predict_batch([text], 1)[0]
+        latencies.append(time.perf_counter() - start)
+        predictions.append([(e["start"], e["end"], e["label"]) for e in entities])
+
+    start = time.perf_counter()
+    model._predict_batch(texts, batch_size)
+    batch_seconds = time.perf_counter() - start
+
+    metrics = per_label_prf([[tuple(e) for e in example["entities"]] for example in examples], predictions)
+    total = sum(latencies)
+    return {
+        "status": "ok",
+        "info": model.get_info(),
+        "load_seconds": load_seconds,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "docs_per_sec": len(texts) / total if total else 0.0,
+        "docs_per_sec_batch": len(texts) / batch_seconds if batch_seconds else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "per_label": metrics["per_label"],
+        "micro": metrics["micro"]
+    }
+
+
+def _round(value):
+    if isinstance(value, float):
+        return round(value, REPORT_DECIMALS)
+    if isinstance(value, dict):
+        return {key: _round(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_round(item) for item in value]
+    return value
+
+
+def run_evaluation(model_keys, test_size=DEFAULT_TEST_SIZE, batch_size=8, data_file=TRAINING_DATA_FILE):
+    with open(data_file, "r", encoding="utf-8") as f:
+        raw = f.read()
+    _, test = split_examples(json.loads(raw), test_size)
+    print(f"[INFO] {len(test)} documentos de test ({test_size:.0%} de {data_file})")
+
+    models = {}
+    for model_key in model_keys:
+        print(f"\n=== Evaluando {model_key} ===")
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            try:
+                models[model_key] = executor.submit(evaluate_model, model_key, test, batch_size).result()
+            except Exception as e:
+                print(f"[ERROR] No se pudo evaluar {model_key}: {e}")
+                models[model_key] = {"status": "error", "error": str(e)}
+
+    return _round({
+        "dataset": {
+            "file": str(Path(data_file).name),
+            "sha256": hashlib.sha256(raw.encode("utf-8")).hexdigest(),
+            "test_size": test_size,
+            "test_docs": len(test)
+        },
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "models": models
+    })
+
+
+def print_report(report):
+    print(f"\n{'modelo':<14}{'P':>7}{'R':>7}{'F1':>7}{'carga':>8}{'p50':>9}{'p95':>9}{'docs/s':>8}{'lote':>8}{'RSS MB':>8}")
+    for model_key, result in report["models"].items():
+        if result["status"] != "ok":
+            print(f"{model_key:<14}  error: {result['error']}")
+            continue
+        micro = result["micro"]
+        rss = f"{result['peak_rss_mb']:.0f}" if result["peak_rss_mb"] is not None else "-"
+        print(f"{model_key:<14}{micro['precision']:>7.3f}{micro['recall']:>7.3f}{micro['f1']:>7.3f}"
+              f"{result['load_seconds']:>7.1f}s{result['latency_p50'] * 1000:>7.0f}ms{result['latency_p95'] * 1000:>7.0f}ms"
+              f"{result['docs_per_sec']:>8.1f}{result['docs_per_sec_batch']:>8.1f}{rss:>8}")
+        for label, scores in result["per_label"].items():
+            print(f"    {label:<20} P={scores['precision']:.3f} R={scores['recall']:.3f} F1={scores['f1']:.3f}")
+
+
+def compare_reports(previous, current):
+    """Muestra la variación de F1, latencia p95 y docs/s respecto a un informe anterior."""
+    if previous.get("dataset", {}).get("sha256") != current["dataset"]["sha256"]:
+        print("[WARNING] Los informes usan datos de evaluación distintos.")
+    print("\n=== Cambios respecto al informe anterior ===")
+    for model_key, result in current["models"].items():
+        before = previous.get("models", {}).get(model_key)
+        if result["status"] != "ok" or not before or before.get("status") != "ok":
+            continue
+        print(f"{model_key:<14}F1 {before['micro']['f1']:.3f} -> {result['micro']['f1']:.3f}  "
+              f"p95 {before['latency_p95'] * 1000:.0f} -> {result['latency_p95'] * 1000:.0f}ms  "
+              f"docs/s {before['docs_per_sec']:.1f} -> {result['docs_per_sec']:.1f}")
+
+
+def main(argv=None):
+    from ia_processor.models import available_models
+
+    parser = argparse.ArgumentParser(description="Evaluación de modelos NER: calidad, latencia y memoria.")
+    parser.add_argument("--models", nargs="+", default=available_models(), choices=available_models())
+    parser.add_argument("--test-size", type=float, default=DEFAULT_TEST_SIZE)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--output", help="Ruta del informe (por defecto, output/EVALUACIONES).")
+    parser.add_argument("--compare", help="Informe anterior con el que comparar.")
+    args = parser.parse_args(argv)
+
+    report = run_evaluation(args.models, args.test_size, args.batch_size)
+    print_report(report)
+
+    output = Path(args.output) if args.output else \
+        EVALUATION_OUT_DIR / f"evaluacion_modelos_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=4, sort_keys=True)
+    print(f"\n[INFO] Informe guardado en: {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare_reports(json.load(f), report)
+    return report
+
+
+if __name__ == "__main__":
+    main()
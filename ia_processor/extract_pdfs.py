@@ -0,0 +1,188 @@
+# ia_processor/extract_pdfs.py
+"""
+Extracción en lote del texto de los PDFs de data/pdf/<TIPO> a ia_processor/output/<TIPO>/*.txt.
+
+Uso:
+    python -m ia_processor.extract_pdfs                      # todos los tipos, un worker por CPU
+    python -m ia_processor.extract_pdfs --types FACTURA ALTA
+    python -m ia_processor.extract_pdfs --workers 1 2 4      # compara el rendimiento por nº de workers
+    python -m ia_processor.extract_pdfs --no-cache           # ignora la caché de extracciones
+    python -m ia_processor.extract_pdfs --backend pdfplumber # backend de PDF (hybrid por defecto)
+    python -m ia_processor.extract_pdfs --dpi 200            # resolución del OCR de páginas escaneadas
+
+Los PDFs ya extraídos (mismo contenido y misma versión del extractor) se sirven desde la caché
+de extracciones y solo se procesan los nuevos o modificados.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from ia_processor.config import PDF_DIR, OUTPUT_DIR, DOCUMENT_TYPES, OCR_DPI
+from ia_processor.utils.ocr_utils import extract_pdf_layout, extractor_version, ocr_missing_pages
+from ia_processor.utils.pdf_backends import PDF_BACKENDS, DEFAULT_PDF_BACKEND
+from ia_processor.utils.extraction_cache import get_extraction_cache, file_sha256
+
+
+def normalize_text(pages):
+    """Mismo formato que los .txt existentes: todo el documento en una línea con espacios simples."""
+    return " ".join(" ".join(pages).split())
+
+
+def write_text_atomic(path, text):
+    """Escribe en un temporal junto al destino y lo renombra: nunca queda un .txt a medias."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def extract_one(pdf_path, out_path, backend=None, dpi=OCR_DPI, use_cache=True, sha256=None):
+    """
+    Trabajo de cada proceso: extrae un PDF y escribe su .txt.
+    Las páginas escaneadas se pasan por OCR dentro del mismo proceso (el paralelismo ya es por PDF),
+    usando la caché de OCR por página salvo con use_cache=False.
+    Returns:
+        dict: {'pdf', 'pages', 'chars', 'seconds', 'worker', 'layout'}
+    """
+    start = time.perf_counter()
+    layout = extract_pdf_layout(str(pdf_path), backend=backend)
+    ocr_missing_pages(str(pdf_path), layout, dpi=dpi, workers=1, use_cache=use_cache, sha256=sha256)
+    pages = [page["text"] for page in layout]
+    text = normalize_text(pages)
+    write_text_atomic(out_path, text)
+    return {
+        "pdf": str(pdf_path),
+        "pages": len(pages),
+        "chars": len(text),
+        "seconds": time.perf_counter() - start,
+        "worker": os.getpid(),
+        "layout": layout
+    }
+
+
+def collect_jobs(types=DOCUMENT_TYPES, pdf_dir=PDF_DIR, output_dir=OUTPUT_DIR):
+    """Pares (pdf, txt de salida) de las carpetas de los tipos indicados."""
+    jobs = []
+    for doc_type in types:
+        type_dir = Path(pdf_dir) / doc_type
+        if not type_dir.exists():
+            print(f"[WARNING] Carpeta no encontrada: {type_dir}")
+            continue
+        for pdf_path in sorted(type_dir.glob("*.pdf")):
+            jobs.append((pdf_path, Path(output_dir) / doc_type / f"{pdf_path.stem}.txt"))
+    return jobs
+
+
+def run_batch(jobs, workers=None, use_cache=True, backend=None, dpi=OCR_DPI):
+    """
+    Reparte los PDFs entre `workers` procesos e informa del rendimiento.
+    Con use_cache, los PDFs ya extraídos se escriben desde la caché sin pasar por los procesos;
+    las extracciones completas solo las guarda este proceso (los workers devuelven el resultado)
+    y los workers reutilizan y guardan el OCR de cada página escaneada.
+    Returns:
+        dict: {'workers', 'files', 'cached', 'pages', 'errors', 'seconds', 'files_per_sec',
+               'pages_per_sec', 'per_worker'}
+    """
+    workers = workers or os.cpu_count() or 1
+    cache = get_extraction_cache() if use_cache else None
+    version = extractor_version(backend, dpi)
+    results, errors = [], []
+    cached = 0
+    start = time.perf_counter()
+
+    pending = []
+    for pdf, out in jobs:
+        sha256 = file_sha256(pdf) if cache else None
+        hit = cache.get(sha256, version) if cache else None
+        if hit is not None:
+            if not Path(out).exists():
+                write_text_atomic(out, normalize_text(page["text"] for page in hit["pages"]))
+            cached += 1
+        else:
+            pending.append((pdf, out, sha256))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(extract_one, pdf, out, backend, dpi, use_cache, sha256): (pdf, sha256)
+                   for pdf, out, sha256 in pending}
+        for future in as_completed(futures):
+            pdf, sha256 = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"[ERROR] Falló la extracción de {pdf}: {e}")
+                errors.append(str(pdf))
+                continue
+            layout = result.pop("layout")
+            text = "".join(page["text"] + "\n" for page in layout if page["text"])
+            if cache and text:
+                cache.put(sha256, version, text, layout)
+            results.append(result)
+    elapsed = time.perf_counter() - start
+
+    per_worker = {}
+    for result in results:
+        stats = per_worker.setdefault(result["worker"], {"files": 0, "pages": 0, "seconds": 0.0})
+        stats["files"] += 1
+        stats["pages"] += result["pages"]
+        stats["seconds"] += result["seconds"]
+
+    total_pages = sum(r["pages"] for r in results)
+    return {
+        "workers": workers,
+        "files": len(results),
+        "cached": cached,
+        "pages": total_pages,
+        "errors": errors,
+        "seconds": elapsed,
+        "files_per_sec": len(results) / elapsed if elapsed else 0.0,
+        "pages_per_sec": total_pages / elapsed if elapsed else 0.0,
+        "per_worker": per_worker
+    }
+
+
+def print_report(report):
+    print(f"\n=== {report['workers']} worker(s) ===")
+    print(f"Ficheros: {report['files']} extraídos, {report['cached']} desde caché  "
+          f"Páginas: {report['pages']}  Errores: {len(report['errors'])}")
+    print(f"Tiempo total: {report['seconds']:.2f}s")
+    print(f"Rendimiento: {report['files_per_sec']:.2f} ficheros/s, {report['pages_per_sec']:.2f} páginas/s")
+    for pid, stats in sorted(report["per_worker"].items()):
+        print(f"  - proceso {pid}: {stats['files']} ficheros, {stats['pages']} páginas, {stats['seconds']:.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extracción en paralelo del texto de los PDFs de data/pdf.")
+    parser.add_argument("--types", nargs="+", default=DOCUMENT_TYPES, choices=DOCUMENT_TYPES)
+    parser.add_argument("--workers", nargs="+", type=int, default=[os.cpu_count() or 1],
+                        help="Número de procesos; con varios valores se repite la extracción para compararlos.")
+    parser.add_argument("--backend", default=DEFAULT_PDF_BACKEND, choices=list(PDF_BACKENDS),
+                        help="Backend de extracción de texto de los PDFs.")
+    parser.add_argument("--dpi", type=int, default=OCR_DPI, help="Resolución del OCR de páginas escaneadas.")
+    parser.add_argument("--no-cache", action="store_true", help="Extraer y pasar por OCR todos los PDFs aunque estén en caché.")
+    args = parser.parse_args(argv)
+
+    jobs = collect_jobs(args.types)
+    if not jobs:
+        print("[INFO] No hay PDFs que procesar.")
+        return []
+    print(f"[INFO] {len(jobs)} PDFs en {', '.join(args.types)}")
+
+    # Al comparar varios nº de workers todas las pasadas deben extraer de verdad
+    use_cache = not args.no_cache and len(args.workers) == 1
+    if not use_cache and not args.no_cache:
+        print("[INFO] Comparación de workers: se ignora la caché de extracciones.")
+
+    reports = []
+    for workers in args.workers:
+        report = run_batch(jobs, workers, use_cache=use_cache, backend=args.backend, dpi=args.dpi)
+        print_report(report)
+        reports.append(report)
+    return reports
+
+
+if __name__ == "__main__":
+    main()
@@ -2,42 +2,15 @@
 import json
 from pathlib import Path
 from .config import TRAINING_DATA_FILE, OUTPUT_DIR
+from .utils.rule_engine import get_rule_engine
 
 
 def extract_entities_from_factura(text: str):
-    """Extrae entidades con posiciones absolutas correctas."""
-    entities = []
-    
-    # Buscar número de factura: "FACTURA: 182454"
-    # Usar regex más robusto
-    import re
-    pattern = r'(?:FACTURA|FACTURA Nº):\s*(\d+|[A-Z0-9\-\/]+)'
-    match = re.search(pattern, text, re.IGNORECASE)
-    if match:
-        entities.append([match.start(1), match.end(1), "NUMERO_FACTURA"])
-    
-    # Buscar fecha: "Fecha: 31/12/2024"
-    pattern = r'Fecha:\s*([\d\/\-\.]+)'
-    match = re.search(pattern, text, re.IGNORECASE)
-    if match:
-        entities.append([match.start(1), match.end(1), "FECHA_EMISION"])
-    
-    # Buscar importe total: "TOTAL Euros2.116,66"
-    pattern = r'(?:TOTAL|Total):\s*€?\s*([\d,\.]+)'
-    match = re.search(pattern, text, re.IGNORECASE)
-    if match:
-        entities.append([match.start(1), match.end(1), "IMPORTE_TOTAL"])
-    
-    # Buscar email: info@freelance.es
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    email_matches = re.finditer(email_pattern, text)
-    for match in email_matches:
-        entities.append([match.start(), match.end(), "EMAIL"])
+    """Extrae entidades con posiciones absolutas correctas (reglas en utils/rule_engine.py, TRAINING_ENTITY_RULES)."""
+    entities = [list(span) for span in get_rule_engine("training").extract_spans(text, "FACTURA")]
     
     # Eliminar solapamientos
-    entities = remove_overlapping_entities(entities)
-    
-    return entities
+    return remove_overlapping_entities(entities)
 
 def remove_overlapping_entities(entities):
     """Elimina entidades que se solapan."""
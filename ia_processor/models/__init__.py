@@ -1,16 +1,47 @@
 # ia_processor/models/__init__.py
 from .spacy_model import SpacyModel
-from .transformers_ner import TransformersNERModel
+from .transformers_ner import TransformersNERModel, set_num_threads
 from .base_model import BaseModel
 
-def get_model(model_key: str):
-    if model_key == "custom":
-        return SpacyModel("spacy_custom")
-    elif model_key == "lg":
-        return SpacyModel("es_core_news_lg")
-    elif model_key == "plan_tl":
-        return TransformersNERModel("PlanTL-GOB-ES/roberta-base-bne-finetuned-ner")
-    elif model_key == "bert_spanish":
-        return TransformersNERModel("mrm8488/bert-spanish-cased-finetuned-ner")
-    else:
+# Clave -> (clase, nombre o ruta del modelo)
+MODEL_REGISTRY = {
+    "custom": (SpacyModel, "spacy_custom"),
+    "lg": (SpacyModel, "es_core_news_lg"),
+    "plan_tl": (TransformersNERModel, "PlanTL-GOB-ES/roberta-base-bne-finetuned-ner"),
+    "bert_spanish": (TransformersNERModel, "mrm8488/bert-spanish-cased-finetuned-ner"),
+}
+
+# Una instancia cargada por (clave, modo): cargar un modelo cuesta segundos y cientos de MB.
+# Los hilos no forman parte de la clave porque son de todo el proceso (ver set_num_threads).
+_loaded_models = {}
+
+def get_model(model_key: str, optimize: str = None, num_threads: int = None):
+    """
+    Args:
+        optimize (str, optional): Solo modelos de Hugging Face: 'int8' (cuantización dinámica)
+                                  u 'onnx' (ONNX Runtime); por defecto, fp32.
+        num_threads (int, optional): Hilos de torch para la inferencia en CPU. Se fijan una vez
+                                     por proceso; un valor distinto después se ignora con aviso.
+    """
+    if model_key not in MODEL_REGISTRY:
         raise ValueError(f"Modelo no soportado: {model_key}")
+    model_class, name = MODEL_REGISTRY[model_key]
+    if optimize and model_class is not TransformersNERModel:
+        raise ValueError(f"El modelo {model_key} no admite el modo optimizado '{optimize}'")
+    if model_class is TransformersNERModel:
+        set_num_threads(num_threads)
+    key = (model_key, optimize)
+    if key not in _loaded_models:
+        if model_class is TransformersNERModel:
+            _loaded_models[key] = model_class(name, optimize=optimize)
+        else:
+            _loaded_models[key] = model_class(name)
+    return _loaded_models[key]
+
+def available_models() -> list:
+    return list(MODEL_REGISTRY)
+
+def unload_model(model_key: str = None):
+    """Libera un modelo cargado en todos sus modos (o todos si no se indica clave)."""
+    for key in [key for key in _loaded_models if model_key is None or key[0] == model_key]:
+        del _loaded_models[key]
@@ -1,15 +1,60 @@
 # /ia_processor/model/base_model.py
+import hashlib
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from typing import List, Dict
 
+# Nº de textos cuyas predicciones se recuerdan por modelo (LRU)
+PREDICTION_CACHE_SIZE = 2048
+DEFAULT_BATCH_SIZE = 32
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
 class BaseModel(ABC):
-    
-    @abstractmethod
+
+    def __init__(self):
+        self._prediction_cache = OrderedDict()
+
     def predict(self, text: str) -> List[Dict]:
         """Devuelve lista de entidades: [{'text': ..., 'label': ..., 'start': int, 'end': int}]"""
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE) -> List[List[Dict]]:
+        """
+        Predice varios textos por lotes. Los textos ya vistos (mismo hash) se sirven de la caché
+        y los repetidos dentro del lote se procesan una sola vez.
+        """
+        cache = self._prediction_cache
+        keys = [text_hash(text) for text in texts]
+        # Resultados del lote: se toman de aquí y no de la caché, que puede descartar entradas
+        # del propio lote si este tiene más textos distintos que PREDICTION_CACHE_SIZE
+        results = {}
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key in cache:
+                cache.move_to_end(key)
+                results[key] = cache[key]
+            else:
+                pending.setdefault(key, text)
+
+        if pending:
+            outputs = self._predict_batch(list(pending.values()), batch_size)
+            for key, entities in zip(pending, outputs):
+                results[key] = entities
+                cache[key] = entities
+                if len(cache) > PREDICTION_CACHE_SIZE:
+                    cache.popitem(last=False)
+
+        # Copias: quien modifique el resultado no altera la caché
+        return [[dict(entity) for entity in results[key]] for key in keys]
+
+    @abstractmethod
+    def _predict_batch(self, texts: List[str], batch_size: int) -> List[List[Dict]]:
+        """Inferencia real sobre textos nuevos; una lista de entidades por texto."""
         pass
 
     @abstractmethod
     def get_info(self) -> dict:
         """Devuelve metadatos del modelo."""
-        pass
\ No newline at end of file
+        pass
@@ -6,6 +6,7 @@ from ia_processor.config import MODEL_PATH
 
 class SpacyModel(BaseModel):
     def __init__(self, model_name_or_path: str):
+        super().__init__()
         self.model_name_or_path = model_name_or_path
         if model_name_or_path == "spacy_custom":
             self.model_path = MODEL_PATH
@@ -14,16 +15,18 @@ class SpacyModel(BaseModel):
         self.nlp = spacy.load(str(self.model_path))
         print(f"[INFO] Cargado modelo spaCy: {model_name_or_path}")
 
-    def predict(self, text: str) -> list:
-        doc = self.nlp(text)
+    def _predict_batch(self, texts: list, batch_size: int) -> list:
         return [
-            {
-                "text": ent.text,
-                "label": ent.label_,
-                "start": ent.start_char,
-                "end": ent.end_char
-            }
-            for ent in doc.ents
+            [
+                {
+                    "text": ent.text,
+                    "label": ent.label_,
+                    "start": ent.start_char,
+                    "end": ent.end_char
+                }
+                for ent in doc.ents
+            ]
+            for doc in self.nlp.pipe(texts, batch_size=batch_size)
         ]
 
     def get_info(self) -> dict:
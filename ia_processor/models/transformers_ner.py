@@ -1,30 +1,128 @@
 # ia_processor/models/transformers_ner.py
-from transformers import pipeline
+import re
+
+import torch
+from transformers import pipeline, AutoModelForTokenClassification, AutoTokenizer
 from .base_model import BaseModel
+from ia_processor.config import ONNX_MODELS_DIR
+from ia_processor.utils.text_windows import char_windows, merge_window_entities
+
+# Tokens compartidos entre ventanas consecutivas en documentos largos
+WINDOW_OVERLAP_TOKENS = 64
+# Algunos tokenizadores declaran un model_max_length enorme (sin límite real)
+MAX_WINDOW_TOKENS = 512
+# Margen: al volver a tokenizar un trozo suelto (sin el espacio previo) puede variar algún token
+WINDOW_MARGIN_TOKENS = 8
+# Modos de inferencia en CPU: None (fp32), 'int8' (cuantización dinámica) u 'onnx' (ONNX Runtime)
+OPTIMIZE_MODES = (None, "int8", "onnx")
+
+# torch.set_num_threads afecta a todo el proceso: se fija una vez, no por modelo
+_num_threads = None
+
+def set_num_threads(num_threads: int):
+    """
+    Fija los hilos de torch para la inferencia en CPU una sola vez por proceso.
+    Si ya se fijaron con otro valor se mantiene el primero y se avisa.
+    """
+    global _num_threads
+    if not num_threads or num_threads == _num_threads:
+        return
+    if _num_threads is not None:
+        print(f"[WARNING] Los hilos de torch ya están fijados a {_num_threads} en este proceso; "
+              f"se ignora num_threads={num_threads}")
+        return
+    torch.set_num_threads(num_threads)
+    _num_threads = num_threads
 
 class TransformersNERModel(BaseModel):
-    def __init__(self, model_name: str = "PlanTL-GOB-ES/roberta-base-bne-finetuned-ner"):
+    def __init__(self, model_name: str = "PlanTL-GOB-ES/roberta-base-bne-finetuned-ner",
+                 overlap: int = WINDOW_OVERLAP_TOKENS, optimize: str = None):
+        super().__init__()
+        if optimize not in OPTIMIZE_MODES:
+            raise ValueError(f"Modo de optimización no soportado: {optimize}")
         self.model_name = model_name
+        self.optimize = optimize
         self.nlp = pipeline(
             "ner",
-            model=model_name,
-            tokenizer=model_name,
-            aggregation_strategy="simple"
+            model=self._load_model(optimize),
+            tokenizer=AutoTokenizer.from_pretrained(model_name),
+            aggregation_strategy="simple",
+            device=-1
         )
-        print(f"[INFO] Cargado modelo Hugging Face: {model_name}")
-
-    def predict(self, text: str) -> list:
-        results = self.nlp(text)
-        entities = []
-        for ent in results:
-            # Convertir a formato compatible
-            entities.append({
-                "text": ent["word"],
-                "label": ent["entity_group"],  # PER, ORG, LOC, MISC
-                "start": ent["start"],
-                "end": ent["end"]
-            })
-        return entities
+        tokenizer = self.nlp.tokenizer
+        self.window = (min(tokenizer.model_max_length, MAX_WINDOW_TOKENS)
+                       - tokenizer.num_special_tokens_to_add() - WINDOW_MARGIN_TOKENS)
+        self.overlap = min(overlap, self.window // 2)
+        print(f"[INFO] Cargado modelo Hugging Face: {model_name} "
+              f"(modo {self.optimize or 'fp32'}, {torch.get_num_threads()} hilos)")
+
+    def _load_model(self, optimize):
+        if optimize == "onnx":
+            model = self._load_onnx()
+            if model is not None:
+                return model
+            # Sin optimum/onnxruntime se usa la cuantización int8 de torch
+            self.optimize = optimize = "int8"
+
+        model = AutoModelForTokenClassification.from_pretrained(self.model_name)
+        model.eval()
+        if optimize == "int8":
+            # Pesos de las capas lineales en int8; activaciones cuantizadas al vuelo
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+
+    def _load_onnx(self):
+        """Exporta el modelo a ONNX la primera vez y reutiliza la exportación guardada en disco."""
+        try:
+            from optimum.onnxruntime import ORTModelForTokenClassification
+        except ImportError:
+            print("[WARNING] optimum[onnxruntime] no está instalado: se usa el modo int8.")
+            return None
+        export_dir = ONNX_MODELS_DIR / re.sub(r"[^\w.-]", "_", self.model_name)
+        if (export_dir / "model.onnx").exists():
+            return ORTModelForTokenClassification.from_pretrained(export_dir)
+        print(f"[INFO] Exportando {self.model_name} a ONNX en {export_dir}")
+        model = ORTModelForTokenClassification.from_pretrained(self.model_name, export=True)
+        model.save_pretrained(export_dir)
+        return model
+
+    def _windows(self, text: str) -> list:
+        """Ventanas (inicio, fin) en caracteres que respetan el límite de tokens del modelo."""
+        offsets = self.nlp.tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True
+        )["offset_mapping"]
+        return char_windows(offsets, self.window, self.overlap) or [(0, len(text))]
+
+    def _predict_batch(self, texts: list, batch_size: int) -> list:
+        # Todas las ventanas de todos los textos van juntas al pipeline, en lotes de batch_size
+        chunks = []
+        for index, text in enumerate(texts):
+            for start, end in self._windows(text):
+                chunks.append((index, start, text[start:end]))
+        with torch.inference_mode():
+            batch_results = self.nlp([chunk for _, _, chunk in chunks], batch_size=batch_size)
+
+        raw = [[] for _ in texts]
+        for (index, offset, _), results in zip(chunks, batch_results):
+            for ent in results:
+                # Convertir a formato compatible, con offsets del texto completo
+                raw[index].append({
+                    "text": ent["word"],
+                    "label": ent["entity_group"],  # PER, ORG, LOC, MISC
+                    "start": ent["start"] + offset,
+                    "end": ent["end"] + offset,
+                    "score": float(ent["score"])
+                })
+
+        predictions = []
+        for entities in raw:
+            merged = merge_window_entities(entities)
+            for entity in merged:
+                entity.pop("score")
+            predictions.append(merged)
+        return predictions
 
     def get_info(self) -> dict:
-        return {"name": self.model_name, "type": "Hugging Face", "source": "transformers"}
+        return {"name": self.model_name, "type": "Hugging Face", "source": "transformers",
+                "optimize": self.optimize or "fp32", "threads": torch.get_num_threads(),
+                "window_tokens": self.window, "overlap_tokens": self.overlap}
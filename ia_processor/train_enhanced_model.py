@@ -4,10 +4,12 @@ import json
 # Preferir import relativo cuando el módulo se ejecuta como paquete
 try:
     from ia_processor.train_ner_model import train_spacy_model, convert_to_spacy_format
+    from ia_processor.utils.data_split import split_examples
     from .config import TRAINING_DATA_FILE, MODEL_OUTPUT_DIR
 except Exception:
     # Fallback: cuando ejecutas el archivo directamente (no como paquete)
     from ia_processor.train_ner_model import train_spacy_model, convert_to_spacy_format
+    from ia_processor.utils.data_split import split_examples
     from ia_processor.config import TRAINING_DATA_FILE, MODEL_OUTPUT_DIR
 
 def train_enhanced_model():
@@ -29,6 +31,10 @@ def train_enhanced_model():
         # Simplemente usar los datos reales
         enhanced_data = real_data
     
+    # Fuera los documentos de la parte test (mismo hash de texto que usa evaluate_models)
+    enhanced_data, test_data = split_examples(enhanced_data)
+    print(f"[INFO] {len(enhanced_data)} ejemplos de entrenamiento ({len(test_data)} reservados para evaluación)")
+    
     # Guardar datos mejorados
     with open("enhanced_training_data.json", "w", encoding="utf-8") as f:
         json.dump(enhanced_data, f, ensure_ascii=False, indent=4)
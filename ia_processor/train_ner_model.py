@@ -10,6 +10,7 @@ from spacy.util import minibatch, compounding
 from pathlib import Path
 from spacy.training.iob_utils import offsets_to_biluo_tags
 from .config import BASE_DIR, CLASSIFIED_DIR,  MODELS_DIR, MODEL_OUTPUT_DIR, TRAINING_DATA_FILE, OUTPUT_DIR
+from .utils.data_split import split_examples
 
 # En train_ner_model.py
 def check_entity_alignment(training_data):
@@ -179,6 +180,10 @@ def main():
     with open(TRAINING_DATA_FILE, "r", encoding="utf-8") as f:
         training_data = json.load(f)
         
+    # Solo la parte train: la parte test se reserva para evaluate_models
+    training_data, test_data = split_examples(training_data)
+    print(f"[INFO] {len(training_data)} documentos de entrenamiento ({len(test_data)} reservados para evaluación)")
+    
     # Verificar alineación de entidades
     check_entity_alignment(training_data) 
     
@@ -0,0 +1,24 @@
+# ia_processor/utils/data_split.py
+"""
+Partición train/test de training_data.json compartida por el entrenamiento y la evaluación.
+
+Cada ejemplo cae en un lado según el hash de su texto (no por orden ni azar), así que la
+partición es estable entre ejecuciones y entre scripts: los modelos se entrenan solo con la
+parte train y evaluate_models mide sobre la parte test, que nunca han visto.
+"""
+import hashlib
+
+DEFAULT_TEST_SIZE = 0.3
+
+
+def text_bucket(text):
+    """Cubeta estable (0-999) de un texto."""
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16) % 1000
+
+
+def split_examples(examples, test_size=DEFAULT_TEST_SIZE):
+    """Reparte en (train, test) según el hash del texto: el mismo documento cae siempre en el mismo lado."""
+    train, test = [], []
+    for example in examples:
+        (test if text_bucket(example["text"]) < test_size * 1000 else train).append(example)
+    return train, test
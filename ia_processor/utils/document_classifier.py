@@ -0,0 +1,153 @@
+# ia_processor/utils/document_classifier.py
+"""
+Clasificación de documentos en ALTA / FACTURA / LIQUIDACION / OTROS a partir del texto de la
+primera página, para aplicar solo las reglas de extracción de su tipo.
+
+- Con un modelo entrenado (TF-IDF + regresión logística, guardado con joblib en
+  DOCUMENT_CLASSIFIER_FILE) la confianza es la probabilidad de la clase elegida.
+- Sin modelo se usa un clasificador por palabras clave (sin dependencias) cuya confianza es la
+  proporción de coincidencias de la clase ganadora.
+Por debajo de CLASSIFIER_MIN_CONFIDENCE el documento se envía a OTROS.
+"""
+import re
+from pathlib import Path
+
+from ia_processor.config import DOCUMENT_TYPES, DOCUMENT_CLASSIFIER_FILE, CLASSIFIER_MIN_CONFIDENCE
+
+FALLBACK_TYPE = "OTROS"
+
+DOCUMENT_KEYWORDS = {
+    "ALTA": [
+        "alta", "seguridad social", "tesorería general", "tgss", "afiliación", "régimen general",
+        "régimen especial", "trabajador", "fecha real", "código cuenta de cotización"
+    ],
+    "FACTURA": [
+        "factura", "nº factura", "base imponible", "iva", "cif", "nif", "vencimiento",
+        "forma de pago", "total factura", "concepto"
+    ],
+    "LIQUIDACION": [
+        "liquidación", "nómina", "bruto", "neto", "retención", "irpf", "devengos",
+        "deducciones", "líquido a percibir", "periodo de liquidación"
+    ],
+    "OTROS": [
+        "contrato", "acuerdo", "certificado", "curriculum", "diploma", "recibo", "receipt",
+        "evaluación de riesgos", "confidencialidad", "experiencia"
+    ],
+}
+
+# Un patrón por tipo, compilado una sola vez
+_KEYWORD_PATTERNS = {
+    doc_type: re.compile(r"\b(?:" + "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)) + r")\b")
+    for doc_type, keywords in DOCUMENT_KEYWORDS.items()
+}
+
+
+def keyword_scores(text):
+    """Nº de coincidencias de palabras clave por tipo de documento."""
+    lower = text.lower()
+    return {doc_type: len(pattern.findall(lower)) for doc_type, pattern in _KEYWORD_PATTERNS.items()}
+
+
+class DocumentClassifier:
+    def __init__(self, pipeline=None, min_confidence=CLASSIFIER_MIN_CONFIDENCE):
+        self.pipeline = pipeline
+        self.min_confidence = min_confidence
+
+    @classmethod
+    def load(cls, path=DOCUMENT_CLASSIFIER_FILE):
+        """Carga el modelo entrenado; si no existe se queda con el de palabras clave."""
+        if not Path(path).exists():
+            print(f"[INFO] Clasificador no entrenado ({path}): se usan palabras clave.")
+            return cls()
+        import joblib
+        return cls(joblib.load(path))
+
+    def fit(self, texts, labels):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import Pipeline
+
+        self.pipeline = Pipeline([
+            ("tfidf", TfidfVectorizer(lowercase=True, strip_accents="unicode", sublinear_tf=True,
+                                      ngram_range=(1, 2), max_features=20000)),
+            ("clf", LogisticRegression(max_iter=1000, class_weight="balanced")),
+        ])
+        self.pipeline.fit(texts, labels)
+        return self
+
+    def save(self, path=DOCUMENT_CLASSIFIER_FILE):
+        import joblib
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump(self.pipeline, path)
+        print(f"[INFO] Clasificador guardado en: {path}")
+
+    def predict_batch(self, texts):
+        """
+        Clasifica varios textos de una vez (una sola transformación TF-IDF por lote).
+        Returns:
+            list: {'doc_type', 'confidence', 'scores' (tipo -> puntuación), 'method'} por texto.
+        """
+        if self.pipeline is not None:
+            probabilities = self.pipeline.predict_proba(texts)
+            classes = list(self.pipeline.classes_)
+            results = [self._result(dict(zip(classes, map(float, row))), "tfidf") for row in probabilities]
+        else:
+            results = []
+            for text in texts:
+                counts = keyword_scores(text)
+                total = sum(counts.values())
+                scores = {doc_type: (count / total if total else 0.0) for doc_type, count in counts.items()}
+                results.append(self._result(scores, "keywords"))
+        return results
+
+    def predict(self, text):
+        return self.predict_batch([text])[0]
+
+    def _result(self, scores, method):
+        doc_type = max(scores, key=scores.get)
+        confidence = scores[doc_type]
+        if confidence < self.min_confidence:
+            doc_type = FALLBACK_TYPE
+        return {"doc_type": doc_type, "confidence": confidence, "scores": scores, "method": method}
+
+
+def first_page_text(pdf_path):
+    """Texto de la primera página (con OCR si está escaneada), sin leer el resto del documento."""
+    from ia_processor.utils.ocr_utils import extract_first_pages
+
+    return extract_first_pages(str(pdf_path), pages=1)
+
+
+def classify_folder(folder, classifier=None, batch_size=32, pattern="*.pdf"):
+    """
+    Clasifica en streaming los documentos de una carpeta: se extrae la primera página de cada uno
+    y se clasifican por lotes de batch_size, devolviendo los resultados según se obtienen.
+    Yields:
+        dict: {'path', 'doc_type', 'confidence', 'scores', 'method', 'text'}
+    """
+    classifier = classifier or DocumentClassifier.load()
+    batch = []
+    for path in sorted(Path(folder).glob(pattern)):
+        batch.append((path, first_page_text(path)))
+        if len(batch) >= batch_size:
+            yield from _classify_batch(classifier, batch)
+            batch = []
+    if batch:
+        yield from _classify_batch(classifier, batch)
+
+
+def _classify_batch(classifier, batch):
+    for (path, text), result in zip(batch, classifier.predict_batch([text for _, text in batch])):
+        yield dict(result, path=str(path), text=text)
+
+
+def training_examples(pdf_dir, types=DOCUMENT_TYPES):
+    """(textos de primera página, etiquetas) de las carpetas data/pdf/<TIPO> ya ordenadas a mano."""
+    texts, labels = [], []
+    for doc_type in types:
+        for pdf_path in sorted((Path(pdf_dir) / doc_type).glob("*.pdf")):
+            text = first_page_text(pdf_path)
+            if text.strip():
+                texts.append(text)
+                labels.append(doc_type)
+    return texts, labels
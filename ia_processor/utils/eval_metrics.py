@@ -0,0 +1,68 @@
+# ia_processor/utils/eval_metrics.py
+"""Métricas comunes de evaluación y benchmarks: F1 de entidades, percentiles de latencia y memoria."""
+import os
+import sys
+
+
+def entity_f1(gold, predicted):
+    """
+    Precisión, recall y F1 (micro) entre dos colecciones de entidades (start, end, label).
+    Returns:
+        dict: {'precision', 'recall', 'f1', 'tp', 'fp', 'fn'}
+    """
+    gold, predicted = set(map(tuple, gold)), set(map(tuple, predicted))
+    tp = len(gold & predicted)
+    fp = len(predicted - gold)
+    fn = len(gold - predicted)
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": precision, "recall": recall, "f1": f1, "tp": tp, "fp": fp, "fn": fn}
+
+
+def percentile(values, pct):
+    """Percentil por interpolación lineal (pct entre 0 y 100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def peak_rss_mb():
+    """Memoria residente máxima del proceso en MB (None si el sistema no la expone)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux la da en KB y macOS en bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process(os.getpid()).memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+def per_label_prf(gold_docs, predicted_docs):
+    """
+    P/R/F1 por etiqueta y global (micro) sobre varios documentos.
+    Args:
+        gold_docs, predicted_docs: Una lista de entidades (start, end, label) por documento.
+    Returns:
+        dict: {'per_label': {etiqueta: {...}}, 'micro': {...}}
+    """
+    gold = [(i, *ent) for i, ents in enumerate(gold_docs) for ent in ents]
+    predicted = [(i, *ent) for i, ents in enumerate(predicted_docs) for ent in ents]
+    labels = sorted({ent[3] for ent in gold} | {ent[3] for ent in predicted})
+    return {
+        "per_label": {
+            label: entity_f1([e for e in gold if e[3] == label], [e for e in predicted if e[3] == label])
+            for label in labels
+        },
+        "micro": entity_f1(gold, predicted)
+    }
@@ -0,0 +1,114 @@
+# ia_processor/utils/extraction_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from ia_processor.config import EXTRACTION_CACHE_FILE
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def file_sha256(file_path):
+    """SHA-256 del contenido del fichero (leído por bloques)."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Caché persistente (SQLite) de extracciones de texto de PDFs e imágenes.
+    La clave es el SHA-256 del contenido del fichero más la versión del extractor, así que un
+    mismo documento copiado, renombrado o vuelto a adjuntar no se vuelve a procesar, y cambiar
+    el extractor (EXTRACTOR_VERSION) invalida automáticamente lo guardado con el anterior.
+    Por cada documento se guarda el texto completo y la disposición por página
+    ({'text', 'width', 'height', 'words': [[x0, top, x1, bottom, texto], ...]}).
+    Aparte se guarda el OCR de cada página escaneada (por página, DPI y versión del OCR), para
+    no volver a pasar Tesseract aunque cambie el resto de la extracción.
+    """
+    def __init__(self, db_path=EXTRACTION_CACHE_FILE):
+        db_path = str(db_path)
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS extractions (
+                    sha256 TEXT NOT NULL,
+                    extractor_version TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    pages TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    PRIMARY KEY (sha256, extractor_version)
+                );
+                CREATE TABLE IF NOT EXISTS page_ocr (
+                    sha256 TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    dpi INTEGER NOT NULL,
+                    ocr_version TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    PRIMARY KEY (sha256, page, dpi, ocr_version)
+                );
+            """)
+
+    def get(self, sha256, extractor_version):
+        """Devuelve {'text', 'pages'} o None si el documento no se ha extraído con esa versión."""
+        row = self._conn.execute(
+            "SELECT text, pages FROM extractions WHERE sha256 = ? AND extractor_version = ?",
+            (sha256, extractor_version)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {"text": row[0], "pages": json.loads(row[1])}
+
+    def put(self, sha256, extractor_version, text, pages):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions (sha256, extractor_version, text, pages, created) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (sha256, extractor_version, text, json.dumps(pages, ensure_ascii=False), time.time())
+            )
+
+    def get_page_text(self, sha256, page, dpi, ocr_version):
+        """Texto OCR de una página ya procesada, o None."""
+        row = self._conn.execute(
+            "SELECT text FROM page_ocr WHERE sha256 = ? AND page = ? AND dpi = ? AND ocr_version = ?",
+            (sha256, page, dpi, ocr_version)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put_page_text(self, sha256, page, dpi, ocr_version, text):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO page_ocr (sha256, page, dpi, ocr_version, text, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (sha256, page, dpi, ocr_version, text, time.time())
+            )
+
+    def purge_versions(self, keep_version):
+        """Borra las entradas de versiones del extractor distintas de keep_version."""
+        with self._lock, self._conn:
+            deleted = self._conn.execute(
+                "DELETE FROM extractions WHERE extractor_version != ?", (keep_version,)
+            ).rowcount
+        return deleted
+
+
+_extraction_cache = None
+
+def get_extraction_cache():
+    """Devuelve la caché de extracciones compartida por el proceso (se crea la primera vez)."""
+    global _extraction_cache
+    if _extraction_cache is None:
+        _extraction_cache = ExtractionCache()
+    return _extraction_cache
@@ -0,0 +1,121 @@
+# ia_processor/utils/image_preprocessing.py
+"""
+Preparación de fotos y escaneos (tickets, DNI, capturas de WhatsApp) antes de pasarlos a Tesseract:
+escala de grises -> redimensionado a una resolución de trabajo -> enderezado -> recorte a la
+zona con texto -> umbral adaptativo.
+
+Las fotos del móvil llegan a 3000-4000 px de lado, mucho más de lo que Tesseract necesita:
+reducirlas y recortar los márgenes es lo que más acorta el OCR, y el umbral adaptativo
+elimina sombras y fondos irregulares que Tesseract lee como basura.
+"""
+import cv2
+import numpy as np
+from PIL import Image
+
+# Resolución de trabajo para Tesseract (texto de documento ~ 300 DPI)
+TARGET_DPI = 300
+# Sin DPI en la imagen (fotos), se limita el lado mayor a este tamaño y se amplían las más pequeñas
+MAX_LONG_SIDE = 2000
+MIN_LONG_SIDE = 1000
+# Inclinaciones menores no compensan el giro; mayores suelen ser detecciones erróneas
+MIN_SKEW_ANGLE = 0.5
+MAX_SKEW_ANGLE = 15.0
+# Bloque y constante del umbral adaptativo (bloque impar, en píxeles)
+THRESHOLD_BLOCK_SIZE = 31
+THRESHOLD_C = 15
+CROP_MARGIN = 20
+
+
+def to_grayscale(image):
+    """Acepta una imagen PIL o un array (BGR/RGB/gris) y devuelve un array en escala de grises."""
+    if isinstance(image, Image.Image):
+        return np.array(image.convert("L"))
+    if image.ndim == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
+
+
+def normalize_resolution(gray, source_dpi=None, target_dpi=TARGET_DPI):
+    """
+    Escala a target_dpi si se conoce la resolución de origen, sin que el lado mayor resultante
+    salga del rango [MIN_LONG_SIDE, MAX_LONG_SIDE] (un DPI erróneo en los metadatos no debe
+    producir imágenes enormes ni diminutas); si no se conoce, ajusta el lado mayor a ese rango.
+    """
+    long_side = max(gray.shape[:2])
+    scale = target_dpi / float(source_dpi) if source_dpi else 1.0
+    scale = min(max(scale, MIN_LONG_SIDE / long_side), MAX_LONG_SIDE / long_side)
+    if abs(scale - 1.0) < 0.05:
+        return gray
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+    return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=interpolation)
+
+
+def _text_mask(gray):
+    """Píxeles de tinta en blanco sobre negro (Otsu invertido)."""
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    return mask
+
+
+def estimate_skew(gray):
+    """Ángulo (grados) de inclinación del bloque de texto según su rectángulo mínimo."""
+    coords = cv2.findNonZero(_text_mask(gray))
+    if coords is None:
+        return 0.0
+    angle = cv2.minAreaRect(coords)[-1]
+    # OpenCV devuelve el ángulo en (0, 90]: se lleva a (-45, 45]
+    if angle > 45:
+        angle -= 90
+    return float(angle)
+
+
+def deskew(gray):
+    angle = estimate_skew(gray)
+    if abs(angle) < MIN_SKEW_ANGLE or abs(angle) > MAX_SKEW_ANGLE:
+        return gray
+    height, width = gray.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(gray, matrix, (width, height), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
+
+
+def crop_to_text(gray, margin=CROP_MARGIN):
+    """Recorta al rectángulo que engloba las regiones con texto (líneas unidas por dilatación)."""
+    mask = _text_mask(gray)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (25, 5))
+    contours, _ = cv2.findContours(cv2.dilate(mask, kernel), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    min_area = gray.shape[0] * gray.shape[1] * 0.0005
+    boxes = [cv2.boundingRect(c) for c in contours if cv2.contourArea(c) >= min_area]
+    if not boxes:
+        return gray
+    x0 = max(min(x for x, _, _, _ in boxes) - margin, 0)
+    y0 = max(min(y for _, y, _, _ in boxes) - margin, 0)
+    x1 = min(max(x + w for x, _, w, _ in boxes) + margin, gray.shape[1])
+    y1 = min(max(y + h for _, y, _, h in boxes) + margin, gray.shape[0])
+    return gray[y0:y1, x0:x1]
+
+
+def binarize(gray):
+    """Umbral adaptativo gaussiano tras un suavizado ligero (quita ruido de compresión JPEG)."""
+    blurred = cv2.medianBlur(gray, 3)
+    return cv2.adaptiveThreshold(blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+                                 THRESHOLD_BLOCK_SIZE, THRESHOLD_C)
+
+
+def preprocess_for_ocr(image, source_dpi=None, target_dpi=TARGET_DPI, crop=True):
+    """
+    Aplica todo el preprocesado.
+    Args:
+        image: Ruta, imagen PIL o array de OpenCV.
+        source_dpi (float, optional): Resolución de origen; si no se indica se toma de la imagen PIL.
+    Returns:
+        PIL.Image: Imagen binarizada lista para pytesseract.
+    """
+    if isinstance(image, str):
+        image = Image.open(image)
+    if isinstance(image, Image.Image) and source_dpi is None:
+        source_dpi = (image.info.get("dpi") or (None,))[0]
+
+    gray = normalize_resolution(to_grayscale(image), source_dpi, target_dpi)
+    gray = deskew(gray)
+    if crop:
+        gray = crop_to_text(gray)
+    return Image.fromarray(binarize(gray))
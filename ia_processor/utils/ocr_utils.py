@@ -1,53 +1,218 @@
 # ia_processor/utils/ocr_utils.py
 import os
-import pdfplumber
+from contextlib import closing
+
 import pytesseract
 from PIL import Image
 
-def extract_text_from_file(file_path: str) -> str:
+from ia_processor.config import OCR_DPI
+from ia_processor.utils.extraction_cache import get_extraction_cache, file_sha256
+from ia_processor.utils.pdf_backends import get_pdf_backend
+from ia_processor.utils.pdf_ocr import ocr_pdf_pages
+from ia_processor.utils.image_preprocessing import preprocess_for_ocr
+
+# Cambiar al modificar la forma de extraer: invalida lo guardado en la caché de extracciones
+EXTRACTOR_VERSION = "3+tesseract-spa-prep-1"
+
+def extractor_version(backend: str = None, dpi: int = OCR_DPI, layout: bool = False) -> str:
+    """
+    Versión con la que se guardan en caché las extracciones hechas con ese backend y DPI de OCR.
+    Las que incluyen las palabras con sus coordenadas (layout=True) se guardan aparte.
+    """
+    version = f"{get_pdf_backend(backend).name}-{EXTRACTOR_VERSION}-ocr{dpi}"
+    return f"{version}-layout" if layout else version
+
+def _cached_extraction(cache, sha256: str, backend: str = None):
+    """Extracción guardada de un documento, con o sin disposición de palabras (para quien solo necesita el texto)."""
+    cached = cache.get(sha256, extractor_version(backend))
+    return cached if cached is not None else cache.get(sha256, extractor_version(backend, layout=True))
+
+def extract_text_from_file(file_path: str, use_cache: bool = True, backend: str = None) -> str:
     """
     Extrae texto de un archivo (PDF o imagen) usando la herramienta adecuada.
     
     Args:
         file_path (str): Ruta al archivo.
+        use_cache (bool): Reutilizar la extracción guardada si el contenido ya se procesó.
+        backend (str, optional): Backend de PDF ('hybrid' por defecto, 'pdfium' o 'pdfplumber').
         
     Returns:
         str: Texto extraído o cadena vacía si falla.
     """
+    document = extract_document(file_path, use_cache=use_cache, backend=backend)
+    return document["text"] if document else ""
+
+def extract_document(file_path: str, use_cache: bool = True, backend: str = None, dpi: int = OCR_DPI):
+    """
+    Extrae texto y disposición por página (palabras con coordenadas) de un PDF o imagen, con
+    caché por contenido (SHA-256). Las páginas de PDF sin capa de texto se rasterizan a `dpi` y
+    se pasan por OCR.
+    Returns:
+        dict | None: {'text', 'pages'} o None si el fichero no existe o no está soportado.
+    """
     if not os.path.exists(file_path):
         print(f"[ERROR] El archivo no existe: {file_path}")
-        return ""
+        return None
+
+    lower_path = file_path.lower()
+    if not lower_path.endswith(('.pdf', '.jpg', '.jpeg', '.png')):
+        print(f"[WARNING] Formato de archivo no soportado: {file_path}")
+        return None
 
     try:
-        if file_path.lower().endswith('.pdf'):
-            return extract_text_from_pdf(file_path)
-        elif file_path.lower().endswith(('.jpg', '.jpeg', '.png')):
-            return extract_text_from_image(file_path)
+        cache = get_extraction_cache() if use_cache else None
+        sha256 = file_sha256(file_path) if cache else None
+        version = extractor_version(backend, dpi, layout=True)
+        if cache:
+            cached = cache.get(sha256, version)
+            if cached is not None:
+                return cached
+
+        if lower_path.endswith('.pdf'):
+            pages = ocr_missing_pages(file_path, extract_pdf_layout(file_path, backend=backend, layout=True),
+                                      dpi=dpi, use_cache=use_cache, sha256=sha256)
+            text = "".join(page["text"] + "\n" for page in pages if page["text"])
         else:
-            print(f"[WARNING] Formato de archivo no soportado: {file_path}")
-            return ""
+            text = extract_text_from_image(file_path)
+            pages = [{"text": text, "width": None, "height": None, "words": []}]
+
+        # No se guardan fallos (texto vacío por error de lectura) para reintentar la próxima vez
+        if cache and text:
+            cache.put(sha256, version, text, pages)
+        return {"text": text, "pages": pages}
     except Exception as e:
         print(f"[ERROR] Error al extraer texto de {file_path}: {e}")
+        return {"text": "", "pages": []}
+
+def invoice_page_order(page_count: int) -> list:
+    """Primera página, última y después el resto: número y total de una factura suelen estar en los extremos."""
+    if page_count <= 2:
+        return list(range(page_count))
+    return [0, page_count - 1] + list(range(1, page_count - 1))
+
+def _join_pages(pages: dict) -> str:
+    return "".join(pages[index]["text"] + "\n" for index in sorted(pages) if pages[index]["text"])
+
+def extract_text_until(file_path: str, is_complete, use_cache: bool = True, backend: str = None,
+                       order=invoice_page_order) -> str:
+    """
+    Extrae un PDF página a página en el orden `order` y se detiene en cuanto is_complete(texto)
+    es cierto (se evalúa a partir de la segunda página leída, así siempre se miran la primera y
+    la última). El texto devuelto respeta el orden original de las páginas leídas, y las
+    páginas escaneadas se pasan por OCR a medida que aparecen.
+    Si el documento se lee entero se guarda en la caché (sin disposición de palabras, que aquí
+    no se calcula).
+    Con imágenes, o si la extracción por páginas falla, se usa extract_text_from_file.
+    """
+    if not file_path.lower().endswith('.pdf') or not os.path.exists(file_path):
+        return extract_text_from_file(file_path, use_cache=use_cache, backend=backend)
+
+    cache = get_extraction_cache() if use_cache else None
+    sha256 = file_sha256(file_path) if cache else None
+    if cache:
+        cached = _cached_extraction(cache, sha256, backend)
+        if cached is not None:
+            return cached["text"]
+
+    pages = {}
+    try:
+        with closing(get_pdf_backend(backend).iter_pages(file_path, order)) as iterator:
+            for index, page in iterator:
+                if not page["text"].strip():
+                    ocr_missing_pages(file_path, {index: page}, workers=1, use_cache=use_cache, sha256=sha256)
+                pages[index] = page
+                if len(pages) >= 2 and is_complete(_join_pages(pages)):
+                    print(f"[INFO] Extracción anticipada de {file_path}: {len(pages)} páginas leídas")
+                    return _join_pages(pages)
+    except Exception as e:
+        print(f"[WARNING] Falló la extracción por páginas de {file_path}: {e}")
+        return extract_text_from_file(file_path, use_cache=use_cache, backend=backend)
+
+    text = _join_pages(pages)
+    if cache and text:
+        cache.put(sha256, extractor_version(backend), text, [pages[index] for index in sorted(pages)])
+    return text
+
+def extract_first_pages(file_path: str, pages: int = 1, use_cache: bool = True, backend: str = None) -> str:
+    """
+    Texto de las `pages` primeras páginas de un PDF (con OCR de las escaneadas) sin leer el resto.
+    Si el documento entero ya está en la caché de extracciones se toman de ahí; lo leído aquí no
+    se guarda como extracción completa, solo el OCR de cada página en su caché.
+    Con imágenes se devuelve el texto de extract_text_from_file.
+    """
+    if not file_path.lower().endswith('.pdf') or not os.path.exists(file_path):
+        return extract_text_from_file(file_path, use_cache=use_cache, backend=backend)
+
+    cache = get_extraction_cache() if use_cache else None
+    sha256 = file_sha256(file_path) if cache else None
+    if cache:
+        cached = _cached_extraction(cache, sha256, backend)
+        if cached is not None:
+            return _join_pages(dict(enumerate(cached["pages"][:pages])))
+
+    first = {}
+    try:
+        order = lambda count: range(min(count, pages))
+        with closing(get_pdf_backend(backend).iter_pages(file_path, order)) as iterator:
+            for index, page in iterator:
+                first[index] = page
+        ocr_missing_pages(file_path, first, workers=1, use_cache=use_cache, sha256=sha256)
+    except Exception as e:
+        print(f"[ERROR] Falló la extracción de las primeras páginas de {file_path}: {e}")
         return ""
+    return _join_pages(first)
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    """Extrae texto de un PDF usando pdfplumber."""
-    texto = ""
+def extract_pdf_layout(pdf_path: str, backend: str = None, layout: bool = False) -> list:
+    """
+    Extrae de cada página el texto y las dimensiones con el backend indicado.
+    Con layout=True se incluyen las palabras con sus coordenadas (siempre vía pdfplumber).
+    Returns:
+        list: [{'text', 'width', 'height', 'words': [[x0, top, x1, bottom, texto], ...], 'backend'}, ...]
+    """
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for pagina in pdf.pages:
-                texto_pagina = pagina.extract_text()
-                if texto_pagina:
-                    texto += texto_pagina + "\n"
+        return get_pdf_backend(backend).extract_pages(pdf_path, layout=layout)
     except Exception as e:
-        print(f"[ERROR] pdfplumber falló en {pdf_path}: {e}")
-    return texto
+        print(f"[ERROR] Falló la extracción de {pdf_path}: {e}")
+        return []
+
+def ocr_missing_pages(pdf_path: str, pages, dpi: int = OCR_DPI, workers: int = None,
+                      use_cache: bool = True, sha256: str = None):
+    """
+    Completa con OCR las páginas sin capa de texto (escaneadas), en paralelo y con caché por página.
+    Args:
+        pages (list | dict): Páginas de extract_pdf_layout (o índice -> página); se modifican en sitio.
+    Returns:
+        Las mismas páginas, con 'text' rellenado y 'backend' = 'ocr' en las procesadas.
+    """
+    items = pages.items() if isinstance(pages, dict) else enumerate(pages)
+    missing = {index: page for index, page in items if not page["text"].strip()}
+    if not missing:
+        return pages
+    texts = ocr_pdf_pages(pdf_path, list(missing), dpi=dpi, workers=workers, use_cache=use_cache, sha256=sha256)
+    for index, page in missing.items():
+        if texts.get(index, "").strip():
+            page["text"] = texts[index]
+            page["backend"] = "ocr"
+    return pages
+
+def extract_pdf_pages(pdf_path: str, backend: str = None, ocr: bool = True) -> list:
+    """Extrae el texto de cada página de un PDF (una cadena por página), con OCR de las escaneadas."""
+    pages = extract_pdf_layout(pdf_path, backend=backend)
+    if ocr:
+        ocr_missing_pages(pdf_path, pages)
+    return [page["text"] for page in pages]
 
-def extract_text_from_image(image_path: str) -> str:
-    """Extrae texto de una imagen usando Tesseract OCR."""
+def extract_text_from_pdf(pdf_path: str, backend: str = None, ocr: bool = True) -> str:
+    """Extrae texto de un PDF (PDFium con respaldo de pdfplumber y OCR de páginas escaneadas)."""
+    return "".join(texto_pagina + "\n" for texto_pagina in extract_pdf_pages(pdf_path, backend, ocr) if texto_pagina)
+
+def extract_text_from_image(image_path: str, preprocess: bool = True) -> str:
+    """Extrae texto de una imagen usando Tesseract OCR (con preprocesado OpenCV por defecto)."""
     try:
         img = Image.open(image_path)
+        if preprocess:
+            img = preprocess_for_ocr(img)
         return pytesseract.image_to_string(img, lang='spa')
     except Exception as e:
         print(f"[ERROR] Tesseract falló en {image_path}: {e}")
-        return ""
\ No newline at end of file
+        return ""
@@ -0,0 +1,185 @@
+# ia_processor/utils/pdf_backends.py
+"""
+Backends de extracción de texto de PDFs.
+
+Todos devuelven una lista de páginas con el mismo formato:
+    {'text', 'width', 'height', 'words': [[x0, top, x1, bottom, texto], ...], 'backend'}
+
+- PdfplumberBackend: preciso y con coordenadas de cada palabra, pero lento (pdfminer en Python puro).
+- PdfiumBackend: capa de texto de PDFium (C++), muy rápido; no calcula palabras ('words' vacío).
+- HybridBackend: PDFium para todas las páginas y pdfplumber solo en las que lo necesitan
+  (sin capa de texto, caracteres ilegibles o columnas fundidas en líneas larguísimas), o en
+  todas si se pide la disposición de palabras (layout=True).
+
+Además, iter_pages(pdf_path, order) va devolviendo (índice, página) de una en una en el orden
+pedido, para poder dejar de extraer en cuanto se tiene lo que se busca.
+"""
+from abc import ABC, abstractmethod
+from contextlib import ExitStack, contextmanager
+
+# Por encima de esta longitud media de línea se asume que PDFium ha mezclado columnas/tablas
+MAX_AVG_LINE_LENGTH = 220
+
+
+class PdfBackend(ABC):
+    name = "base"
+
+    @abstractmethod
+    def extract_pages(self, pdf_path, layout=False):
+        pass
+
+    @abstractmethod
+    def iter_pages(self, pdf_path, order=None):
+        """
+        Generador de (índice, página) sin abrir el resto del documento de antemano.
+        Args:
+            order (callable, optional): Recibe el nº de páginas y devuelve los índices en el orden a extraer.
+        """
+        pass
+
+
+class PdfplumberBackend(PdfBackend):
+    name = "pdfplumber"
+
+    def extract_pages(self, pdf_path, layout=False, page_numbers=None):
+        """
+        Args:
+            layout (bool): Incluir las palabras con sus coordenadas.
+            page_numbers (iterable, optional): Índices de página a extraer (por defecto, todas).
+        """
+        import pdfplumber
+
+        with pdfplumber.open(pdf_path) as pdf:
+            indices = range(len(pdf.pages)) if page_numbers is None else page_numbers
+            return [self._page(pdf.pages[index], layout) for index in indices]
+
+    def iter_pages(self, pdf_path, order=None):
+        import pdfplumber
+
+        with pdfplumber.open(pdf_path) as pdf:
+            for index in (order(len(pdf.pages)) if order else range(len(pdf.pages))):
+                yield index, self._page(pdf.pages[index], layout=False)
+
+    @contextmanager
+    def open_document(self, pdf_path):
+        """Abre el PDF una sola vez y devuelve una función índice -> página para extraerlas bajo demanda."""
+        import pdfplumber
+
+        with pdfplumber.open(pdf_path) as pdf:
+            yield lambda index, layout=False: self._page(pdf.pages[index], layout)
+
+    def _page(self, pagina, layout):
+        words = []
+        if layout:
+            words = [
+                [round(w["x0"], 2), round(w["top"], 2), round(w["x1"], 2), round(w["bottom"], 2), w["text"]]
+                for w in pagina.extract_words()
+            ]
+        return {
+            "text": pagina.extract_text() or "",
+            "width": float(pagina.width),
+            "height": float(pagina.height),
+            "words": words,
+            "backend": self.name
+        }
+
+
+class PdfiumBackend(PdfBackend):
+    name = "pdfium"
+
+    def extract_pages(self, pdf_path, layout=False):
+        return [page for _, page in self.iter_pages(pdf_path)]
+
+    def iter_pages(self, pdf_path, order=None):
+        import pypdfium2 as pdfium
+
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            for index in (order(len(pdf)) if order else range(len(pdf))):
+                yield index, self._page(pdf[index])
+        finally:
+            pdf.close()
+
+    def _page(self, page):
+        textpage = page.get_textpage()
+        try:
+            width, height = page.get_size()
+            text = textpage.get_text_range().replace("\r\n", "\n").replace("\r", "\n")
+        finally:
+            textpage.close()
+            page.close()
+        return {
+            "text": text,
+            "width": float(width),
+            "height": float(height),
+            "words": [],
+            "backend": self.name
+        }
+
+
+def needs_layout_extraction(text):
+    """Indica si el texto de PDFium de una página no es fiable y conviene pasarla por pdfplumber."""
+    stripped = text.strip()
+    if not stripped:
+        return True
+    if "�" in stripped or "\x00" in stripped:
+        return True
+    lines = [line for line in stripped.split("\n") if line.strip()]
+    return sum(len(line) for line in lines) / len(lines) > MAX_AVG_LINE_LENGTH
+
+
+class HybridBackend(PdfBackend):
+    name = "hybrid"
+
+    def __init__(self):
+        self.fast = PdfiumBackend()
+        self.accurate = PdfplumberBackend()
+
+    def extract_pages(self, pdf_path, layout=False):
+        if layout:
+            return self.accurate.extract_pages(pdf_path, layout=True)
+        try:
+            paginas = self.fast.extract_pages(pdf_path)
+        except Exception as e:
+            print(f"[WARNING] PDFium falló en {pdf_path}: {e}. Se usa pdfplumber.")
+            return self.accurate.extract_pages(pdf_path)
+
+        fallback = [i for i, pagina in enumerate(paginas) if needs_layout_extraction(pagina["text"])]
+        if fallback:
+            for index, pagina in zip(fallback, self.accurate.extract_pages(pdf_path, page_numbers=fallback)):
+                # Sin capa de texto pdfplumber tampoco saca nada: se conserva lo de PDFium
+                if pagina["text"].strip():
+                    paginas[index] = pagina
+        return paginas
+
+    def iter_pages(self, pdf_path, order=None):
+        # pdfplumber solo se abre si alguna página lo necesita, y una única vez por documento
+        with ExitStack() as stack:
+            extract_accurate = None
+            for index, pagina in self.fast.iter_pages(pdf_path, order):
+                if needs_layout_extraction(pagina["text"]):
+                    if extract_accurate is None:
+                        extract_accurate = stack.enter_context(self.accurate.open_document(pdf_path))
+                    respaldo = extract_accurate(index)
+                    if respaldo["text"].strip():
+                        pagina = respaldo
+                yield index, pagina
+
+
+PDF_BACKENDS = {
+    PdfplumberBackend.name: PdfplumberBackend,
+    PdfiumBackend.name: PdfiumBackend,
+    HybridBackend.name: HybridBackend,
+}
+DEFAULT_PDF_BACKEND = HybridBackend.name
+
+_instances = {}
+
+def get_pdf_backend(name=None):
+    """Devuelve el backend registrado con ese nombre (por defecto, el híbrido)."""
+    name = name or DEFAULT_PDF_BACKEND
+    if name not in PDF_BACKENDS:
+        raise ValueError(f"Backend de PDF desconocido: {name}. Disponibles: {', '.join(PDF_BACKENDS)}")
+    if name not in _instances:
+        _instances[name] = PDF_BACKENDS[name]()
+    return _instances[name]
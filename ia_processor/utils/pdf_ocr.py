@@ -0,0 +1,90 @@
+# ia_processor/utils/pdf_ocr.py
+"""
+OCR de las páginas de un PDF que no tienen capa de texto (escaneos, fotos guardadas como PDF).
+Solo se rasterizan con PDFium las páginas indicadas, a la resolución pedida, y Tesseract se
+ejecuta en un pool de procesos (es CPU puro y no libera el GIL de forma útil).
+El texto de cada página se guarda en la caché de extracciones para no repetir el OCR.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pypdfium2 as pdfium
+import pytesseract
+
+from ia_processor.config import OCR_DPI, OCR_LANG
+from ia_processor.utils.extraction_cache import get_extraction_cache, file_sha256
+
+# Cambiar al modificar el rasterizado u OCR de páginas: invalida el OCR guardado por página
+OCR_VERSION = f"pdfium-render-1+tesseract-{OCR_LANG}-1"
+
+
+def render_page(pdf_path, index, dpi=OCR_DPI):
+    """Rasteriza una página del PDF a una imagen PIL (PDF: 72 puntos por pulgada)."""
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        page = pdf[index]
+        try:
+            return page.render(scale=dpi / 72).to_pil()
+        finally:
+            page.close()
+    finally:
+        pdf.close()
+
+
+def ocr_page(pdf_path, index, dpi=OCR_DPI, lang=OCR_LANG):
+    """Trabajo de cada proceso: rasteriza la página y le pasa Tesseract."""
+    image = render_page(pdf_path, index, dpi)
+    return index, pytesseract.image_to_string(image, lang=lang)
+
+
+def ocr_pdf_pages(pdf_path, indices, dpi=OCR_DPI, workers=None, use_cache=True, sha256=None):
+    """
+    OCR de las páginas `indices` de un PDF.
+    Args:
+        workers (int, optional): Procesos para Tesseract (por defecto, uno por CPU hasta el nº de páginas).
+        sha256 (str, optional): Hash del PDF si ya se ha calculado.
+    Returns:
+        dict: índice de página -> texto (cadena vacía si el OCR de esa página falla).
+    """
+    pdf_path = str(pdf_path)
+    cache = get_extraction_cache() if use_cache else None
+    if cache and sha256 is None:
+        sha256 = file_sha256(pdf_path)
+
+    texts, pending = {}, []
+    for index in indices:
+        cached = cache.get_page_text(sha256, index, dpi, OCR_VERSION) if cache else None
+        if cached is not None:
+            texts[index] = cached
+        else:
+            pending.append(index)
+    if not pending:
+        return texts
+
+    workers = min(workers or os.cpu_count() or 1, len(pending))
+    print(f"[INFO] OCR de {len(pending)} páginas sin texto de {os.path.basename(pdf_path)} "
+          f"a {dpi} DPI ({workers} procesos)")
+    if workers == 1:
+        results = []
+        for index in pending:
+            try:
+                results.append(ocr_page(pdf_path, index, dpi))
+            except Exception as e:
+                print(f"[ERROR] Falló el OCR de la página {index + 1} de {pdf_path}: {e}")
+    else:
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(ocr_page, pdf_path, index, dpi) for index in pending]
+            for index, future in zip(pending, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"[ERROR] Falló el OCR de la página {index + 1} de {pdf_path}: {e}")
+
+    for index, text in results:
+        texts[index] = text
+        if cache:
+            cache.put_page_text(sha256, index, dpi, OCR_VERSION, text)
+    for index in pending:
+        texts.setdefault(index, "")
+    return texts
@@ -0,0 +1,138 @@
+# ia_processor/utils/rule_engine.py
+"""
+Motor único de extracción de entidades por reglas.
+
+Las reglas se declaran por tipo de documento y se compilan una sola vez. Hay una tabla por
+extractor, con los mismos patrones que tenía cada implementación anterior para no cambiar sus
+resultados:
+    ENTITY_RULES           utils/entity_extractor.py (aplicación): primera coincidencia de cada regla.
+    IA_ENTITY_RULES        ia_processor/utils/entity_extractor.py: todas las coincidencias.
+    TRAINING_ENTITY_RULES  generate_training_data.py: solo "Etiqueta: valor", como el dataset existente.
+Cada regla es un diccionario:
+    label   Etiqueta de la entidad.
+    pattern Expresión regular (o literal, si 'literal' es True).
+    group   Grupo cuyo span es la entidad (0 = toda la coincidencia).
+    flags   Flags de re (por defecto, ninguno).
+    all     True para devolver todas las coincidencias; si no, solo la primera.
+
+Los offsets salen siempre del span de cada coincidencia (finditer/search), nunca de text.find,
+así que un mismo valor repetido da entidades con posiciones distintas.
+"""
+import re
+
+MONTHS_PATTERN = "enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|octubre|noviembre|diciembre"
+EMAIL_PATTERN = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+# Separador opcional entre etiqueta y valor ("Total: 500,00", "Total 500,00", "Fecha 31/12/2024")
+SEP = r'[:\s]*'
+
+ENTITY_RULES = {
+    "FACTURA": [
+        {"label": "TIPO_DOCUMENTO", "pattern": "FACTURA", "literal": True},
+        {"label": "NUMERO_FACTURA", "pattern": rf'(?:Factura|Nº){SEP}([A-Z0-9\-\/]+)', "group": 1, "flags": re.IGNORECASE},
+        {"label": "FECHA_EMISION", "pattern": rf'Fecha{SEP}([\d\/\-\.]+)', "group": 1, "flags": re.IGNORECASE},
+        {"label": "NOMBRE_CLIENTE", "pattern": rf'(?:Cliente|Nombre){SEP}([^\n]+)', "group": 1, "flags": re.IGNORECASE},
+        {"label": "CIF_CLIENTE", "pattern": r'[A-Z]\d{8}[A-Z]'},
+        {"label": "IMPORTE_TOTAL", "pattern": rf'(?:Total|Importe\s*Total){SEP}€?\s*([\d,\.]+)', "group": 1, "flags": re.IGNORECASE},
+    ],
+    "ALTA": [
+        {"label": "TIPO_DOCUMENTO", "pattern": "ALTA", "literal": True},
+        {"label": "FECHAS_DE_ALTA", "pattern": r'\d{2}[\/\-\.]\d{2}[\/\-\.]\d{2,4}', "all": True},
+    ],
+    "LIQUIDACION": [
+        {"label": "TIPO_DOCUMENTO", "pattern": "Liquidación", "literal": True},
+        {"label": "PERIODO_LIQUIDACION", "pattern": rf'(?:Liquidaci[oó]n\s*de\s*)?(?:{MONTHS_PATTERN})\s+(\d{{4}})', "flags": re.IGNORECASE},
+        {"label": "IMPORTE_BRUTO", "pattern": rf'(?:Importe\s*Bruto|Base\s*Imponible){SEP}€?\s*([\d,\.]+)', "group": 1, "flags": re.IGNORECASE},
+        {"label": "IMPORTE_NETO", "pattern": rf'(?:Importe\s*Neto|Total\s*Neto){SEP}€?\s*([\d,\.]+)', "group": 1, "flags": re.IGNORECASE},
+        {"label": "RETENCIONES", "pattern": rf'(?:Retenci[oó]n|IRPF){SEP}€?\s*([\d,\.]+)', "group": 1, "flags": re.IGNORECASE},
+    ],
+    "OTROS": [
+        {"label": "TIPO_DOCUMENTO", "pattern": "Ticket", "literal": True},
+        {"label": "FECHA_TICKET", "pattern": r'\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4}'},
+        {"label": "IMPORTE_TOTAL", "pattern": rf'(?:Total|Importe){SEP}€?\s*([\d,\.]+)', "group": 1, "flags": re.IGNORECASE},
+    ],
+}
+
+IA_ENTITY_RULES = {
+    "FACTURA": [
+        {"label": "NUMERO_FACTURA", "pattern": rf'FACTURA{SEP}(\d+|[A-Z0-9\-\/]+)', "group": 1, "flags": re.IGNORECASE, "all": True},
+        {"label": "FECHA_EMISION", "pattern": rf'Fecha{SEP}([\d\/\-\.]+)', "group": 1, "flags": re.IGNORECASE, "all": True},
+        {"label": "IMPORTE_TOTAL", "pattern": rf'TOTAL{SEP}€?\s*([\d,\.]+)', "group": 1, "flags": re.IGNORECASE, "all": True},
+        {"label": "EMAIL", "pattern": EMAIL_PATTERN, "all": True},
+    ],
+    "LIQUIDACION": [
+        {"label": "PERIODO_LIQUIDACION", "pattern": rf'(?:{MONTHS_PATTERN})\s+(\d{{4}})', "flags": re.IGNORECASE, "all": True},
+        {"label": "IMPORTE_BRUTO", "pattern": rf'(?:Bruto|Base\s*Imponible){SEP}€?\s*([\d,\.]+)', "group": 1, "flags": re.IGNORECASE, "all": True},
+        {"label": "IMPORTE_NETO", "pattern": rf'(?:Neto|Total\s*Neto){SEP}€?\s*([\d,\.]+)', "group": 1, "flags": re.IGNORECASE, "all": True},
+        {"label": "RETENCIONES", "pattern": rf'(?:Retenci[oó]n|IRPF){SEP}€?\s*([\d,\.]+)', "group": 1, "flags": re.IGNORECASE, "all": True},
+    ],
+}
+
+# Con dos puntos obligatorios: training_data.json se generó así y debe poder reproducirse
+TRAINING_ENTITY_RULES = {
+    "FACTURA": [
+        {"label": "NUMERO_FACTURA", "pattern": r'(?:FACTURA|FACTURA Nº):\s*(\d+|[A-Z0-9\-\/]+)', "group": 1, "flags": re.IGNORECASE},
+        {"label": "FECHA_EMISION", "pattern": r'Fecha:\s*([\d\/\-\.]+)', "group": 1, "flags": re.IGNORECASE},
+        {"label": "IMPORTE_TOTAL", "pattern": r'TOTAL:\s*€?\s*([\d,\.]+)', "group": 1, "flags": re.IGNORECASE},
+        {"label": "EMAIL", "pattern": EMAIL_PATTERN, "all": True},
+    ],
+}
+
+RULE_SETS = {
+    "app": ENTITY_RULES,
+    "ia": IA_ENTITY_RULES,
+    "training": TRAINING_ENTITY_RULES,
+}
+DEFAULT_RULE_SET = "app"
+
+
+class RuleEngine:
+    def __init__(self, rules=ENTITY_RULES):
+        self._compiled = {
+            doc_type: [
+                (rule["label"],
+                 re.compile(re.escape(rule["pattern"]) if rule.get("literal") else rule["pattern"], rule.get("flags", 0)),
+                 rule.get("group", 0),
+                 rule.get("all", False))
+                for rule in doc_rules
+            ]
+            for doc_type, doc_rules in rules.items()
+        }
+
+    @property
+    def doc_types(self):
+        return list(self._compiled)
+
+    def labels(self, doc_type):
+        return [label for label, _, _, _ in self._compiled.get(doc_type, [])]
+
+    def extract(self, text, doc_type, labels=None):
+        """
+        Returns:
+            list: Entidades {'start', 'end', 'label', 'text'} en el orden de las reglas y, dentro
+                  de cada regla, por posición (el mismo orden que daban los extractores anteriores).
+        """
+        entities = []
+        for label, regex, group, find_all in self._compiled.get(doc_type, []):
+            if labels is not None and label not in labels:
+                continue
+            matches = regex.finditer(text) if find_all else filter(None, [regex.search(text)])
+            for match in matches:
+                start, end = match.span(group)
+                entities.append({"start": start, "end": end, "label": label, "text": text[start:end]})
+        return entities
+
+    def extract_spans(self, text, doc_type, labels=None):
+        """Mismas entidades como tuplas (start, end, label)."""
+        return [(e["start"], e["end"], e["label"]) for e in self.extract(text, doc_type, labels)]
+
+
+_engines = {}
+
+def get_rule_engine(rule_set=None):
+    """Motor compartido de la tabla de reglas indicada (se compila una vez por proceso)."""
+    rule_set = rule_set or DEFAULT_RULE_SET
+    if rule_set not in RULE_SETS:
+        raise ValueError(f"Tabla de reglas desconocida: {rule_set}. Disponibles: {', '.join(RULE_SETS)}")
+    if rule_set not in _engines:
+        _engines[rule_set] = RuleEngine(RULE_SETS[rule_set])
+    return _engines[rule_set]
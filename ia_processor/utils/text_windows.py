@@ -0,0 +1,51 @@
+# ia_processor/utils/text_windows.py
+"""
+Troceado de textos largos en ventanas de tokens solapadas y fusión de las entidades de cada
+ventana, para modelos con límite de longitud (512 tokens en BERT/RoBERTa).
+"""
+
+
+def token_windows(token_count, window, overlap):
+    """
+    Rangos [inicio, fin) de tokens que cubren el texto con `overlap` tokens compartidos
+    entre ventanas consecutivas.
+    """
+    if window <= 0:
+        raise ValueError("La ventana debe tener al menos un token")
+    if token_count <= window:
+        return [(0, token_count)]
+    stride = max(window - overlap, 1)
+    windows = []
+    start = 0
+    while True:
+        end = min(start + window, token_count)
+        windows.append((start, end))
+        if end == token_count:
+            return windows
+        start += stride
+
+
+def char_windows(offsets, window, overlap):
+    """
+    Ventanas en caracteres a partir de los offsets (inicio, fin) de cada token.
+    Returns:
+        list: (inicio, fin) en caracteres del texto original.
+    """
+    if not offsets:
+        return []
+    return [(offsets[start][0], offsets[end - 1][1]) for start, end in token_windows(len(offsets), window, overlap)]
+
+
+def merge_window_entities(entities):
+    """
+    Fusiona entidades ya recolocadas en offsets del texto completo.
+    En el solape entre ventanas una misma entidad aparece dos veces (o cortada en el borde de
+    una de ellas): de cada grupo que se solapa se queda la más larga y, a igual longitud, la de
+    mayor 'score'.
+    """
+    ranked = sorted(entities, key=lambda e: (-(e["end"] - e["start"]), -e.get("score", 0.0), e["start"]))
+    kept = []
+    for entity in ranked:
+        if all(entity["end"] <= other["start"] or entity["start"] >= other["end"] for other in kept):
+            kept.append(entity)
+    return sorted(kept, key=lambda e: e["start"])
@@ -0,0 +1,259 @@
+# models/chat_index.py
+import os
+import re
+import json
+import hashlib
+import threading
+import unicodedata
+from bisect import bisect_left
+from datetime import datetime as dttime, date
+
+# Formato de línea de las exportaciones de WhatsApp: "18/12/24, 15:03 - Remitente: mensaje"
+# ✅ Acepta 1 o 2 dígitos en día/mes/hora/minuto
+CHAT_LINE_RE = re.compile(r'(\d{1,2}/\d{1,2}/\d{2}), (\d{1,2}:\d{2}) - ([^:]+): (.+)')
+_TOKEN_RE = re.compile(r'\w+')
+
+DEFAULT_CHATS_DIR = "data/chats"
+DEFAULT_INDEX_PATH = os.path.join("data", "chat_index.json")
+INDEX_VERSION = 2
+
+
+def parse_chat_line(line):
+    """
+    Parsea una línea de una exportación de WhatsApp.
+    Returns:
+        dict | None: {'date', 'time', 'sender', 'message'} o None si la línea no es un mensaje
+                     (continuaciones de mensajes multilínea, avisos del sistema...).
+    """
+    match = CHAT_LINE_RE.match(line.strip())
+    if not match:
+        return None
+    date_str, time_str, sender, message = match.groups()
+    # Normalizar a 2 dígitos (opcional, para consistencia)
+    try:
+        dt = dttime.strptime(f"{date_str} {time_str}", "%d/%m/%y %H:%M")
+        date_str = dt.strftime("%d/%m/%y")
+        time_str = dt.strftime("%H:%M")
+    except ValueError:
+        pass
+    return {"date": date_str, "time": time_str, "sender": sender, "message": message}
+
+
+def fold_accents(text):
+    """Minúsculas y sin tildes ("Ubicación" -> "ubicacion"), igual para textos y consultas."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(fold_accents(text or ""))
+
+
+def _date_ordinal(date_str):
+    try:
+        return dttime.strptime(date_str, "%d/%m/%y").date().toordinal()
+    except ValueError:
+        return 0
+
+
+class ChatSearchIndex:
+    """
+    Índice invertido (token -> ids de mensaje) sobre todas las exportaciones de data/chats.
+    Se actualiza de forma incremental: de cada fichero se guarda el desplazamiento en bytes
+    ya indexado y el hash de ese prefijo, así que al volver a exportar un chat con mensajes
+    nuevos solo se indexan las líneas añadidas (y si el prefijo cambió, el chat se reindexa
+    entero). Las listas de postings están ordenadas por id, lo que permite intersecarlas con
+    búsqueda binaria.
+    """
+    def __init__(self, index_path=DEFAULT_INDEX_PATH):
+        self.index_path = index_path
+        self.files = {}       # chat -> {"mtime", "size", "offset", "prefix_sha256"}
+        self.docs = []        # id -> [chat, ordinal_fecha, fecha, hora, remitente, mensaje]
+        self.postings = {}    # token -> [ids ordenados]
+        self.dirty = False    # Hay cambios sin guardar
+
+    # --- Persistencia ---
+    def load(self):
+        """Carga el índice guardado. Devuelve False si no existe o es de otra versión."""
+        if not os.path.exists(self.index_path):
+            return False
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] No se pudo leer el índice de chats: {e}")
+            return False
+        if data.get("version") != INDEX_VERSION:
+            return False
+        self.files = data["files"]
+        self.docs = data["docs"]
+        self.postings = data["postings"]
+        return True
+
+    def save(self):
+        """Guarda el índice de forma atómica (fichero temporal + replace)."""
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": INDEX_VERSION,
+                "files": self.files,
+                "docs": self.docs,
+                "postings": self.postings
+            }, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+        self.dirty = False
+
+    # --- Construcción incremental ---
+    def _add_message(self, chat_name, msg):
+        doc_id = len(self.docs)
+        self.docs.append([
+            chat_name, _date_ordinal(msg["date"]), msg["date"], msg["time"], msg["sender"], msg["message"]
+        ])
+        for token in set(tokenize(msg["message"])) | set(tokenize(msg["sender"])):
+            self.postings.setdefault(token, []).append(doc_id)
+
+    def _rebuild_without(self, chat_names):
+        """Elimina los mensajes de los chats indicados y reconstruye los postings."""
+        old_docs = self.docs
+        self.docs = []
+        self.postings = {}
+        for chat_name, _, date_str, time_str, sender, message in old_docs:
+            if chat_name in chat_names:
+                continue
+            self._add_message(chat_name, {"date": date_str, "time": time_str, "sender": sender, "message": message})
+        for chat_name in chat_names:
+            self.files.pop(chat_name, None)
+
+    def update(self, directory=DEFAULT_CHATS_DIR):
+        """
+        Indexa los mensajes nuevos de los chats del directorio.
+        Returns:
+            int: Número de mensajes añadidos al índice.
+        """
+        present = {}
+        for filename in os.listdir(directory):
+            if filename.endswith(".txt"):
+                present[os.path.splitext(filename)[0]] = os.path.join(directory, filename)
+
+        # Solo se leen los chats que han cambiado desde la última actualización
+        changed = {}
+        for chat_name, path in present.items():
+            stat = os.stat(path)
+            state = self.files.get(chat_name)
+            if state is None or stat.st_mtime != state["mtime"] or stat.st_size != state["size"]:
+                with open(path, "rb") as f:
+                    changed[chat_name] = (stat, f.read())
+
+        # Chats borrados o reescritos (el prefijo ya indexado no coincide) se indexan desde cero
+        stale = {name for name in self.files if name not in present}
+        for chat_name, (_, data) in changed.items():
+            state = self.files.get(chat_name)
+            if state and hashlib.sha256(data[:state["offset"]]).hexdigest() != state["prefix_sha256"]:
+                stale.add(chat_name)
+        if stale:
+            self._rebuild_without(stale)
+
+        added = 0
+        for chat_name, (stat, data) in sorted(changed.items()):
+            offset = self.files.get(chat_name, {"offset": 0})["offset"]
+            # Se consume hasta el final: si la última línea no acaba en "\n", lo que se añada
+            # después empezará por un salto de línea y se leerá como línea nueva
+            for line in data[offset:].decode("utf-8", errors="replace").splitlines():
+                msg = parse_chat_line(line)
+                if msg:
+                    self._add_message(chat_name, msg)
+                    added += 1
+            self.files[chat_name] = {
+                "mtime": stat.st_mtime, "size": stat.st_size, "offset": len(data),
+                "prefix_sha256": hashlib.sha256(data).hexdigest()
+            }
+
+        if changed or stale:
+            self.dirty = True
+            print(f"[INFO] Índice de chats actualizado: {added} mensajes nuevos, {len(self.docs)} en total.")
+        return added
+
+    # --- Búsqueda ---
+    def search(self, query, start_date=None, end_date=None, chats=None, limit=50):
+        """
+        Busca mensajes que contengan todos los términos de la consulta (sin distinguir tildes).
+        Args:
+            query (str): Términos de búsqueda, p. ej. "novastar" o "hotel plaza".
+            start_date (date, optional): Fecha mínima del mensaje (incluida).
+            end_date (date, optional): Fecha máxima del mensaje (incluida).
+            chats (str | iterable, optional): Limitar la búsqueda a este chat o a estos chats.
+            limit (int): Número máximo de resultados.
+        Returns:
+            list: Mensajes {'chat', 'date', 'time', 'sender', 'message'}, del más reciente al más antiguo.
+        """
+        tokens = set(tokenize(query))
+        if not tokens:
+            return []
+        lists = [self.postings.get(token) for token in tokens]
+        if not all(lists):
+            return []
+        lists.sort(key=len)
+        candidates, others = lists[0], lists[1:]
+
+        min_ordinal = start_date.toordinal() if isinstance(start_date, date) else None
+        max_ordinal = end_date.toordinal() if isinstance(end_date, date) else None
+        if isinstance(chats, str):
+            chats = [chats]
+        chats = set(chats) if chats else None
+
+        results = []
+        for doc_id in candidates:
+            if not all(_contains(other, doc_id) for other in others):
+                continue
+            chat_name, ordinal, date_str, time_str, sender, message = self.docs[doc_id]
+            if min_ordinal is not None and ordinal < min_ordinal:
+                continue
+            if max_ordinal is not None and ordinal > max_ordinal:
+                continue
+            if chats is not None and chat_name not in chats:
+                continue
+            results.append((ordinal, time_str, doc_id))
+
+        # Los ids siguen el orden de los ficheros; ordenar por fecha y hora reales
+        results.sort(reverse=True)
+        return [self._to_result(doc_id) for _, _, doc_id in results[:limit]]
+
+    def _to_result(self, doc_id):
+        chat_name, _, date_str, time_str, sender, message = self.docs[doc_id]
+        return {"chat": chat_name, "date": date_str, "time": time_str, "sender": sender, "message": message}
+
+
+def _contains(sorted_ids, doc_id):
+    i = bisect_left(sorted_ids, doc_id)
+    return i < len(sorted_ids) and sorted_ids[i] == doc_id
+
+
+# Un índice cargado por ruta y proceso: cada búsqueda solo comprueba los ficheros modificados
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_chat_index(index_path=DEFAULT_INDEX_PATH):
+    """Índice compartido del proceso; se lee del disco solo la primera vez."""
+    with _indexes_lock:
+        index = _indexes.get(index_path)
+        if index is None:
+            index = ChatSearchIndex(index_path)
+            index.load()
+            _indexes[index_path] = index
+        return index
+
+
+def search_chats(query, start_date=None, end_date=None, chats=None, limit=50,
+                 directory=DEFAULT_CHATS_DIR, index_path=DEFAULT_INDEX_PATH):
+    """
+    Pone al día el índice del proceso con los chats del directorio y busca.
+    El índice solo se vuelve a guardar si ha cambiado.
+    """
+    index = get_chat_index(index_path)
+    with _indexes_lock:
+        index.update(directory)
+        if index.dirty:
+            index.save()
+        return index.search(query, start_date=start_date, end_date=end_date, chats=chats, limit=limit)
@@ -5,35 +5,96 @@ import pandas as pd
 import spacy
 import random
 import datetime
+from functools import lru_cache
 from datetime import datetime as dttime, date, time, timedelta, timezone # Renombramos para evitar conflictos
 
 import dateparser
-from calendar_api_setting.calendar_api import get_events
+from bisect import bisect_left
+from calendar_api_setting.calendar_api import get_events, get_events_between
+from models.chat_index import parse_chat_line
 from utils.common_functions import show_error_dialog
 from utils.event_handler import confirm_event, reject_event
 
 # Load the spaCy model
 nlp = spacy.load("es_core_news_lg")
 
+# Vocabularios de relevancia por categoría. Se compilan en un único autómata (regex combinada)
+# para clasificar cada mensaje en una sola pasada.
+RELEVANCE_VOCABULARY = {
+    'horario': ['horario', 'hora', 'mañana', 'tarde', 'noche', 'cita', 'nocturnidad', 'pasado', 'mes siguiente', 'próximo'],
+    'disponibilidad': ['disponibilidad', 'disponible', 'disponibles', 'libre', 'libres'],
+    'ubicacion': ['ubicación', 'dirección', 'lugar', 'envío', 'localización', 'sede', 'oficina', 'local', 'calle', 'avenida', 'paseo', 'nave', 'hotel', 'plaza'],
+    'presupuesto': ['precio', 'tarifa', 'coste', 'valor', 'factura', 'pedido', 'importe', 'presupuesto', 'cotización'],
+    'urgencia': ['urgente', 'importante', 'revisar', 'última', 'último', 'urgencia', 'inmediato', 'necesito', 'requiero'],
+    'tarea': ['operar', 'realizar', 'instalar', 'desmontar', 'programar', 'hacer', 'programación', 'configuración', 'instalación', 'montaje', 'mantenimiento', 'streaming', 'pantalla', 'tiras led', 'led', 'iluminación', 'luz', 'MA2', 'MA3', 'chamsys', 'resolume', 'novastar', 'procesador', 'escalador', 'sender', 'tarima', 'm', 'técnico de contenido', 'vimix', 'obs', 'h2', 'h5', 'h7'],
+}
+# Fechas específicas ("12 de agosto", "15/09")
+RELEVANCE_DATE_PATTERN = (
+    r'\d{1,2} de (?:enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|octubre|noviembre|diciembre)'
+    r'|\d{1,2}[/\-]\d{1,2}'
+)
+
+
+def _build_relevance_regex():
+    groups = []
+    for category, terms in RELEVANCE_VOCABULARY.items():
+        # Términos más largos primero para que "tiras led" gane a "led"
+        alternation = '|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+        groups.append(rf'(?P<{category}>\b(?:{alternation})\b)')
+    groups.append(rf'(?P<fecha>\b(?:{RELEVANCE_DATE_PATTERN})\b)')
+    return re.compile('|'.join(groups), re.IGNORECASE)
+
+
+_RELEVANCE_RE = _build_relevance_regex()
+
+
 def is_relevant_message(message):
     """
     Determina si un mensaje es relevante basado en su contenido.
     :param message: El contenido del mensaje.
     :return: True si el mensaje es relevante, False en caso contrario.
     """
-    # Expresiones regulares para detectar información relevante
-    patterns = [
-        r'\b(horario|hora|mañana|tarde|noche|cita|disponibilidad|nocturnidad|pasado|mes siguiente|próximo)\b',  # Horarios
-        r'\b(ubicación|dirección|lugar|envío|localización|sede|oficina|local|calle|avenida|paseo|nave|hotel|plaza)\b'  # Ubicaciones,
-        r'\b(precio|tarifa|coste|valor|factura|pedido|importe|presupuesto|cotización)\b',  # Presupuestos
-        r'\b(urgente|importante|revisar|última|último|urgencia|inmediato|necesito|requiero)\b',  # Urgencias
-        r'\b(\d{1,2} de (enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|octubre|noviembre|diciembre))\b',  # Fechas específicas
-        r'\b(operar|realizar|instalar|desmontar|programar|hacer|programación|configuración|instalación|montaje|mantenimiento|streaming|pantalla|tiras led|led|iluminación|luz|MA2|MA3|chamsys|resolume|novastar|procesador|escalador|sender|tarima|m|técnico de contenido|vimix|obs|h2|h5|h7)\b',  # Tareas/Equipos
-    ]
-    for pattern in patterns:
-        if re.search(pattern, message, re.IGNORECASE):
-            return True
-    return False
+    return bool(message) and _RELEVANCE_RE.search(message) is not None
+
+
+def classify_message(message):
+    """
+    Devuelve las categorías de relevancia presentes en un mensaje, en una sola pasada.
+    :param message: El contenido del mensaje.
+    :return: Conjunto de categorías (vacío si el mensaje no es relevante).
+    """
+    if not message:
+        return set()
+    return {match.lastgroup for match in _RELEVANCE_RE.finditer(message)}
+
+
+def prefilter_messages(messages, text_key="message"):
+    """
+    Etapa de pre-filtrado previa al procesamiento NLP/fechas.
+    Args:
+        messages (list): Lista de mensajes (dict).
+        text_key (str): Clave del texto del mensaje ("message" en load_chats, "text" en resúmenes).
+    Returns:
+        tuple: (flags, stats) donde flags es una lista de bool paralela a messages
+               y stats un dict con 'total', 'relevant', 'skipped' y 'by_category'.
+    """
+    flags = []
+    by_category = {}
+    for msg in messages:
+        categories = classify_message(msg.get(text_key, ""))
+        flags.append(bool(categories))
+        for category in categories:
+            by_category[category] = by_category.get(category, 0) + 1
+
+    relevant = sum(flags)
+    stats = {
+        'total': len(flags),
+        'relevant': relevant,
+        'skipped': len(flags) - relevant,
+        'by_category': by_category
+    }
+    print(f"[INFO] Pre-filtro de relevancia: {stats['relevant']}/{stats['total']} mensajes relevantes, {stats['skipped']} omitidos del NLP.")
+    return flags, stats
 
 def extract_relevant_messages(chat, color):
     messages = []
@@ -183,104 +244,182 @@ def load_chats(directory="data/chats"):
             
             with open(os.path.join(directory, filename), "r", encoding="utf-8") as file:
                 for line in file:
-                    # ✅ Acepta 1 o 2 dígitos en día/mes/hora/minuto
-                    match = re.match(r'(\d{1,2}/\d{1,2}/\d{2}), (\d{1,2}:\d{2}) - ([^:]+): (.+)', line.strip())
-                    if match:
-                        date_str, time_str, sender, message = match.groups()
-                        # Normalizar a 2 dígitos (opcional, para consistencia)
-                        try:
-                            dt = datetime.strptime(f"{date_str} {time_str}", "%d/%m/%y %H:%M")
-                            normalized_date = dt.strftime("%d/%m/%y")
-                            normalized_time = dt.strftime("%H:%M")
-                        except:
-                            normalized_date = date_str
-                            normalized_time = time_str
-                        chat_data["messages"].append({
-                            "date": normalized_date,
-                            "time": normalized_time,
-                            "sender": sender,
-                            "message": message
-                        })
+                    # Mismo parser de líneas que el índice de búsqueda (models/chat_index.py)
+                    message = parse_chat_line(line)
+                    if message:
+                        chat_data["messages"].append(message)
             chats.append(chat_data)
     return chats
 
-def infer_date(text):
+# --- Reconocedor rápido de fechas (antes de recurrir a dateparser) ---
+MESES = {
+    'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4, 'mayo': 5, 'junio': 6,
+    'julio': 7, 'agosto': 8, 'septiembre': 9, 'setiembre': 9, 'octubre': 10,
+    'noviembre': 11, 'diciembre': 12
+}
+
+# Patrones compilados una sola vez al importar el módulo
+_DIA_DE_MES_RE = re.compile(
+    r'\b(\d{1,2})\s+de\s+(' + '|'.join(MESES) + r')(?:\s+(?:de\s+)?(\d{4}))?\b'
+)
+# "15/09", "el 15-09", "15/09/25", "15.09.2025" (el punto solo con año, para no confundir con horas "10.30").
+# Sin dígitos ni separadores pegados: "05-12" dentro de "2024-05-12" no es una fecha día-mes.
+_FECHA_NUMERICA_RE = re.compile(
+    r'(?<![\d/.\-])(\d{1,2})(?:[/\-](\d{1,2})(?:[/\-](\d{2,4}))?|\.(\d{1,2})\.(\d{2,4}))(?![/.\-]?\d)'
+)
+_PASADO_MANANA_RE = re.compile(r'\bpasado\s+mañana\b')
+# "mañana" como día, no "por la mañana" / "de la mañana"
+_MANANA_RE = re.compile(r'(?<!la )\bmañana\b')
+_HOY_RE = re.compile(r'\bhoy\b')
+_DENTRO_DE_RE = re.compile(r'\bdentro\s+de\s+(\d+)\s*(d[ií]as?|semanas?)?')
+_HORA_RE = re.compile(r'\b(?:a|sobre)\s+las?\s+([01]?\d|2[0-3])[:.]([0-5]\d)\b')
+_ESPACIOS_RE = re.compile(r'\s+')
+
+HORA_POR_DEFECTO = time(9, 0)
+
+
+def normalize_date_text(text):
+    """Normaliza un texto para la inferencia de fechas (minúsculas y espacios colapsados)."""
+    return _ESPACIOS_RE.sub(' ', text or '').strip().lower()
+
+
+def _build_date(year, month, day):
+    """Devuelve un date válido o None si los componentes no forman una fecha."""
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _expand_year(year_str, reference_date):
+    if not year_str:
+        return reference_date.year
+    year = int(year_str)
+    return year + 2000 if year < 100 else year
+
+
+def fast_parse_date(text, reference_date):
+    """
+    Reconoce las formas de fecha más habituales en los chats sin usar dateparser.
+    Args:
+        text (str): Texto ya normalizado con normalize_date_text.
+        reference_date (date): Fecha de referencia para las expresiones relativas.
+    Returns:
+        tuple | None: (fecha, hora) si se reconoce la fecha, None en caso contrario.
+    """
+    hora = HORA_POR_DEFECTO
+    match = _HORA_RE.search(text)
+    if match:
+        hora = time(int(match.group(1)), int(match.group(2)))
+
+    # 1. "12 de agosto", "12 de agosto de 2025"
+    match = _DIA_DE_MES_RE.search(text)
+    if match:
+        fecha = _build_date(
+            _expand_year(match.group(3), reference_date), MESES[match.group(2)], int(match.group(1))
+        )
+        if fecha:
+            return fecha, hora
+
+    # 2. "el 15/09", "15-09-25", "15.09.2025"
+    for match in _FECHA_NUMERICA_RE.finditer(text):
+        day = int(match.group(1))
+        month = match.group(2) or match.group(4)
+        year = match.group(3) or match.group(5)
+        fecha = _build_date(_expand_year(year, reference_date), int(month), day)
+        if fecha:
+            return fecha, hora
+
+    # 3. Expresiones relativas
+    if _PASADO_MANANA_RE.search(text):
+        return reference_date + timedelta(days=2), hora
+    if _MANANA_RE.search(text):
+        return reference_date + timedelta(days=1), hora
+    if _HOY_RE.search(text):
+        return reference_date, hora
+    match = _DENTRO_DE_RE.search(text)
+    if match:
+        amount = int(match.group(1))
+        if match.group(2) and match.group(2).startswith('semana'):
+            return reference_date + timedelta(weeks=amount), hora
+        return reference_date + timedelta(days=amount), hora
+
+    return None
+
+
+def infer_date(text, reference_date=None):
     """
     Intenta inferir una fecha y una hora desde un texto.
+    Primero prueba el reconocedor rápido y solo recurre a dateparser si no hay coincidencia.
+    Los resultados se memorizan por (texto normalizado, fecha de referencia).
     Args:
         text (str): El texto del mensaje.
+        reference_date (date, optional): Fecha de referencia. Por defecto, hoy.
     Returns:
         tuple: Una tupla (fecha, hora) donde:
             - fecha es un objeto datetime.date.
             - hora es un objeto datetime.time.
     """
-    today = dttime.now().date() # Asumiendo dttime es datetime.datetime
+    if reference_date is None:
+        reference_date = dttime.now().date()
+    return _infer_date_cached(normalize_date_text(text), reference_date)
+
+
+@lru_cache(maxsize=4096)
+def _infer_date_cached(text, today):
+    # 0. Camino rápido: formas comunes en español sin pasar por dateparser
+    fast_result = fast_parse_date(text, today)
+    if fast_result:
+        return fast_result
+
+    settings = {'DATE_ORDER': 'DMY', 'RELATIVE_BASE': dttime.combine(today, time())}
 
     # 1. Intentar parseo general con dateparser para obtener fecha y hora
     try:
-        parsed_dt = dateparser.parse(text, languages=['es'], settings={'DATE_ORDER': 'DMY'})
+        parsed_dt = dateparser.parse(text, languages=['es'], settings=settings)
         if parsed_dt:
-            print(f"[DEBUG] dateparser encontró: {parsed_dt}")
             # dateparser.parse puede devolver datetime o date, asegurémonos de devolver (date, time)
             if isinstance(parsed_dt, dttime): # Si es un datetime
                 return parsed_dt.date(), parsed_dt.time()
             elif isinstance(parsed_dt, date): # Si es solo una fecha (date)
                 # Devolver la fecha con una hora por defecto
-                return parsed_dt, time(9, 0) # Hora por defecto 09:00
+                return parsed_dt, HORA_POR_DEFECTO
             # Si es otro tipo (raro, pero por si acaso), fallback
     except Exception as e:
         print(f"[WARNING] Error al parsear con dateparser: {e}")
 
-    # 2. Lógica específica para "12 de agosto" u otros formatos no capturados por dateparser
-    # (Aunque dateparser debería capturar esto, por si acaso...)
-    match = re.search(r'\b(\d{1,2})\s+de\s+(\w+)\b', text, re.IGNORECASE)
-    if match:
-        day_str = match.group(1)
-        month_str = match.group(2)
-        try:
-            # Intentar parsear solo "12 agosto"
-            parsed_d = dateparser.parse(f"{day_str} {month_str}", languages=['es'], settings={'DATE_ORDER': 'DMY'})
-            if parsed_d:
-                 # Asegurar devolución de (date, time)
-                if isinstance(parsed_d, dttime):
-                    return parsed_d.date(), parsed_d.time()
-                elif isinstance(parsed_d, date):
-                    return parsed_d, time(9, 0) # Hora por defecto
-        except Exception as e:
-             print(f"[WARNING] Error al parsear patrón específico 'dia de mes': {e}")
-    
-    # 3. Lógica para palabras clave
-    lowered = text.lower()
-    if "mañana" in lowered:
-        print("[DEBUG] Palabra clave 'mañana' encontrada.")
-        return today + timedelta(days=1), time(9, 0)
-    elif "próximo" in lowered: # Simplificación
-        print("[DEBUG] Palabra clave 'próximo' encontrada.")
-        return today + timedelta(weeks=1), time(9, 0)
-    elif "dentro de" in lowered:
-        match = re.search(r'dentro de (\d+)', lowered)
-        if match:
-            days = int(match.group(1))
-            print(f"[DEBUG] Palabra clave 'dentro de {days} días' encontrada.")
-            return today + timedelta(days=days), time(9, 0)
+    # 2. Lógica para palabras clave no cubiertas por el camino rápido
+    if "próximo" in text: # Simplificación
+        return today + timedelta(weeks=1), HORA_POR_DEFECTO
 
-    # 4. Fallback: Si no se encuentra nada específico, usar dateparser una última vez
-    # y si eso falla, usar hoy.
+    # 3. Fallback: usar dateparser una última vez sin restricciones de orden
     try:
-        # Intentar dateparser una vez más sin restricciones
-        parsed_final = dateparser.parse(text, languages=['es'])
+        parsed_final = dateparser.parse(text, languages=['es'], settings={'RELATIVE_BASE': settings['RELATIVE_BASE']})
         if parsed_final:
              if isinstance(parsed_final, dttime):
                 return parsed_final.date(), parsed_final.time()
              elif isinstance(parsed_final, date):
-                return parsed_final, time(9, 0)
+                return parsed_final, HORA_POR_DEFECTO
     except Exception as e:
         print(f"[WARNING] Error en fallback dateparser: {e}")
 
-    # 5. Último Fallback: Hoy a las 09:00
-    return today, time(9, 0)         
-             
-def handle_chat_message(message, calendar_window):
+    # 4. Último Fallback: Hoy a las 09:00
+    return today, HORA_POR_DEFECTO
+
+def availability_window(inferred_date, time_str=None):
+    """
+    Rango (inicio, fin) que se consulta para un mensaje: 10 horas desde la hora indicada
+    (o las 09:00). La hora de fin se toma siempre en el mismo día que el inicio.
+    """
+    start_time = dttime.strptime(time_str, "%H:%M").time() if time_str else time(9, 0)
+    end_time = (dttime.combine(inferred_date, start_time) + timedelta(hours=10)).time()
+    return dttime.combine(inferred_date, start_time), dttime.combine(inferred_date, end_time)
+
+def handle_chat_message(message, calendar_window, available=None):
+    """
+    Genera la respuesta de disponibilidad para un mensaje.
+    Si available viene precalculado (ver precompute_availability) no se consulta el calendario.
+    """
     inferred_date, time_str_unused = infer_date(message)
     if not inferred_date:
         return "No se entendió la fecha."
@@ -289,78 +428,189 @@ def handle_chat_message(message, calendar_window):
     time_str = extract_time(message)
     location = extract_location(message)
     
-    # Usar horario extraído o por defecto
-    start_time = datetime.datetime.strptime(time_str, "%H:%M").time() if time_str else datetime.time(9, 0)
-    end_time = (datetime.datetime.combine(datetime.date.today(), start_time) + datetime.timedelta(hours=10)).time()  # 10 horas
-    
-    # Crear datetime completo
-    start_dt = dttime.combine(inferred_date, start_time)
-    end_dt = dttime.combine(inferred_date, end_time)
+    start_dt, end_dt = availability_window(inferred_date, time_str)
     
-    if check_availability(start_dt, end_dt, calendar_window):
+    if available is None:
+        available = check_availability(start_dt, end_dt, calendar_window)
+    if available:
         return f"Disponible para {location or 'ubicación no especificada'} a las {time_str or '09:00-19:00'}. ¿Crear evento?"
     else:
         return "No hay disponibilidad en ese horario."
 
+def mentions_availability(text):
+    """Indica si un mensaje pregunta por disponibilidad ("disponible"/"libre")."""
+    lowered = (text or "").lower()
+    return "disponible" in lowered or "libre" in lowered
+
+def _event_date_range(event):
+    """Devuelve (fecha_inicio, fecha_fin) de un evento con hora, o None si no tiene 'dateTime'."""
+    try:
+        start_str = event['start']['dateTime']
+        end_str = event['end']['dateTime']
+    except KeyError:
+        return None
+    try:
+        return dttime.fromisoformat(start_str).date(), dttime.fromisoformat(end_str).date()
+    except ValueError:
+        return dateparser.parse(start_str).date(), dateparser.parse(end_str).date()
+
+def _ranges_overlap(start_date, end_date, event_start, event_end):
+    return start_date < event_end and end_date > event_start
+
 def check_availability(start_dt, end_dt, calendar_window):
     events = get_events()
     start_date = start_dt.date()
     end_date = end_dt.date()
     
     for event in events:
-        try:
-            event_start = dateparser.parse(event['start']['dateTime']).date()
-            event_end = dateparser.parse(event['end']['dateTime']).date()
-            
-            if start_date < event_end and end_date > event_start:
-                return False  # Hay conflicto
-        except KeyError:
-            continue
+        event_range = _event_date_range(event)
+        if event_range and _ranges_overlap(start_date, end_date, *event_range):
+            return False  # Hay conflicto
     return True
 
-def generate_summary(messages):
+class AvailabilityIndex:
     """
-    Generar un resumen de las tareas y horarios basados en los mensajes relevantes.
+    Índice en memoria de los eventos del calendario para consultar disponibilidad
+    sin volver a llamar a la API. Los eventos se ordenan por fecha de inicio y se
+    guarda el máximo acumulado de las fechas de fin, de modo que cada consulta es
+    una búsqueda binaria.
+    """
+    def __init__(self, events):
+        ranges = sorted(filter(None, (_event_date_range(event) for event in events)))
+        self._starts = [event_start for event_start, _ in ranges]
+        self._max_ends = []
+        max_end = None
+        for _, event_end in ranges:
+            max_end = event_end if max_end is None or event_end > max_end else max_end
+            self._max_ends.append(max_end)
+
+    def is_available(self, start_date, end_date):
+        # Eventos con inicio < end_date: los primeros 'idx' de la lista ordenada
+        idx = bisect_left(self._starts, end_date)
+        if idx == 0:
+            return True
+        # Hay conflicto si alguno de ellos termina después de start_date
+        return not self._max_ends[idx - 1] > start_date
+
+def precompute_availability(messages, relevant_flags=None, text_key="message"):
     """
+    Calcula la disponibilidad de todos los mensajes de un chat con una sola consulta al calendario.
+    Infiere la fecha de cada mensaje que pregunta por disponibilidad, consulta los eventos
+    del rango [fecha mínima, fecha máxima] una vez y añade a cada mensaje las claves
+    'inferred_date' (fecha, hora) y 'available' (bool).
+    Args:
+        messages (list): Lista de mensajes (dict).
+        relevant_flags (list, optional): Resultado de prefilter_messages; se omiten los no relevantes.
+        text_key (str): Clave del texto del mensaje.
+    Returns:
+        int: Número de mensajes con disponibilidad calculada.
+    """
+    if relevant_flags is None:
+        relevant_flags = [True] * len(messages)
+
+    pending = []
+    for msg, is_relevant in zip(messages, relevant_flags):
+        msg.pop('available', None)
+        msg.pop('inferred_date', None)
+        text = msg.get(text_key, "")
+        if not is_relevant or not mentions_availability(text):
+            continue
+        inferred_date, inferred_time = infer_date(text)
+        # Mismo rango que handle_chat_message
+        start_dt, end_dt = availability_window(inferred_date, extract_time(text))
+        msg['inferred_date'] = (inferred_date, inferred_time)
+        pending.append((msg, start_dt.date(), end_dt.date()))
+
+    if not pending:
+        return 0
+
+    range_start = min(start for _, start, _ in pending)
+    range_end = max(end for _, _, end in pending)
+    index = AvailabilityIndex(get_events_between(range_start, range_end))
+    for msg, start_date, end_date in pending:
+        msg['available'] = index.is_available(start_date, end_date)
+
+    print(f"[INFO] Disponibilidad precalculada para {len(pending)} mensajes con una consulta ({range_start} - {range_end}).")
+    return len(pending)
+
+# Tamaño de lote para nlp.pipe en los resúmenes (acota memoria en chats largos)
+SUMMARY_BATCH_SIZE = 64
+
+def _summary_date_key(date_str):
+    """Clave de orden cronológico para fechas 'dd/mm/yy'; las no parseables van al final."""
+    try:
+        return (0, dttime.strptime(date_str, "%d/%m/%y").date())
+    except (TypeError, ValueError):
+        return (1, str(date_str))
+
+def iter_summary(messages, only_relevant=False, last_n_days=None, batch_size=SUMMARY_BATCH_SIZE):
+    """
+    Generador del resumen de tareas y horarios: produce el HTML por trozos
+    (uno por día y uno por remitente) en lugar de construirlo entero en memoria.
+    Args:
+        messages (list): Mensajes con las claves 'date', 'time', 'sender', 'text' y 'color'.
+        only_relevant (bool): Descartar los mensajes no relevantes antes de spaCy (desactivado
+            por defecto para no cambiar el resumen de los llamadores existentes).
+        last_n_days (int, optional): Resumir solo los últimos N días con mensajes,
+            contados desde la fecha del último mensaje.
+        batch_size (int): Tamaño de lote para nlp.pipe.
+    Yields:
+        str: Trozos de HTML del resumen.
+    """
+    if only_relevant:
+        flags, _ = prefilter_messages(messages, text_key="text")
+        messages = [message for message, relevant in zip(messages, flags) if relevant]
+
     summary_dict = {}
     for message in messages:
-        date = message['date']
-        if date not in summary_dict:
-            summary_dict[date] = []
-        summary_dict[date].append(message)
+        summary_dict.setdefault(message['date'], []).append(message)
+
+    dates = sorted(summary_dict.keys(), key=_summary_date_key)
+    if last_n_days:
+        parsed = [(d, key[1]) for d, key in ((d, _summary_date_key(d)) for d in dates) if key[0] == 0]
+        if parsed:
+            cutoff = parsed[-1][1] - timedelta(days=last_n_days - 1)
+            dates = [d for d, parsed_date in parsed if parsed_date >= cutoff]
+
+    selected = [message for date in dates for message in summary_dict[date]]
+    # spaCy procesa los textos en lotes acotados, en el mismo orden en que se recorren
+    docs = nlp.pipe((message['text'] for message in selected), batch_size=batch_size)
 
-    summary = ""
     last_date = None
     last_chat = None
-    for date in sorted(summary_dict.keys()):
+    for date in dates:
+        chunk = []
         if last_date and last_date != date:
-            summary += "<br><br>"  # Doble salto de línea al cambiar de fecha
-        summary += f"El día {date}: "
+            chunk.append("<br><br>")  # Doble salto de línea al cambiar de fecha
+        chunk.append(f"El día {date}: ")
         for message in summary_dict[date]:
             if last_chat and last_chat != message['color']:
-                summary += "<br>"  # salto de línea al cambiar de chat
+                chunk.append("<br>")  # salto de línea al cambiar de chat
             # Generar texto natural con spaCy
-            doc = nlp(message['text'])
+            doc = next(docs)
             summary_text = " ".join([sent.text for sent in doc.sents])
-            summary += f"<br> - {message['time']} - {message['sender']}: {summary_text} "
+            chunk.append(f"<br> - {message['time']} - {message['sender']}: {summary_text} ")
             last_chat = message['color']
         last_date = date
-        summary += "<>"  # Salto de línea por cada mensaje diferente
+        chunk.append("<>")  # Salto de línea por cada mensaje diferente
+        yield "".join(chunk)
 
-    # Generar un resumen general con spaCy
+    # Resumen general por remitente, sin concatenar todos sus textos en una sola cadena
+    yield "<br><br>Resumen General:<br><br>"
     sender_texts = {}
-    resumen_general = ""
-    for msg in messages:
-        sender = msg['sender']
-        if sender not in sender_texts:
-            sender_texts[sender] = []
-        sender_texts[sender].append(msg['text'])
-        
-    for sender, value in sender_texts.items():
-        
-        value = "<br> ".join(string for string in value)
-        doc = nlp(value)
-        resumen_general += f"{sender}: ".join([f"{sent.text}<br><br>" for sent in doc.sents])
-    summary += f"<br><br>Resumen General:<br><br>{resumen_general}"
-
-    return summary
+    for message in selected:
+        sender_texts.setdefault(message['sender'], []).append(message['text'])
+
+    for sender, texts in sender_texts.items():
+        chunk = []
+        for doc in nlp.pipe(texts, batch_size=batch_size):
+            chunk.extend(f"{sender}: {sent.text}<br><br>" for sent in doc.sents)
+        yield "".join(chunk)
+
+def generate_summary(messages, only_relevant=False, last_n_days=None):
+    """
+    Generar un resumen de las tareas y horarios basados en los mensajes relevantes.
+    Si only_relevant es True, los mensajes no relevantes se descartan antes de pasar por spaCy.
+    Ver iter_summary para consumir el resumen por trozos.
+    """
+    return "".join(iter_summary(messages, only_relevant=only_relevant, last_n_days=last_n_days))
@@ -0,0 +1,50 @@
+import pytest
+
+for module in ("pandas", "PyQt6", "googleapiclient"):
+    pytest.importorskip(module)
+
+from utils.auto_text_utils import (
+    ALTA_SS, ENVIAR_FACTURA, PEDIR_FACTURA, collect_month_events, format_days_spanish, generate_month_texts)
+
+def event(day, description, summary="", company=None, month=3):
+    ev = {'start': {'dateTime': f"2025-{month:02d}-{day:02d}T09:00:00+01:00"},
+          'description': description, 'summary': summary}
+    if company:
+        ev['extendedProperties'] = {'private': {'company': company}}
+    return ev
+
+EVENTS = [
+    event(3, "250€ MADWORKS", "Montaje 250€"),
+    event(4, "250€ MADWORKS"),
+    event(5, "250€ MADWORKS"),
+    event(10, "300€ LAST LAP", company="LAST LAP S.L."),
+    event(12, "Sin tarifa"),                      # Sin importe: no es un bolo
+    event(28, "250€ MADWORKS", month=2),          # Otro mes
+]
+
+def test_format_days_spanish_groups_ranges():
+    assert format_days_spanish([7, 1, 2, 3, 5, 8, 9, 2], "Enero") == "1 al 3, 5 y 7 al 9 de enero"
+    assert format_days_spanish([4], "Marzo") == "4 de marzo"
+    assert format_days_spanish([1, 3], "Marzo") == "1 y 3 de marzo"
+    assert format_days_spanish([], "Marzo") == "[días]"
+
+def test_collect_month_events_groups_by_company_in_one_pass():
+    companies = collect_month_events(EVENTS, 2025, 3)
+    assert sorted(companies) == ["LAST LAP S.L.", "MADWORKS"]
+    assert companies["MADWORKS"] == {'tarifa': "250", 'days': {3, 4, 5}, 'total': 750.0}
+    assert companies["LAST LAP S.L."]['days'] == {10}
+
+def test_generate_month_texts_one_per_company():
+    sources = (EVENTS, None, None)
+    altas = generate_month_texts(ALTA_SS, 2025, 3, sources=sources)
+    assert [t['empresa'] for t in altas] == ["LAST LAP S.L.", "MADWORKS"]
+    assert altas[1]['subject'] == "Alta en S.S. MADWORKS Marzo 2025"
+    assert "3 al 5 de marzo" in altas[1]['body']
+
+    pedir = generate_month_texts(PEDIR_FACTURA, 2025, 3, sources=sources)
+    assert "factura de 750.00€ + IVA" in pedir[1]['body']
+    enviar = generate_month_texts(ENVIAR_FACTURA, 2025, 3, sources=sources)
+    assert enviar[0]['subject'] == "Factura LAST LAP S.L. Marzo 2025 [ref_cliente]"
+
+    with pytest.raises(ValueError):
+        generate_month_texts("otro", 2025, 3, sources=sources)
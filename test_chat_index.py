@@ -0,0 +1,79 @@
+from datetime import date
+
+import pytest
+from models.chat_index import ChatSearchIndex, search_chats
+
+VISUALMAX = (
+    "18/12/24, 15:03 - Ana: Montaje de la pantalla en el Hotel Plaza\n"
+    "19/12/24, 9:10 - Luis: ¿Traes el Novastar?\n"
+)
+SONIDO = "02/01/25, 10:00 - Marta: Ubicación del hotel: Calle Mayor 1\n"
+
+
+@pytest.fixture
+def chats_dir(tmp_path):
+    directory = tmp_path / "chats"
+    directory.mkdir()
+    (directory / "visualmax.txt").write_text(VISUALMAX, encoding="utf-8")
+    (directory / "sonido.txt").write_text(SONIDO, encoding="utf-8")
+    return directory
+
+
+@pytest.fixture
+def index(tmp_path, chats_dir):
+    index = ChatSearchIndex(str(tmp_path / "chat_index.json"))
+    assert index.update(str(chats_dir)) == 3
+    return index
+
+
+def test_search_ignores_accents_and_sorts_newest_first(index):
+    assert [r["chat"] for r in index.search("HOTEL")] == ["sonido", "visualmax"]
+    assert index.search("ubicacion")[0]["sender"] == "Marta"
+    assert [r["message"] for r in index.search("hotel plaza")] == ["Montaje de la pantalla en el Hotel Plaza"]
+    assert index.search("inexistente") == []
+
+
+def test_date_and_chat_filters(index):
+    assert [r["chat"] for r in index.search("hotel", start_date=date(2025, 1, 1))] == ["sonido"]
+    assert [r["chat"] for r in index.search("hotel", end_date=date(2024, 12, 31))] == ["visualmax"]
+    assert [r["chat"] for r in index.search("hotel", chats=["visualmax"])] == ["visualmax"]
+    # Un nombre suelto es un chat, no un conjunto de letras
+    assert [r["chat"] for r in index.search("hotel", chats="sonido")] == ["sonido"]
+
+
+def test_update_reads_only_appended_lines(index, chats_dir):
+    with open(chats_dir / "visualmax.txt", "a", encoding="utf-8") as f:
+        f.write("20/12/24, 8:00 - Ana: Novastar cargado\n")
+    assert index.update(str(chats_dir)) == 1
+    assert index.update(str(chats_dir)) == 0
+    assert len(index.search("novastar")) == 2
+
+
+def test_rewritten_export_is_reindexed(index, chats_dir):
+    # Misma longitud y contenido distinto: no debe leerse desde el desplazamiento antiguo
+    rewritten = VISUALMAX.replace("Novastar", "Resolume")
+    assert len(rewritten) == len(VISUALMAX)
+    (chats_dir / "visualmax.txt").write_text(rewritten, encoding="utf-8")
+    index.files["visualmax"]["mtime"] = 0
+    assert index.update(str(chats_dir)) == 2
+    assert index.search("novastar") == []
+    assert len(index.search("resolume")) == 1
+    assert len(index.docs) == 3
+
+
+def test_deleted_chat_is_dropped_and_index_persists(index, chats_dir):
+    (chats_dir / "sonido.txt").unlink()
+    index.update(str(chats_dir))
+    index.save()
+    reloaded = ChatSearchIndex(index.index_path)
+    assert reloaded.load()
+    assert [r["chat"] for r in reloaded.search("hotel")] == ["visualmax"]
+
+
+def test_search_chats_keeps_one_index_per_process(tmp_path, chats_dir):
+    index_path = str(tmp_path / "shared.json")
+    assert len(search_chats("hotel", directory=str(chats_dir), index_path=index_path)) == 2
+    (tmp_path / "shared.json").unlink()
+    # El índice ya está en memoria y no ha cambiado nada: no se vuelve a leer ni a guardar
+    assert len(search_chats("hotel", directory=str(chats_dir), index_path=index_path)) == 2
+    assert not (tmp_path / "shared.json").exists()
@@ -0,0 +1,80 @@
+from datetime import date, datetime, time
+
+import pytest
+
+dateparser = pytest.importorskip("dateparser")
+for module in ("pandas", "spacy", "googleapiclient", "PyQt6"):
+    pytest.importorskip(module)
+
+import models.chat_parser as chat_parser
+from models.chat_parser import (
+    availability_window, classify_message, fast_parse_date, handle_chat_message, infer_date, normalize_date_text,
+    precompute_availability, prefilter_messages)
+
+REFERENCE = date(2025, 3, 10)
+
+COMMON_FORMATS = [
+    "12 de agosto",
+    "el 12 de agosto de 2025",
+    "el 15/09",
+    "15-09-25",
+    "15/09/2025",
+    "15.09.2025",
+    "mañana",
+    "pasado mañana",
+    "hoy",
+    "dentro de 3 días",
+]
+
+
+@pytest.mark.parametrize("text", COMMON_FORMATS)
+def test_fast_path_matches_dateparser(text):
+    expected = dateparser.parse(text, languages=['es'], settings={
+        'DATE_ORDER': 'DMY', 'RELATIVE_BASE': datetime.combine(REFERENCE, time())})
+    assert expected is not None
+    fecha, _ = fast_parse_date(normalize_date_text(text), REFERENCE)
+    assert fecha == expected.date()
+
+
+def test_fast_path_reads_explicit_time():
+    assert fast_parse_date(normalize_date_text("El 15/09 a las 10:30"), REFERENCE) == (date(2025, 9, 15), time(10, 30))
+    assert fast_parse_date("por la mañana", REFERENCE) is None
+
+
+def test_iso_dates_are_not_read_as_day_month():
+    # "05-12" dentro de "2024-05-12" no es el 5 de diciembre
+    assert fast_parse_date("nos vemos el 2024-05-12", REFERENCE) is None
+    assert infer_date("nos vemos el 2024-05-12", REFERENCE)[0] == date(2024, 5, 12)
+
+
+def test_classify_message_returns_every_category_in_one_pass():
+    assert classify_message("¿Estás disponible el 12 de agosto para montar la pantalla en el hotel?") == {
+        'disponibilidad', 'fecha', 'tarea', 'ubicacion'}
+    assert classify_message("jajaja vale") == set()
+    assert classify_message("") == set()
+
+
+def test_prefilter_messages_flags_and_counts():
+    messages = [{"text": "Urgente: revisar la factura"}, {"text": "ok"}, {"text": "¿Libre mañana por la tarde?"}]
+    flags, stats = prefilter_messages(messages, text_key="text")
+    assert flags == [True, False, True]
+    assert stats['total'] == 3 and stats['relevant'] == 2 and stats['skipped'] == 1
+    assert stats['by_category']['urgencia'] == 1
+    assert stats['by_category']['horario'] == 1
+
+
+def test_availability_window_keeps_end_on_start_day():
+    assert availability_window(date(2025, 9, 15)) == (datetime(2025, 9, 15, 9), datetime(2025, 9, 15, 19))
+    assert availability_window(date(2025, 9, 15), "16:00") == (datetime(2025, 9, 15, 16), datetime(2025, 9, 15, 2))
+
+def test_precomputed_availability_matches_fallback_after_14h(monkeypatch):
+    # Evento que empieza la noche del 15 y termina el 17
+    events = [{'start': {'dateTime': '2025-09-15T20:00:00+02:00'}, 'end': {'dateTime': '2025-09-17T02:00:00+02:00'}}]
+    monkeypatch.setattr(chat_parser, "get_events", lambda *args, **kwargs: events)
+    monkeypatch.setattr(chat_parser, "get_events_between", lambda *args, **kwargs: events)
+    for hour in ("09:00", "14:00", "16:00", "22:30"):
+        message = {"message": f"¿Estás disponible el 15/09/2025 a las {hour}?"}
+        assert precompute_availability([message]) == 1
+        assert message['inferred_date'][0] == date(2025, 9, 15)
+        assert (handle_chat_message(message["message"], None, available=message['available'])
+                == handle_chat_message(message["message"], None))
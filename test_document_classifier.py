@@ -0,0 +1,83 @@
+import pytest
+
+from ia_processor.utils.document_classifier import DocumentClassifier
+
+def test_keyword_classifier_routes_by_first_page_and_flags_low_confidence():
+    classifier = DocumentClassifier()
+    results = classifier.predict_batch([
+        "FACTURA Nº 182454 Fecha: 31/12/2024 CIF B12345678 Base imponible 1.749,31 IVA 21% Total factura 2.116,66",
+        "Resolución sobre reconocimiento de alta en el Régimen Especial de Trabajadores. Tesorería General de la Seguridad Social",
+        "Liquidación de enero 2025. Importe bruto 1.200,00 Retención IRPF 180,00 Neto 1.020,00",
+        "Lorem ipsum",
+    ])
+    assert [r["doc_type"] for r in results] == ["FACTURA", "ALTA", "LIQUIDACION", "OTROS"]
+    assert all(r["method"] == "keywords" for r in results)
+    assert results[0]["confidence"] > 0.5
+    assert results[3]["confidence"] == 0.0
+
+TRAINING = [
+    ("FACTURA Nº 182454 Base imponible 1.749,31 IVA 21% Total factura 2.116,66", "FACTURA"),
+    ("Factura 2024-001 CIF B12345678 Forma de pago transferencia Total 500,00", "FACTURA"),
+    ("Resolución de alta en el Régimen General. Tesorería General de la Seguridad Social", "ALTA"),
+    ("Alta de trabajador en la Seguridad Social, fecha real de alta 01/02/2025", "ALTA"),
+    ("Liquidación de enero. Bruto 1.200,00 Retención IRPF 180,00 Neto 1.020,00", "LIQUIDACION"),
+    ("Nómina de febrero: devengos, deducciones y líquido a percibir 950,00", "LIQUIDACION"),
+]
+
+def test_tfidf_classifier_predicts_saves_and_loads(tmp_path):
+    pytest.importorskip("sklearn")
+    pytest.importorskip("joblib")
+    texts, labels = zip(*TRAINING)
+    classifier = DocumentClassifier(min_confidence=0.0).fit(list(texts), list(labels))
+    results = classifier.predict_batch([
+        "Factura nº 77 con IVA y base imponible",
+        "Tesorería General de la Seguridad Social: alta del trabajador",
+        "Liquidación con retención de IRPF y neto",
+    ])
+    assert [r["doc_type"] for r in results] == ["FACTURA", "ALTA", "LIQUIDACION"]
+    assert all(r["method"] == "tfidf" for r in results)
+    assert all(abs(sum(r["scores"].values()) - 1.0) < 1e-6 for r in results)
+
+    path = tmp_path / "classifier.joblib"
+    classifier.save(path)
+    loaded = DocumentClassifier.load(path)
+    assert loaded.predict(TRAINING[0][0])["doc_type"] == "FACTURA"
+    # Con un umbral inalcanzable todo va a OTROS
+    assert DocumentClassifier(loaded.pipeline, min_confidence=1.01).predict(TRAINING[0][0])["doc_type"] == "OTROS"
+
+def test_first_page_text_reads_only_the_first_page(tmp_path, monkeypatch):
+    ocr_utils = pytest.importorskip("ia_processor.utils.ocr_utils")
+    read = []
+
+    class FakeBackend:
+        def iter_pages(self, pdf_path, order=None):
+            for index in order(3):
+                read.append(index)
+                yield index, {"text": f"página {index + 1}", "width": 595.0, "height": 842.0, "words": []}
+
+    monkeypatch.setattr(ocr_utils, "get_pdf_backend", lambda backend=None: FakeBackend())
+    pdf_path = tmp_path / "documento.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4")
+    assert ocr_utils.extract_first_pages(str(pdf_path), pages=1, use_cache=False) == "página 1\n"
+    assert ocr_utils.extract_first_pages(str(pdf_path), pages=2, use_cache=False) == "página 1\npágina 2\n"
+    assert read == [0, 0, 1]
+
+def test_classify_and_extract_skips_types_without_rules(monkeypatch):
+    classify_documents = pytest.importorskip("ia_processor.classify_documents")
+    documents = {"alta.pdf": "ALTA", "factura.pdf": "FACTURA", "otro.pdf": "OTROS"}
+    extracted = []
+
+    def fake_classify_folder(folder, batch_size=32):
+        for path, doc_type in documents.items():
+            yield {"path": path, "doc_type": doc_type, "confidence": 0.9, "scores": {}, "method": "keywords", "text": ""}
+
+    def fake_extract(path):
+        extracted.append(path)
+        return "FACTURA Nº 182454 Fecha: 31/12/2024 Total: 1.210,00 €"
+
+    monkeypatch.setattr(classify_documents, "classify_folder", fake_classify_folder)
+    monkeypatch.setattr(classify_documents, "extract_text_from_file", fake_extract)
+    results = classify_documents.classify_and_extract("carpeta")
+    assert extracted == ["factura.pdf"]
+    assert [bool(r["entities"]) for r in results] == [False, True, False]
+    assert all("text" not in r for r in results)
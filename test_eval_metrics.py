@@ -0,0 +1,45 @@
+import pytest
+
+from ia_processor.utils.data_split import split_examples, text_bucket
+from ia_processor.utils.eval_metrics import entity_f1, per_label_prf, percentile
+
+def test_percentile_interpolates_linearly():
+    assert percentile([], 50) is None
+    assert percentile([7.0], 95) == 7.0
+    assert percentile([4, 1, 3, 2], 0) == 1
+    assert percentile([4, 1, 3, 2], 100) == 4
+    assert percentile([4, 1, 3, 2], 50) == 2.5
+    assert percentile(list(range(1, 101)), 95) == pytest.approx(95.05)
+
+def test_per_label_prf_keeps_documents_apart():
+    gold = [[(0, 6, "NUMERO_FACTURA"), (10, 20, "FECHA_EMISION")], [(0, 6, "NUMERO_FACTURA")]]
+    predicted = [[(0, 6, "NUMERO_FACTURA"), (30, 36, "IMPORTE_TOTAL")], [(0, 6, "FECHA_EMISION")]]
+    metrics = per_label_prf(gold, predicted)
+
+    # El mismo span en otro documento no cuenta como acierto
+    assert metrics["per_label"]["NUMERO_FACTURA"] == entity_f1(
+        [(0, 0, 6, "NUMERO_FACTURA"), (1, 0, 6, "NUMERO_FACTURA")], [(0, 0, 6, "NUMERO_FACTURA")])
+    assert metrics["per_label"]["NUMERO_FACTURA"]["recall"] == 0.5
+    assert metrics["per_label"]["IMPORTE_TOTAL"] == {"precision": 0.0, "recall": 0.0, "f1": 0.0, "tp": 0, "fp": 1, "fn": 0}
+    assert sorted(metrics["per_label"]) == ["FECHA_EMISION", "IMPORTE_TOTAL", "NUMERO_FACTURA"]
+    micro = metrics["micro"]
+    assert (micro["tp"], micro["fp"], micro["fn"]) == (1, 2, 2)
+    assert micro["f1"] == pytest.approx(1 / 3)
+
+def test_split_is_stable_and_independent_of_order():
+    examples = [{"text": f"FACTURA: {i} Total: {i},00", "entities": []} for i in range(200)]
+    train, test = split_examples(examples, test_size=0.3)
+    assert len(train) + len(test) == len(examples)
+    assert 30 < len(test) < 90
+
+    shuffled_train, shuffled_test = split_examples(list(reversed(examples)), test_size=0.3)
+    assert {e["text"] for e in shuffled_test} == {e["text"] for e in test}
+    assert {e["text"] for e in shuffled_train} == {e["text"] for e in train}
+
+    # Añadir documentos no mueve los que ya estaban
+    _, more_test = split_examples(examples + [{"text": "nuevo", "entities": []}], test_size=0.3)
+    assert {e["text"] for e in test} <= {e["text"] for e in more_test}
+
+    # Cubeta fijada: cambiar el hash cambiaría la partición de evaluaciones anteriores
+    assert text_bucket("FACTURA: 182454") == 215
+    assert text_bucket("Liquidación de enero 2025") == 769
@@ -0,0 +1,32 @@
+from ia_processor.utils.extraction_cache import ExtractionCache, file_sha256
+
+def test_cache_is_keyed_by_content_and_extractor_version(tmp_path):
+    cache = ExtractionCache(tmp_path / "cache.sqlite")
+    original = tmp_path / "factura.pdf"
+    original.write_bytes(b"%PDF-1.4 factura 182454")
+    copy = tmp_path / "copia con otro nombre.pdf"
+    copy.write_bytes(original.read_bytes())
+
+    pages = [{"text": "FACTURA: 182454", "width": 595.0, "height": 842.0,
+              "words": [[10.0, 20.0, 60.0, 30.0, "FACTURA:"], [62.0, 20.0, 100.0, 30.0, "182454"]]}]
+    cache.put(file_sha256(original), "v1", "FACTURA: 182454\n", pages)
+
+    # Mismo contenido con otro nombre: acierto, con la disposición por página intacta
+    assert cache.get(file_sha256(copy), "v1") == {"text": "FACTURA: 182454\n", "pages": pages}
+    # Otra versión del extractor u otro contenido: fallo
+    assert cache.get(file_sha256(copy), "v2") is None
+    copy.write_bytes(b"%PDF-1.4 factura 182455")
+    assert cache.get(file_sha256(copy), "v1") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    assert cache.purge_versions("v2") == 1
+    assert cache.get(file_sha256(original), "v1") is None
+
+def test_page_ocr_is_cached_per_page_and_dpi(tmp_path):
+    cache = ExtractionCache(tmp_path / "cache.sqlite")
+    cache.put_page_text("abc", 2, 300, "ocr-1", "TOTAL: 2.116,66")
+
+    assert cache.get_page_text("abc", 2, 300, "ocr-1") == "TOTAL: 2.116,66"
+    assert cache.get_page_text("abc", 1, 300, "ocr-1") is None
+    assert cache.get_page_text("abc", 2, 200, "ocr-1") is None
+    assert cache.get_page_text("abc", 2, 300, "ocr-2") is None
@@ -0,0 +1,111 @@
+import base64
+import email
+import pytest
+
+for module in ("googleapiclient", "google_auth_oauthlib"):
+    pytest.importorskip(module)
+
+from utils.gmail_drafts import list_drafts, upsert_drafts
+
+class FakeRequest:
+    def __init__(self, service, method, kwargs):
+        self.service, self.method, self.kwargs = service, method, kwargs
+
+    def execute(self):
+        return self.service.handle(self.method, self.kwargs)
+
+class FakeBatch:
+    def __init__(self, service, callback):
+        self.service, self.callback, self.requests = service, callback, []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.service.batches.append(len(self.requests))
+        for request_id, request in self.requests:
+            try:
+                self.callback(request_id, request.execute(), None)
+            except KeyError as e:
+                self.callback(request_id, None, e)
+
+class FakeGmail:
+    """Cliente local con la forma de service.users().drafts()/messages() y los lotes HTTP de googleapiclient."""
+    def __init__(self, existing=()):
+        self.store = {}      # id de borrador -> {'subject', 'to'}
+        self.calls = []
+        self.batches = []
+        for subject, to in existing:
+            self.store[f"d{len(self.store) + 1}"] = {'subject': subject, 'to': to}
+
+    def users(self):
+        return self
+
+    def drafts(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+    def list(self, **kwargs):
+        return FakeRequest(self, "list", kwargs)
+
+    def get(self, **kwargs):
+        return FakeRequest(self, "get", kwargs)
+
+    def create(self, **kwargs):
+        return FakeRequest(self, "create", kwargs)
+
+    def update(self, **kwargs):
+        return FakeRequest(self, "update", kwargs)
+
+    def handle(self, method, kwargs):
+        self.calls.append((method, kwargs.get('fields')))
+        if method == "list":
+            ids = list(self.store)[:kwargs['maxResults']]
+            return {'drafts': [{'id': d, 'message': {'id': f"m-{d}"}} for d in ids]}
+        if method == "get":
+            draft = self.store[kwargs['id'][2:]]
+            return {'payload': {'headers': [{'name': 'Subject', 'value': draft['subject']},
+                                            {'name': 'To', 'value': draft['to']}]}}
+        message = email.message_from_bytes(base64.urlsafe_b64decode(kwargs['body']['message']['raw']))
+        if method == "update":
+            draft_id = kwargs['id']
+            self.store[draft_id]   # KeyError (error del lote) si el borrador no existe
+        else:
+            draft_id = f"d{len(self.store) + 1}"
+        self.store[draft_id] = {'subject': message['Subject'], 'to': message['To']}
+        return {'id': draft_id, 'message': {'id': f"m-{draft_id}"}}
+
+@pytest.fixture
+def service():
+    return FakeGmail([("Factura enero", "Empresa@Example.com"), ("Alta SS", "coop@example.com")])
+
+def test_list_drafts_uses_one_batch_of_partial_responses(service):
+    listing = list_drafts(limit=10, service=service)
+    assert [(d['id'], d['subject'], d['to']) for d in listing] == [
+        ("d1", "Factura enero", "Empresa@Example.com"), ("d2", "Alta SS", "coop@example.com")]
+    assert service.batches == [2]
+    assert all(fields for _, fields in service.calls)
+
+def test_upsert_updates_matching_drafts_and_creates_the_rest(service):
+    results = upsert_drafts([
+        {'subject': "Factura enero", 'recipient': "empresa@example.com", 'body': "nuevo texto"},
+        {'subject': "Factura febrero", 'recipient': "empresa@example.com", 'body': "texto"},
+    ], service=service)
+    assert results == [(True, "d1"), (True, "d3")]
+    assert len(service.store) == 3
+    # Una petición de listado, un lote de cabeceras y un lote de escrituras
+    assert service.batches == [2, 2]
+    assert [method for method, _ in service.calls].count("list") == 1
+
+def test_upsert_reports_failed_drafts(service):
+    results = upsert_drafts([
+        {'subject': "Borrado", 'recipient': "x@example.com", 'body': "texto", 'draft_id': "d9"},
+        {'subject': "Nuevo", 'recipient': "x@example.com", 'body': "texto"},
+    ], service=service)
+    assert results[0][0] is False
+    assert results[1] == (True, "d3")
@@ -0,0 +1,65 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("PIL")
+
+from ia_processor.utils.image_preprocessing import (
+    MAX_LONG_SIDE, MIN_LONG_SIDE, MIN_SKEW_ANGLE, crop_to_text, deskew, estimate_skew, normalize_resolution)
+
+def blank(height, width):
+    return np.full((height, width), 255, dtype=np.uint8)
+
+def text_block(height=800, width=1000):
+    """Página en blanco con tres 'líneas de texto' negras."""
+    gray = blank(height, width)
+    for top in (300, 360, 420):
+        cv2.rectangle(gray, (250, top), (750, top + 30), 0, -1)
+    return gray
+
+def rotated(gray, angle):
+    height, width = gray.shape
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(gray, matrix, (width, height), borderValue=255)
+
+@pytest.mark.parametrize("shape, source_dpi, expected_long_side", [
+    ((3000, 4000), None, MAX_LONG_SIDE),     # Foto del móvil: se reduce
+    ((400, 500), None, MIN_LONG_SIDE),       # Captura pequeña: se amplía
+    ((3000, 2000), 72, MAX_LONG_SIDE),       # 72 DPI declarados: x4 limitado al máximo
+    ((1200, 1000), 600, MIN_LONG_SIDE),      # 600 DPI: /2 limitado al mínimo
+    ((1600, 1200), 200, 2000),               # 200 DPI -> 300 DPI dentro del rango
+])
+def test_normalize_resolution_keeps_long_side_in_range(shape, source_dpi, expected_long_side):
+    result = normalize_resolution(blank(*shape), source_dpi)
+    assert abs(max(result.shape) - expected_long_side) <= 1
+
+def test_normalize_resolution_leaves_working_size_untouched():
+    gray = blank(1500, 1200)
+    assert normalize_resolution(gray) is gray
+    assert normalize_resolution(gray, source_dpi=300) is gray
+
+def test_deskew_levels_rotated_text():
+    gray = text_block()
+    assert abs(estimate_skew(gray)) < MIN_SKEW_ANGLE
+    assert deskew(gray) is gray
+
+    tilted = rotated(gray, 5)
+    assert abs(abs(estimate_skew(tilted)) - 5) < 1
+    assert abs(estimate_skew(deskew(tilted))) < 1
+
+    # Inclinaciones fuera de rango se consideran detecciones erróneas
+    very_tilted = rotated(gray, 30)
+    assert deskew(very_tilted) is very_tilted
+    assert estimate_skew(blank(100, 100)) == 0.0
+
+def test_crop_to_text_keeps_all_ink_with_margin():
+    gray = text_block()
+    cropped = crop_to_text(gray, margin=20)
+    assert cropped.shape[0] < gray.shape[0] and cropped.shape[1] < gray.shape[1]
+    assert (cropped == 0).sum() == (gray == 0).sum()
+    # Tinta de y=300..450 y x=250..750, más la dilatación (<= 12 px) y el margen
+    assert 150 + 2 * 20 <= cropped.shape[0] <= 151 + 2 * (20 + 3)
+    assert 500 + 2 * 20 <= cropped.shape[1] <= 501 + 2 * (20 + 13)
+
+    empty = blank(200, 200)
+    assert crop_to_text(empty).shape == empty.shape
@@ -0,0 +1,77 @@
+import imaplib
+import pytest
+from utils.imap_pool import ImapConnectionPool
+
+class FakeImap:
+    """Sustituto local de una sesión IMAP4 autenticada."""
+    def __init__(self):
+        self.commands = []
+        self.alive = True
+        self.untagged_responses = {'EXISTS': [b'3']}
+
+    def _check(self):
+        if not self.alive:
+            raise imaplib.IMAP4.abort("socket error: EOF")
+
+    def select(self, mailbox='INBOX', readonly=False):
+        self._check()
+        self.commands.append(('SELECT', mailbox))
+        return 'OK', [b'3']
+
+    def search(self, charset, criteria):
+        self._check()
+        self.commands.append(('SEARCH', criteria))
+        return 'OK', [b'1 2 3']
+
+    def noop(self):
+        self._check()
+        self.commands.append(('NOOP',))
+        return 'OK', [b'']
+
+    def logout(self):
+        self.commands.append(('LOGOUT',))
+        return 'BYE', []
+
+@pytest.fixture
+def sessions():
+    return []
+
+@pytest.fixture
+def pool(sessions):
+    def factory():
+        session = FakeImap()
+        sessions.append(session)
+        return session
+    return ImapConnectionPool(factory, max_size=2, noop_interval=0)
+
+def test_reuses_session_and_avoids_redundant_select(pool, sessions):
+    for _ in range(3):
+        with pool.connection() as mail:
+            assert mail.select("inbox")[0] == 'OK'
+            mail.search(None, "ALL")
+    assert len(sessions) == 1
+    assert pool.metrics['handshakes'] == 1
+    assert pool.metrics['handshakes_avoided'] == 2
+    assert pool.metrics['selects'] == 1
+    assert pool.metrics['selects_avoided'] == 2
+    assert sessions[0].commands.count(('SELECT', 'inbox')) == 1
+
+def test_reconnects_when_noop_fails(pool, sessions):
+    with pool.connection() as mail:
+        mail.select("inbox")
+    sessions[0].alive = False
+    with pool.connection() as mail:
+        assert mail.select("inbox")[0] == 'OK'
+    assert len(sessions) == 2
+    assert pool.metrics['reconnects'] == 1
+
+def test_run_retries_once_on_dropped_connection(pool, sessions):
+    calls = []
+    def flaky(mail):
+        calls.append(mail)
+        if len(calls) == 1:
+            raise imaplib.IMAP4.abort("connection reset")
+        return mail.search(None, "ALL")
+    assert pool.run(flaky) == ('OK', [b'1 2 3'])
+    assert len(calls) == 2
+    assert ('LOGOUT',) in sessions[0].commands
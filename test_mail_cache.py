@@ -0,0 +1,119 @@
+import re
+import pytest
+
+for module in ("googleapiclient", "google_auth_oauthlib"):
+    pytest.importorskip(module)
+
+from utils.mail_cache import MailCache
+
+class FakeImap:
+    """Buzón IMAP local con UIDVALIDITY, UIDNEXT y MODSEQ por mensaje (CONDSTORE)."""
+    def __init__(self, condstore=True):
+        self.capabilities = ('IMAP4REV1', 'CONDSTORE') if condstore else ('IMAP4REV1',)
+        self.uidvalidity = 1
+        self.uidnext = 1
+        self.modseq = 1
+        self.messages = {}   # uid -> {'subject', 'flags', 'modseq'}
+        self.commands = []
+
+    # --- Cambios en el servidor ---
+    def deliver(self, subject, flags=""):
+        self.modseq += 1
+        self.messages[self.uidnext] = {"subject": subject, "flags": flags, "modseq": self.modseq}
+        self.uidnext += 1
+
+    def set_flags(self, uid, flags):
+        self.modseq += 1
+        self.messages[uid].update(flags=flags, modseq=self.modseq)
+
+    def expunge(self, uid):
+        self.modseq += 1
+        del self.messages[uid]
+
+    # --- Comandos IMAP ---
+    def status(self, mailbox, items):
+        self.commands.append(('STATUS', mailbox))
+        line = f"{mailbox} (MESSAGES {len(self.messages)} UIDNEXT {self.uidnext} UIDVALIDITY {self.uidvalidity}"
+        if 'HIGHESTMODSEQ' in items:
+            line += f" HIGHESTMODSEQ {self.modseq}"
+        return 'OK', [line.encode() + b")"]
+
+    def select(self, mailbox):
+        self.commands.append(('SELECT', mailbox))
+        return 'OK', [str(len(self.messages)).encode()]
+
+    def uid(self, command, *args):
+        self.commands.append(('UID', command) + args)
+        uids = sorted(self.messages)
+        if command == 'SEARCH':
+            criteria = args[1]
+            if criteria != 'ALL':
+                first = int(re.match(r'UID (\d+):\*', criteria).group(1))
+                # Como un servidor real, "n:*" incluye siempre el último mensaje
+                uids = [uid for uid in uids if uid >= first] or uids[-1:]
+            return 'OK', [" ".join(map(str, uids)).encode()]
+        if command == 'FETCH' and len(args) == 3:
+            since = int(re.search(r'CHANGEDSINCE (\d+)', args[2]).group(1))
+            return 'OK', [f"{i} (UID {uid} FLAGS ({self.messages[uid]['flags']}))".encode()
+                          for i, uid in enumerate(uids, 1) if self.messages[uid]['modseq'] > since]
+        first, _, last = args[0].partition(':')
+        wanted = [uid for uid in uids if int(first) <= uid <= int(last or first)]
+        return 'OK', [(f"{uid} (UID {uid} FLAGS ({self.messages[uid]['flags']}) BODY[HEADER.FIELDS (FROM SUBJECT DATE)] {{0}}".encode(),
+                       f"From: a@b.es\r\nSubject: {self.messages[uid]['subject']}\r\n\r\n".encode())
+                      for uid in wanted]
+
+@pytest.fixture
+def cache(tmp_path):
+    return MailCache(str(tmp_path / "mail_cache.sqlite"))
+
+@pytest.fixture
+def server():
+    server = FakeImap()
+    for subject in ("uno", "dos", "tres"):
+        server.deliver(subject)
+    return server
+
+def subjects(cache):
+    return [h["subject"] for h in cache.list_headers("INBOX", limit=10)]
+
+def test_initial_sync_then_only_new_uids(cache, server):
+    assert cache.sync(server, "INBOX") == 3
+    assert subjects(cache) == ["tres", "dos", "uno"]
+
+    server.commands.clear()
+    assert cache.sync(server, "INBOX") == 0
+    assert server.commands == [('STATUS', 'INBOX')]   # Sin cambios: ni SELECT ni FETCH
+
+    server.deliver("cuatro")
+    assert cache.sync(server, "INBOX") == 1
+    assert ('UID', 'SEARCH', None, 'UID 4:*') in server.commands
+    assert subjects(cache) == ["cuatro", "tres", "dos", "uno"]
+
+def test_uidvalidity_change_drops_mailbox(cache, server):
+    cache.sync(server, "INBOX")
+    cache.put_body("INBOX", 1, b"cuerpo")
+    server.uidvalidity = 2
+    server.messages = {}
+    server.uidnext = 1
+    server.deliver("nuevo")
+    assert cache.sync(server, "INBOX") == 1
+    assert subjects(cache) == ["nuevo"]
+    assert cache.get_state("INBOX")["uidvalidity"] == 2
+    assert cache.get_body("INBOX", 1) is None
+
+def test_changedsince_merges_flag_updates(cache, server):
+    cache.sync(server, "INBOX")
+    server.set_flags(2, "\\Seen")
+    assert cache.sync(server, "INBOX") == 0
+    assert ('UID', 'FETCH', '1:*', '(UID FLAGS)', '(CHANGEDSINCE 4)') in server.commands
+    flags = {h["uid"]: h["flags"] for h in cache.list_headers("INBOX", limit=10)}
+    assert flags == {1: "", 2: "\\Seen", 3: ""}
+
+def test_expunged_messages_are_pruned(cache, server):
+    cache.sync(server, "INBOX")
+    server.expunge(2)
+    server.deliver("cuatro")
+    assert cache.sync(server, "INBOX") == 1
+    assert ('UID', 'SEARCH', None, 'ALL') in server.commands
+    assert subjects(cache) == ["cuatro", "tres", "uno"]
+    assert cache.get_state("INBOX")["messages"] == 3
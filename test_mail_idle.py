@@ -0,0 +1,62 @@
+import socket
+import time
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from utils.mail_idle import IdleSession
+
+class FakeMail:
+    """Sesión con la misma API pública que imaplib (sock, file, send, readline) sobre un socketpair."""
+    def __init__(self, sock):
+        self.sock = sock
+        self.file = sock.makefile('rb')
+
+    def send(self, data):
+        self.sock.sendall(data)
+
+    def readline(self):
+        return self.file.readline()
+
+@pytest.fixture
+def pair():
+    client, server = socket.socketpair()
+    yield FakeMail(client), server
+    client.close()
+    server.close()
+
+def test_exists_in_same_packet_as_continuation_is_seen(pair):
+    mail, server = pair
+    # "+ idling" y "* 5 EXISTS" llegan juntos: el segundo queda en el buffer de mail.file
+    server.sendall(b"+ idling\r\n* 5 EXISTS\r\n")
+    idle = IdleSession(mail)
+    idle.start()
+    assert server.recv(100) == idle.tag + b" IDLE\r\n"
+
+    started = time.monotonic()
+    assert idle.wait_line(5) == b"* 5 EXISTS\r\n"
+    assert time.monotonic() - started < 1
+    assert idle.wait_line(0.05) is None
+
+def test_done_returns_untagged_lines_until_tagged_reply(pair):
+    mail, server = pair
+    server.sendall(b"+ idling\r\n")
+    idle = IdleSession(mail)
+    idle.start()
+    server.recv(100)
+    server.sendall(b"* 6 EXISTS\r\n" + idle.tag + b" OK IDLE terminated\r\n")
+    assert idle.done() == [b"* 6 EXISTS\r\n"]
+    assert server.recv(100) == b"DONE\r\n"
+    # El socket vuelve a ser bloqueante para imaplib
+    assert mail.sock.gettimeout() is None
+
+def test_tags_are_unique_and_rejection_raises(pair):
+    mail, server = pair
+    server.sendall(b"+ idling\r\n")
+    first = IdleSession(mail)
+    first.start()
+    server.sendall(b"BAD no IDLE\r\n")
+    second = IdleSession(mail)
+    with pytest.raises(RuntimeError):
+        second.start()
+    assert first.tag != second.tag
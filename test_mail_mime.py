@@ -0,0 +1,54 @@
+import base64
+import re
+from utils.mail_mime import fetch_structure, text_part, attachments, open_message, download_attachment
+
+PDF_BYTES = bytes(range(256)) * 40
+PDF_ENCODED = base64.encodebytes(PDF_BYTES)
+
+BODYSTRUCTURE = (
+    b'1 (UID 7 BODYSTRUCTURE ((("TEXT" "PLAIN" ("CHARSET" "UTF-8") NIL NIL "QUOTED-PRINTABLE" 24 1 NIL NIL NIL)'
+    b'("TEXT" "HTML" ("CHARSET" "UTF-8") NIL NIL "7BIT" 40 1 NIL NIL NIL) "ALTERNATIVE" ("BOUNDARY" "b1") NIL NIL)'
+    b'("APPLICATION" "PDF" ("NAME" "factura.pdf") NIL NIL "BASE64" ' + str(len(PDF_ENCODED)).encode() +
+    b' NIL ("ATTACHMENT" ("FILENAME" {11}'
+)
+
+class FakeImap:
+    """Sesión IMAP local que responde a UID FETCH de BODYSTRUCTURE y BODY.PEEK[parte]<offset.tamaño>."""
+    def __init__(self):
+        self.queries = []
+        self.sections = {"1.1": b"Hola, factura adjunta =C3=A1", "2": PDF_ENCODED}
+
+    def select(self, mailbox, readonly=False):
+        return "OK", [b"1"]
+
+    def uid(self, command, uid, query):
+        self.queries.append(query)
+        if query == "(BODYSTRUCTURE)":
+            return "OK", [(BODYSTRUCTURE, b"factura.pdf"), b')) NIL) "MIXED" ("BOUNDARY" "b0") NIL NIL))']
+        section, offset, size = re.match(r'\(BODY\.PEEK\[([\d.]+)\](?:<(\d+)\.(\d+)>)?\)', query).groups()
+        content = self.sections[section]
+        if offset is not None:
+            content = content[int(offset):int(offset) + int(size)]
+        return "OK", [(f"1 (UID {uid} BODY[{section}] {{{len(content)}}}".encode(), content), b")"]
+
+def test_structure_and_text_without_downloading_attachment():
+    mail = FakeImap()
+    text, files = open_message(mail, "inbox", 7)
+    assert text == "Hola, factura adjunta á"
+    assert [f["filename"] for f in files] == ["factura.pdf"]
+    assert files[0]["part"] == "2"
+    assert not any("BODY.PEEK[2]" in query for query in mail.queries)
+
+    parts = fetch_structure(mail, 7)
+    assert [p["part"] for p in parts] == ["1.1", "1.2", "2"]
+    assert text_part(parts)["type"] == "text/plain"
+    assert attachments(parts)[0]["encoding"] == "base64"
+
+def test_download_attachment_in_chunks(tmp_path):
+    mail = FakeImap()
+    part = attachments(fetch_structure(mail, 7))[0]
+    path = download_attachment(mail, "inbox", 7, part, dest_dir=str(tmp_path), chunk_size=1000)
+    with open(path, "rb") as f:
+        assert f.read() == PDF_BYTES
+    partial_fetches = [query for query in mail.queries if "BODY.PEEK[2]<" in query]
+    assert len(partial_fetches) == len(PDF_ENCODED) // 1000 + 1
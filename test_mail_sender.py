@@ -0,0 +1,155 @@
+import email
+import smtplib
+import socketserver
+import threading
+import pytest
+from utils.mail_sender import OutboundMailQueue, SendBatch, STATUS_SENT, STATUS_FAILED, STATUS_RETRYING, _is_transient
+
+class FakeSmtpHandler(socketserver.StreamRequestHandler):
+    """Servidor SMTP local mínimo: acepta EHLO/MAIL/RCPT/DATA/NOOP/QUIT y guarda los mensajes."""
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        server.sessions += 1
+        self.reply("220 fake ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250 fake")
+            elif command.startswith("MAIL"):
+                self.reply("250 OK")
+            elif command.startswith("RCPT"):
+                self.reply("550 No such user" if "NOBODY" in command else "250 OK")
+            elif command == "DATA":
+                if server.fail_data:
+                    server.fail_data -= 1
+                    self.reply("451 Try again later")
+                    continue
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if data == b".\r\n":
+                        break
+                    lines.append(data[1:] if data.startswith(b"..") else data)
+                server.messages.append(b"".join(lines))
+                self.reply("250 Queued")
+            elif command in ("NOOP", "RSET"):
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Not implemented")
+
+@pytest.fixture
+def smtp_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), FakeSmtpHandler)
+    server.daemon_threads = True
+    server.sessions = 0
+    server.messages = []
+    server.fail_data = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def make_queue(smtp_server, statuses):
+    host, port = smtp_server.server_address
+    return OutboundMailQueue(
+        lambda: smtplib.SMTP(host, port, timeout=5), "yo@example.com",
+        on_status=lambda msg_id, status, detail: statuses.append((msg_id, status)),
+        backoff=0.01
+    )
+
+def test_reuses_session_and_streams_attachments(smtp_server, tmp_path):
+    attachment = tmp_path / "factura_señal.pdf"
+    payload = bytes(range(256)) * 1000
+    attachment.write_bytes(payload)
+    statuses = []
+    outbound = make_queue(smtp_server, statuses)
+    ids = [outbound.submit(f"Asunto {i}", "cliente@example.com", ".línea con punto\nfin", [str(attachment)])
+           for i in range(3)]
+    outbound.join()
+    outbound.stop()
+
+    assert smtp_server.sessions == 1
+    assert outbound.metrics['sessions_opened'] == 1
+    assert [msg_id for msg_id, status in statuses if status == STATUS_SENT] == ids
+    message = email.message_from_bytes(smtp_server.messages[0])
+    text, pdf = [part for part in message.walk() if not part.is_multipart()]
+    assert text.get_payload(decode=True).decode("utf-8") == ".línea con punto\nfin"
+    assert pdf.get_filename() == "factura_señal.pdf"
+    assert pdf.get_payload(decode=True) == payload
+
+def test_retries_transient_errors_and_fails_permanent_ones(smtp_server):
+    smtp_server.fail_data = 1
+    statuses = []
+    outbound = make_queue(smtp_server, statuses)
+    ok_id = outbound.submit("Reintento", "cliente@example.com", "hola")
+    bad_id = outbound.submit("Rechazado", "nobody@example.com", "hola")
+    outbound.join()
+    outbound.stop()
+
+    assert (ok_id, STATUS_RETRYING) in statuses
+    assert statuses[-1] == (bad_id, STATUS_FAILED)
+    assert [status for msg_id, status in statuses if msg_id == bad_id].count(STATUS_RETRYING) == 0
+    assert len(smtp_server.messages) == 1
+
+def test_local_errors_are_not_retried():
+    assert _is_transient(ConnectionResetError())
+    assert _is_transient(TimeoutError())
+    assert _is_transient(smtplib.SMTPServerDisconnected())
+    # Un adjunto borrado o sin permisos no se arregla reintentando
+    assert not _is_transient(FileNotFoundError(2, "No such file", "factura.pdf"))
+    assert not _is_transient(PermissionError(13, "Permission denied", "factura.pdf"))
+
+def test_stop_without_worker_does_not_block_next_one(smtp_server):
+    statuses = []
+    outbound = make_queue(smtp_server, statuses)
+    outbound.stop()
+    outbound.stop()
+    msg_id = outbound.submit("Tras stop", "cliente@example.com", "hola")
+    outbound.join()
+    outbound.stop()
+    assert (msg_id, STATUS_SENT) in statuses
+
+def test_per_message_callback_replaces_queue_callback(smtp_server):
+    statuses, own = [], []
+    outbound = make_queue(smtp_server, statuses)
+    shared_id = outbound.submit("Formulario", "cliente@example.com", "hola")
+    own_id = outbound.submit("Tanda", "cliente@example.com", "hola",
+                             on_status=lambda msg_id, status, detail: own.append((msg_id, status)))
+    outbound.join()
+    outbound.stop()
+
+    assert {msg_id for msg_id, _ in statuses} == {shared_id}
+    assert {msg_id for msg_id, _ in own} == {own_id}
+    assert own[-1] == (own_id, STATUS_SENT)
+
+def test_send_batch_reports_once_when_all_finish(smtp_server):
+    statuses, done = [], []
+    outbound = make_queue(smtp_server, statuses)
+    batch = SendBatch(lambda sent, failed: done.append((sent, failed)))
+    for i in range(3):
+        batch.submit(outbound, f"Factura {i}", "cliente@example.com", "hola")
+    batch.submit(outbound, "Rechazada", "nobody@example.com", "hola")
+    batch.close()
+    outbound.join()
+    outbound.stop()
+
+    assert statuses == []
+    assert len(done) == 1
+    sent, failed = done[0]
+    assert sent == 3
+    assert [subject for subject, _ in failed] == ["Rechazada"]
+
+def test_empty_send_batch_reports_on_close():
+    done = []
+    SendBatch(lambda sent, failed: done.append((sent, failed))).close()
+    assert done == [(0, [])]
@@ -0,0 +1,55 @@
+import pytest
+
+pytest.importorskip("spacy")
+pytest.importorskip("transformers")
+
+from ia_processor.models import BaseModel
+
+class CountingModel(BaseModel):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def _predict_batch(self, texts, batch_size):
+        self.batches.append(list(texts))
+        return [[{"text": text[:7], "label": "TIPO_DOCUMENTO", "start": 0, "end": 7}] for text in texts]
+
+    def get_info(self):
+        return {"name": "counting", "type": "test"}
+
+def test_predict_batch_deduplicates_and_memoizes_by_text():
+    model = CountingModel()
+    first = model.predict_batch(["FACTURA: 1", "FACTURA: 2", "FACTURA: 1"])
+    assert model.batches == [["FACTURA: 1", "FACTURA: 2"]]
+    assert first[0] == first[2]
+
+    first[0][0]["label"] = "MODIFICADO"
+    assert model.predict("FACTURA: 1")[0]["label"] == "TIPO_DOCUMENTO"
+    assert model.predict_batch(["FACTURA: 2", "FACTURA: 3"])[1][0]["text"] == "FACTURA"
+    assert model.batches[1:] == [["FACTURA: 3"]]
+
+def test_predict_batch_larger_than_cache(monkeypatch):
+    from ia_processor.models import base_model
+
+    monkeypatch.setattr(base_model, "PREDICTION_CACHE_SIZE", 2)
+    model = CountingModel()
+    model.predict_batch(["FACTURA: 0", "FACTURA: 1"])
+    # Aciertos más textos nuevos por encima del límite, y un lote mayor que la caché
+    texts = ["FACTURA: 0", "FACTURA: 1", "FACTURA: 2", "FACTURA: 3", "FACTURA: 0"]
+    assert len(model.predict_batch(texts)) == len(texts)
+    assert model.batches[-1] == ["FACTURA: 2", "FACTURA: 3"]
+    assert len(model._prediction_cache) == 2
+    assert len(model.predict_batch([f"ALBARAN: {i}" for i in range(5)])) == 5
+
+def test_threads_are_set_once_per_process(monkeypatch, capsys):
+    from ia_processor.models import transformers_ner
+
+    calls = []
+    monkeypatch.setattr(transformers_ner.torch, "set_num_threads", calls.append)
+    monkeypatch.setattr(transformers_ner, "_num_threads", None)
+    transformers_ner.set_num_threads(None)
+    transformers_ner.set_num_threads(4)
+    transformers_ner.set_num_threads(4)
+    transformers_ner.set_num_threads(2)
+    assert calls == [4]
+    assert "[WARNING]" in capsys.readouterr().out
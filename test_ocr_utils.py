@@ -0,0 +1,63 @@
+import pytest
+
+pytest.importorskip("pytesseract")
+pytest.importorskip("PIL")
+
+from ia_processor.utils import ocr_utils
+from ia_processor.utils.extraction_cache import ExtractionCache
+
+class FakeBackend:
+    """Backend de PDF en memoria: solo devuelve palabras si se pide la disposición."""
+    name = "fake"
+
+    def __init__(self):
+        self.calls = []
+
+    def page(self, index, layout):
+        text = f"FACTURA: 18245{index}" if index == 0 else f"Página {index}"
+        words = [[10.0, 20.0, 60.0, 30.0, word] for word in text.split()] if layout else []
+        return {"text": text, "width": 595.0, "height": 842.0, "words": words, "backend": self.name}
+
+    def extract_pages(self, pdf_path, layout=False):
+        self.calls.append(("extract_pages", layout))
+        return [self.page(index, layout) for index in range(3)]
+
+    def iter_pages(self, pdf_path, order=None):
+        self.calls.append(("iter_pages", False))
+        for index in (order(3) if order else range(3)):
+            yield index, self.page(index, layout=False)
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    fake = FakeBackend()
+    monkeypatch.setattr(ocr_utils, "get_pdf_backend", lambda name=None: fake)
+    cache = ExtractionCache(tmp_path / "cache.sqlite")
+    monkeypatch.setattr(ocr_utils, "get_extraction_cache", lambda: cache)
+    return fake
+
+def test_cached_document_keeps_word_layout(backend, tmp_path):
+    pdf = tmp_path / "factura.pdf"
+    pdf.write_bytes(b"%PDF-1.4 factura 182450")
+
+    # Una lectura completa sin disposición (extract_text_until) no sirve para extract_document
+    text = ocr_utils.extract_text_until(str(pdf), lambda text: False)
+    assert backend.calls == [("iter_pages", False)]
+
+    document = ocr_utils.extract_document(str(pdf))
+    assert document["text"] == text
+    assert document["pages"][0]["words"][1][4] == "182450"
+    assert backend.calls[-1] == ("extract_pages", True)
+
+    # Desde la caché: las mismas palabras, sin volver a abrir el PDF
+    calls = len(backend.calls)
+    assert ocr_utils.extract_document(str(pdf))["pages"] == document["pages"]
+    assert ocr_utils.extract_first_pages(str(pdf)) == "FACTURA: 182450\n"
+    assert len(backend.calls) == calls
+
+def test_text_readers_reuse_layout_extraction(backend, tmp_path):
+    pdf = tmp_path / "factura.pdf"
+    pdf.write_bytes(b"%PDF-1.4 factura 182450")
+    document = ocr_utils.extract_document(str(pdf))
+
+    assert ocr_utils.extract_text_until(str(pdf), lambda text: False) == document["text"]
+    assert backend.calls == [("extract_pages", True)]
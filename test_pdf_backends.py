@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+
+import pytest
+
+from ia_processor.utils.pdf_backends import HybridBackend, PdfBackend, needs_layout_extraction
+
+class FakeBackend:
+    def __init__(self, name, texts):
+        self.name = name
+        self.texts = texts
+        self.requested = []
+        self.opened = 0
+
+    def extract_pages(self, pdf_path, layout=False, page_numbers=None):
+        indices = list(range(len(self.texts)) if page_numbers is None else page_numbers)
+        self.requested.append(indices)
+        return [{"text": self.texts[i], "width": 595.0, "height": 842.0, "words": [], "backend": self.name}
+                for i in indices]
+
+    def iter_pages(self, pdf_path, order=None):
+        for index in (order(len(self.texts)) if order else range(len(self.texts))):
+            yield index, self.extract_pages(pdf_path, page_numbers=[index])[0]
+
+    @contextmanager
+    def open_document(self, pdf_path):
+        self.opened += 1
+        yield lambda index, layout=False: self.extract_pages(pdf_path, page_numbers=[index])[0]
+
+def test_hybrid_only_sends_unreliable_pages_to_pdfplumber():
+    assert not needs_layout_extraction("FACTURA: 182454\nTOTAL: 2.116,66")
+    assert needs_layout_extraction("   ")
+    assert needs_layout_extraction("TOTAL: 2.116,66 ��")
+    assert needs_layout_extraction("columna " * 100)
+
+    backend = HybridBackend()
+    backend.fast = FakeBackend("pdfium", ["FACTURA: 182454", "Conceptos �", ""])
+    backend.accurate = FakeBackend("pdfplumber", ["-", "Conceptos €", ""])
+
+    pages = backend.extract_pages("factura.pdf")
+    assert backend.accurate.requested == [[1, 2]]
+    assert [page["text"] for page in pages] == ["FACTURA: 182454", "Conceptos €", ""]
+    assert [page["backend"] for page in pages] == ["pdfium", "pdfplumber", "pdfium"]
+
+def test_hybrid_iter_pages_opens_pdfplumber_once_per_document():
+    backend = HybridBackend()
+    backend.fast = FakeBackend("pdfium", ["", "FACTURA: 182454", "Conceptos �"])
+    backend.accurate = FakeBackend("pdfplumber", ["Cabecera", "-", "Conceptos €"])
+
+    pages = list(backend.iter_pages("factura.pdf", order=lambda n: reversed(range(n))))
+    assert [index for index, _ in pages] == [2, 1, 0]
+    assert [page["text"] for _, page in pages] == ["Conceptos €", "FACTURA: 182454", "Cabecera"]
+    assert backend.accurate.opened == 1
+    assert backend.accurate.requested == [[2], [0]]
+
+    backend.fast = FakeBackend("pdfium", ["FACTURA: 182454"])
+    backend.accurate.opened = 0
+    list(backend.iter_pages("factura.pdf"))
+    assert backend.accurate.opened == 0
+
+def test_pdf_backend_is_abstract():
+    with pytest.raises(TypeError):
+        PdfBackend()
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from ia_processor.config import TRAINING_DATA_FILE
+from ia_processor.generate_training_data import extract_entities_from_factura
+from ia_processor.utils.entity_extractor import extract_entities_from_text as extract_ia
+from utils.entity_extractor import extract_entities_from_text as extract_app
+
+FACTURA = ("FACTURA: 182454 Fecha: 31/12/2024\nCliente: Visualmax Producciones SL\n"
+           "CIF B86749371X\nTotal: 2.116,66 € info@freelance.es")
+FACTURA_SIN_DOS_PUNTOS = "FACTURA Nº 182454\nFecha 31/12/2024\nImporte Total 1.210,00 €"
+FACTURA_MIXTA = "Factura 2024-001 Fecha: 01/02/2025 Total 500,00"
+FACTURA_VARIAS = "FACTURA: A-17 Fecha: 02/03/2025\nSubtotal: 100,00\nTotal: 121,00 €\nadmin@empresa.es, pagos@empresa.es"
+LIQUIDACION = "Liquidación de enero 2025\nImporte Bruto: 1.200,00\nRetención IRPF: 180,00\nTotal Neto: 1.020,00"
+LIQUIDACION_VARIAS = "Liquidación de marzo 2025 (febrero 2025 regularizado)\nBruto 900,00\nNeto 800,00\nIRPF: 100,00"
+ALTA = "RESOLUCIÓN ALTA\nFecha real de alta: 05/06/2025\nBaja: 07/06/2025"
+ALTA_REPETIDA = "RESOLUCIÓN ALTA\nFecha real de alta: 05/06/2025\nFecha de efecto: 05/06/2025\nBaja: 07/06/2025"
+OTROS = "Ticket 123\n14/12/2024 03:21\nTotal: 20,30 €"
+
+# Salidas de las implementaciones anteriores (utils/entity_extractor.py,
+# ia_processor/utils/entity_extractor.py y generate_training_data.py del commit af49f7f)
+# sobre los mismos textos, congeladas aquí tal cual.
+APP_BASELINE = [
+    (FACTURA, "FACTURA", [(0, 7, "TIPO_DOCUMENTO"), (9, 15, "NUMERO_FACTURA"), (23, 33, "FECHA_EMISION"),
+                          (43, 68, "NOMBRE_CLIENTE"), (73, 83, "CIF_CLIENTE"), (91, 99, "IMPORTE_TOTAL")]),
+    (FACTURA_SIN_DOS_PUNTOS, "FACTURA", [(0, 7, "TIPO_DOCUMENTO"), (8, 9, "NUMERO_FACTURA"),
+                                         (24, 34, "FECHA_EMISION"), (49, 57, "IMPORTE_TOTAL")]),
+    (FACTURA_MIXTA, "FACTURA", [(8, 16, "NUMERO_FACTURA"), (24, 34, "FECHA_EMISION"), (41, 47, "IMPORTE_TOTAL")]),
+    (FACTURA_VARIAS, "FACTURA", [(0, 7, "TIPO_DOCUMENTO"), (9, 13, "NUMERO_FACTURA"), (21, 31, "FECHA_EMISION"),
+                                 (42, 48, "IMPORTE_TOTAL")]),
+    (LIQUIDACION, "LIQUIDACION", [(0, 11, "TIPO_DOCUMENTO"), (0, 25, "PERIODO_LIQUIDACION"), (41, 49, "IMPORTE_BRUTO"),
+                                  (85, 93, "IMPORTE_NETO"), (66, 72, "RETENCIONES")]),
+    (LIQUIDACION_VARIAS, "LIQUIDACION", [(0, 11, "TIPO_DOCUMENTO"), (0, 25, "PERIODO_LIQUIDACION"), (85, 91, "RETENCIONES")]),
+    (ALTA, "ALTA", [(11, 15, "TIPO_DOCUMENTO"), (36, 46, "FECHAS_DE_ALTA"), (53, 63, "FECHAS_DE_ALTA")]),
+    (OTROS, "OTROS", [(0, 6, "TIPO_DOCUMENTO"), (11, 21, "FECHA_TICKET"), (35, 40, "IMPORTE_TOTAL")]),
+]
+IA_BASELINE = [
+    (FACTURA, "FACTURA", [(9, 15, "NUMERO_FACTURA"), (23, 33, "FECHA_EMISION"), (91, 99, "IMPORTE_TOTAL"),
+                          (102, 119, "EMAIL")]),
+    (FACTURA_SIN_DOS_PUNTOS, "FACTURA", [(8, 9, "NUMERO_FACTURA"), (24, 34, "FECHA_EMISION"), (49, 57, "IMPORTE_TOTAL")]),
+    (FACTURA_MIXTA, "FACTURA", [(8, 12, "NUMERO_FACTURA"), (24, 34, "FECHA_EMISION"), (41, 47, "IMPORTE_TOTAL")]),
+    (FACTURA_VARIAS, "FACTURA", [(9, 13, "NUMERO_FACTURA"), (21, 31, "FECHA_EMISION"), (42, 48, "IMPORTE_TOTAL"),
+                                 (56, 62, "IMPORTE_TOTAL"), (65, 81, "EMAIL"), (83, 99, "EMAIL")]),
+    (LIQUIDACION, "LIQUIDACION", [(15, 25, "PERIODO_LIQUIDACION"), (41, 49, "IMPORTE_BRUTO"), (85, 93, "IMPORTE_NETO"),
+                                  (66, 72, "RETENCIONES")]),
+    (LIQUIDACION_VARIAS, "LIQUIDACION", [(15, 25, "PERIODO_LIQUIDACION"), (27, 39, "PERIODO_LIQUIDACION"),
+                                         (60, 66, "IMPORTE_BRUTO"), (72, 78, "IMPORTE_NETO"), (85, 91, "RETENCIONES")]),
+    (ALTA, "ALTA", []),
+    (OTROS, "OTROS", []),
+]
+TRAINING_BASELINE = [
+    (FACTURA, [[9, 15, "NUMERO_FACTURA"], [23, 33, "FECHA_EMISION"], [91, 99, "IMPORTE_TOTAL"], [102, 119, "EMAIL"]]),
+    (FACTURA_SIN_DOS_PUNTOS, []),
+    (FACTURA_MIXTA, [[24, 34, "FECHA_EMISION"]]),
+    (FACTURA_VARIAS, [[9, 13, "NUMERO_FACTURA"], [21, 31, "FECHA_EMISION"], [42, 48, "IMPORTE_TOTAL"],
+                      [65, 81, "EMAIL"], [83, 99, "EMAIL"]]),
+]
+
+
+def test_training_extractor_reproduces_existing_training_data():
+    # training_data.json se generó con la implementación anterior de generate_training_data
+    with open(TRAINING_DATA_FILE, encoding="utf-8") as f:
+        examples = json.load(f)
+    for example in examples:
+        assert extract_entities_from_factura(example["text"]) == example["entities"]
+
+
+@pytest.mark.parametrize("text, doc_type, expected", APP_BASELINE)
+def test_app_extractor_matches_previous_outputs(text, doc_type, expected):
+    assert extract_app(text, doc_type) == expected
+
+@pytest.mark.parametrize("text, doc_type, expected", IA_BASELINE)
+def test_ia_extractor_matches_previous_outputs(text, doc_type, expected):
+    assert extract_ia(text, doc_type) == expected
+
+@pytest.mark.parametrize("text, expected", TRAINING_BASELINE)
+def test_training_extractor_matches_previous_outputs(text, expected):
+    assert extract_entities_from_factura(text) == expected
+
+
+def test_repeated_values_get_their_own_offsets():
+    # Antes text.find devolvía dos veces la posición de la primera fecha
+    second = ALTA_REPETIDA.index("05/06/2025", ALTA_REPETIDA.index("05/06/2025") + 1)
+    assert extract_app(ALTA_REPETIDA, "ALTA") == [
+        (11, 15, "TIPO_DOCUMENTO"), (36, 46, "FECHAS_DE_ALTA"), (second, second + 10, "FECHAS_DE_ALTA"),
+        (81, 91, "FECHAS_DE_ALTA")]
@@ -0,0 +1,22 @@
+from ia_processor.utils.text_windows import token_windows, char_windows, merge_window_entities
+
+def test_windows_overlap_and_cover_the_whole_text():
+    assert token_windows(5, 8, 2) == [(0, 5)]
+    assert token_windows(20, 8, 2) == [(0, 8), (6, 14), (12, 20)]
+
+    text = "FACTURA 182454 VISUALMAX PRODUCCIONES MADRID"
+    offsets = [(0, 7), (8, 14), (15, 24), (25, 37), (38, 44)]
+    assert char_windows(offsets, 3, 1) == [(0, 24), (15, 44)]
+
+def test_entities_split_at_a_window_border_are_merged():
+    # VISUALMAX PRODUCCIONES cortada al final de la primera ventana y completa en la segunda
+    entities = [
+        {"text": "VISUALMAX", "label": "ORG", "start": 15, "end": 24, "score": 0.99},
+        {"text": "FACTURA", "label": "MISC", "start": 0, "end": 7, "score": 0.60},
+        {"text": "VISUALMAX PRODUCCIONES", "label": "ORG", "start": 15, "end": 37, "score": 0.91},
+        {"text": "MADRID", "label": "LOC", "start": 38, "end": 44, "score": 0.95},
+        {"text": "MADRID", "label": "LOC", "start": 38, "end": 44, "score": 0.97},
+    ]
+    merged = merge_window_entities(entities)
+    assert [(e["start"], e["end"], e["label"]) for e in merged] == [(0, 7, "MISC"), (15, 37, "ORG"), (38, 44, "LOC")]
+    assert merged[2]["score"] == 0.97
@@ -8,24 +8,21 @@ from PyQt6.QtCore import Qt
 from calendar_api_setting.calendar_api import get_events
 from utils.excel_utils import load_dataframe
 from utils.company_utils import get_company_data, normalize_company_name, get_coop_data
-from utils.common_functions import show_error_dialog
-from ia_processor.utils.ocr_utils import extract_text_from_file
+from utils.common_functions import show_error_dialog, show_info_dialog, confirm_action
+from utils.auto_text_utils import (
+    EMPRESA_TAREA_DEFAULT, MONTHS_ES, ALTA_SS, PEDIR_FACTURA, ENVIAR_FACTURA,
+    format_days_spanish, extract_amount_from_text, format_amount,
+    text_alta_ss, text_pedir_factura, text_enviar_factura,
+    load_month_sources, generate_month_texts
+)
+from ia_processor.utils.ocr_utils import extract_text_until
 from config import EXCEL_FILE_PATH, EMAIL_ADDRESS, TASK_OPTIONS
 from datetime import datetime
 
-# Mapeo inteligente: empresa → tarea típica
-EMPRESA_TAREA_DEFAULT = {
-    "IDOIPE": "Técnico de Video",
-    "TELEPIXEL S.L.U.": "Técnico de Video",
-    "VISUALMAX S.L.": "Técnico pantalla Led",
-    "CRAMBO ALQUILER S.L.": "Técnico pantalla Led",
-    "LAST LAP S.L.": "Técnico pantalla Led",
-    "DAIGON": "Técnico pantalla Led",
-    "KENZO STUDIO": "Técnico de Streaming",
-    "MADWORKS": "LedMapping",
-    "PEAK ENTERTAINMENT S.L.U.": "LedMapping",
-    
-}
+BULK_MONTH = "Generar mes (todas las empresas)"
+
+INVOICE_NUMBER_RE = re.compile(r'(?:Factura|Nº)[:\s]*([A-Z0-9\-\/]+)', re.IGNORECASE)
+INVOICE_TOTAL_RE = re.compile(r'(?:total)[^\w\n]*euros?[^\w\n]*([0-9.,]+)', re.IGNORECASE)
 
 class AutoTextWindow(QMainWindow):
     def __init__(self, parent=None):
@@ -36,7 +33,7 @@ class AutoTextWindow(QMainWindow):
         
         layout = QVBoxLayout()
         self.option_list = QListWidget()
-        self.option_list.addItems(["Dar alta S.S.", "Pedir Factura", "Enviar Factura"])
+        self.option_list.addItems([ALTA_SS, PEDIR_FACTURA, ENVIAR_FACTURA, BULK_MONTH])
         layout.addWidget(self.option_list)
         
         # Botón para adjuntar factura (solo para "Enviar Factura")
@@ -67,6 +64,8 @@ class AutoTextWindow(QMainWindow):
             self._generate_text_enviar_factura()
             # Mostrar botón de adjuntar factura
             self.btn_attach_invoice.setVisible(True)
+        elif option == BULK_MONTH:
+            self._generate_bulk_month()
     
     def _select_company_from_excel(self):
         """Selecciona una empresa desde Excel y devuelve (nombre, datos)."""
@@ -129,41 +128,7 @@ class AutoTextWindow(QMainWindow):
         Convierte una lista de días [1, 2, 3, 5, 7, 8, 9] en texto legible:
         "1 al 3, 5 y del 7 al 9 de enero"
         """
-        if not days_list:
-            return "[días]"
-
-        # Ordenar y eliminar duplicados
-        days = sorted(set(days_list))
-        ranges = []
-        start = days[0]
-        end = days[0]
-
-        for day in days[1:]:
-            if day == end + 1:
-                end = day
-            else:
-                if start == end:
-                    ranges.append(str(start))
-                else:
-                    ranges.append(f"{start} al {end}")
-                start = day
-                end = day
-
-        # Añadir último rango
-        if start == end:
-            ranges.append(str(start))
-        else:
-            ranges.append(f"{start} al {end}")
-
-        # Formatear según número de rangos
-        if len(ranges) == 1:
-            result = ranges[0]
-        elif len(ranges) == 2:
-            result = f"{ranges[0]} y {ranges[1]}"
-        else:
-            result = ", ".join(ranges[:-1]) + f" y {ranges[-1]}"
-
-        return f"{result} de {month_name.lower()}"
+        return format_days_spanish(days_list, month_name)
 
     def _format_bank_accounts(self, raw_text):
         """
@@ -190,10 +155,7 @@ class AutoTextWindow(QMainWindow):
         current_year = datetime.now().year
         # Añadir el año anterior a las opciones
         years = [str(y) for y in range(current_year - 1, current_year + 2)]  # Ej: 2024, 2025, 2026
-        months = [
-            "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
-            "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
-        ]
+        months = MONTHS_ES
 
         # Seleccionar mes
         month_name, ok = QInputDialog.getItem(
@@ -233,12 +195,7 @@ class AutoTextWindow(QMainWindow):
         dias = sorted([int(d.split('-')[2]) for d in target_dates])  # Solo el día del mes
         texto_fechas = self._format_days_spanish(dias, month_name)
 
-        subject = "Alta en S.S."
-        text = (
-            f"Hola buenos días\n\n"
-            f"Querría darme de alta para los días {texto_fechas}.\n\n"
-            f"Muchas gracias,\nUn saludo,\nJavier"
-        )
+        subject, text = text_alta_ss(texto_fechas)
         self._apply_text(subject, text)  
 
     def _generate_text_pedir_factura(self):
@@ -254,10 +211,7 @@ class AutoTextWindow(QMainWindow):
         current_year = datetime.now().year
         # Añadir el año anterior a las opciones
         years = [str(y) for y in range(current_year - 1, current_year + 2)]  # Ej: 2024, 2025, 2026
-        months = [
-            "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
-            "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
-        ]
+        months = MONTHS_ES
 
         month_name, ok = QInputDialog.getItem(self, "Mes", "Selecciona mes:", months, 0, False)
         if not ok:
@@ -276,10 +230,6 @@ class AutoTextWindow(QMainWindow):
         except:
             company_data = {}
 
-        nombre_empresa = empresa
-        cif = company_data.get('CIF', "[CIF]")
-        direccion = company_data.get('Direccion', "[Dirección]")
-
         # 4. Extraer importe total del calendario para ese mes/empresa
         events = get_events()
         total_importe = 0.0
@@ -295,24 +245,10 @@ class AutoTextWindow(QMainWindow):
                         importe = self._extract_amount_from_text(desc + " " + summary)
                         total_importe += importe
 
-        importe_str = f"{total_importe:.2f}" if total_importe > 0 else "[importe]"
-
-        # 5. Determinar tarea típica
-        from utils.company_utils import normalize_company_name
-        tarea = EMPRESA_TAREA_DEFAULT.get(normalize_company_name(empresa), "servicios")
-
-        subject = f"Pedir Factura {nombre_empresa} {month_name} {year}"
-        text = (
-            f"Hola buenos días\n\n"
-            f"Querría hacer una factura de {importe_str}€ + IVA,\n"
-            f"para el evento [nombre_evento] en [location], como {tarea},\n\n"
-            f"Por favor indiquen concepto de referencia en la factura [ref_cliente]\n\n"
-            f"Os dejo los datos del cliente:\n"
-            f"Nombre: {nombre_empresa}\n"
-            f"CIF: {cif}\n"
-            f"Dirección: {direccion}\n\n"
-            f"Muchas gracias\nUn saludo\nJavier"
-        )
+        importe_str = format_amount(total_importe)
+
+        # 5. Generar texto (la tarea típica se deduce de la empresa)
+        subject, text = text_pedir_factura(empresa, importe_str, company_data, month_name, year)
         self._apply_text(subject, text)
 
     def _generate_text_enviar_factura(self):
@@ -324,10 +260,7 @@ class AutoTextWindow(QMainWindow):
         current_year = datetime.now().year
         # Añadir el año anterior a las opciones
         years = [str(y) for y in range(current_year - 1, current_year + 2)]  # Ej: 2024, 2025, 2026
-        months = [
-            "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
-            "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
-        ]
+        months = MONTHS_ES
 
         month_name, ok = QInputDialog.getItem(self, "Mes", "Selecciona mes:", months, 0, False)
         if not ok:
@@ -352,7 +285,7 @@ class AutoTextWindow(QMainWindow):
                         importe = self._extract_amount_from_text(desc + " " + ev.get('summary', ''))
                         total_importe += importe
 
-        importe_str = f"{total_importe:.2f}" if total_importe > 0 else "[importe]"
+        importe_str = format_amount(total_importe)
 
         # 3. Seleccionar cooperativa y obtener datos
         try:
@@ -363,51 +296,101 @@ class AutoTextWindow(QMainWindow):
                 return
             coop_data = get_coop_data(coop_name, df_coop)
             email_coop = coop_data.get('Mails', '').strip()
-
-            # Métodos de pago
-            metodos_raw = coop_data.get('Metodo_de_pago', "[Métodos]")
-            if metodos_raw and metodos_raw != "[Métodos]":
-                metodos = f"Transferencia Bancaria:\n{metodos_raw}"
-            else:
-                metodos = "Transferencia Bancaria:\n[Métodos]"
-
-            # Cuentas bancarias (opcional)
-            cuentas_raw = coop_data.get('Cuenta_Bancaria', "").strip()
-            cuentas_section = ""
-            if cuentas_raw and cuentas_raw != "[Cuenta Bancaria]":
-                if ';' in cuentas_raw:
-                    cuentas_lista = [c.strip() for c in cuentas_raw.split(';')]
-                    cuentas = "\n".join(cuentas_lista)
-                else:
-                    cuentas = cuentas_raw
-                cuentas_section = f"Cuenta bancaria:\n{cuentas}\n\n"
-
         except Exception as e:
             show_error_dialog(self, "Error", f"Error al cargar datos de cooperativa: {e}")
             return
 
-        # 4. Tarea típica
-        tarea = EMPRESA_TAREA_DEFAULT.get(normalize_company_name(empresa), "servicios")
-
-        # 5. Generar texto y asunto
-        subject = f"Factura {empresa} {month_name} {year} [ref_cliente]"
-        text = (
-            f"Hola buenos días\n\n"
-            f"Os mando la factura {month_name} {year} con un importe total de {importe_str}€ + IVA,\n"
-            f"para el evento [nombre_evento] en [location], como {tarea}.\n\n"
-            f"Por favor indiquen concepto de referencia en la factura [ref_coop].\n\n"
-            f"{metodos}\n\n"
-            f"{cuentas_section}"
-            f"Muchas gracias\nUn saludo\nJavier"
-        )
+        # 4. Generar texto y asunto (métodos de pago y cuentas de la cooperativa)
+        subject, text = text_enviar_factura(empresa, importe_str, coop_data, month_name, year)
 
-        # 6. Aplicar texto y establecer destinatario
+        # 5. Aplicar texto y establecer destinatario
         self._apply_text(subject, text, email_coop)
         
         # Activar modo de validación de factura
         if hasattr(self.parent_window, 'sendfactura'):
             self.parent_window.sendfactura = True
         
+    def _generate_bulk_month(self):
+        """
+        Genera el texto elegido para todas las empresas con eventos en un mes y lo guarda
+        como borradores (un solo lote a la API de Gmail) o lo encola para enviarlo.
+        """
+        from utils.gmail_drafts import upsert_drafts
+        from utils.mail_utills import get_outbound_queue
+        from utils.mail_sender import SendBatch
+
+        # 1. Tipo de texto, mes y año
+        option, ok = QInputDialog.getItem(
+            self, "Generar mes", "Texto:", [ALTA_SS, PEDIR_FACTURA, ENVIAR_FACTURA], 0, False
+        )
+        if not ok:
+            return
+        current_year = datetime.now().year
+        years = [str(y) for y in range(current_year - 1, current_year + 2)]
+        month_name, ok = QInputDialog.getItem(self, "Mes", "Selecciona mes:", MONTHS_ES, 0, False)
+        if not ok:
+            return
+        year_str, ok = QInputDialog.getItem(self, "Año", "Selecciona año:", years, 1, False)
+        if not ok:
+            return
+        month, year = MONTHS_ES.index(month_name) + 1, int(year_str)
+
+        # 2. Eventos del mes y hojas de Excel (se cargan en paralelo) y cooperativa destinataria
+        try:
+            sources = load_month_sources(year, month)
+            coop_names = sources[2]['Nombre_Cooperativa'].tolist()
+        except Exception as e:
+            show_error_dialog(self, "Error", f"Error al cargar eventos o datos de Excel: {e}")
+            return
+        coop_name, ok = QInputDialog.getItem(self, "Cooperativa", "Selecciona:", coop_names, 0, False)
+        if not ok:
+            return
+
+        texts = generate_month_texts(option, year, month, coop_name, sources)
+        if not texts:
+            show_info_dialog(self, "Información", f"No hay eventos en {month_name} {year}.")
+            return
+
+        # 3. Destino: las facturas se guardan siempre como borrador (hay que adjuntar el PDF)
+        destinations = ["Guardar como borradores"]
+        if option != ENVIAR_FACTURA and texts[0]['recipient']:
+            destinations.append("Enviar ahora")
+        destination, ok = QInputDialog.getItem(
+            self, "Destino", f"{len(texts)} textos generados ({month_name} {year}):", destinations, 0, False
+        )
+        if not ok:
+            return
+
+        empresas = ", ".join(t['empresa'] for t in texts)
+        if destination == "Enviar ahora":
+            if not confirm_action(self, "Confirmar envío", f"Se enviarán {len(texts)} correos a {texts[0]['recipient']}:\n{empresas}"):
+                return
+            # Un solo aviso al final de la tanda (mail_batch_done), no uno por correo
+            batch_done = getattr(self.parent_window, 'mail_batch_done', None)
+            progress = getattr(self.parent_window, 'mail_status', None)
+            batch = SendBatch(
+                batch_done.emit if batch_done is not None else
+                lambda sent, failed: print(f"[INFO] Tanda de envío: {sent} enviados, {len(failed)} fallidos"),
+                progress.emit if progress is not None else None
+            )
+            outbound = get_outbound_queue()
+            for t in texts:
+                batch.submit(outbound, t['subject'], t['recipient'], t['body'])
+            batch.close()
+            show_info_dialog(self, "Envío en curso", f"{len(texts)} correos en cola de envío.")
+            return
+
+        try:
+            results = upsert_drafts(texts)
+        except Exception as e:
+            show_error_dialog(self, "Error", f"Error al guardar los borradores: {e}")
+            return
+        failed = [t['empresa'] for t, (ok, _) in zip(texts, results) if not ok]
+        if failed:
+            show_error_dialog(self, "Error", f"No se pudieron guardar los borradores de: {', '.join(failed)}")
+        else:
+            show_info_dialog(self, "Éxito", f"{len(texts)} borradores guardados:\n{empresas}")
+
     # Extract
     def _extract_amount_from_invoice_text(self, invoice_text):
         """
@@ -443,26 +426,7 @@ class AutoTextWindow(QMainWindow):
         - Números seguidos de '€'
         - Números entre paréntesis al final: (Total: XXX€)
         """
-        amounts = []
-
-        # Buscar todos los importes con €
-        for match in re.finditer(r'(\d+(?:[.,]\d+)?)\s*€', text):
-            try:
-                amount = float(match.group(1).replace(',', '.'))
-                amounts.append(amount)
-            except ValueError:
-                continue
-
-        # Buscar total entre paréntesis
-        total_match = re.search(r'\(Total:\s*(\d+(?:[.,]\d+)?)\s*€\)', text)
-        if total_match:
-            try:
-                total = float(total_match.group(1).replace(',', '.'))
-                amounts.append(total)
-            except ValueError:
-                pass
-
-        return max(amounts) if amounts else 0.0
+        return extract_amount_from_text(text)
     
     def _extract_amount_from_message_text(self, message_text):
         """
@@ -543,17 +507,17 @@ class AutoTextWindow(QMainWindow):
         print(f"[INFO] Verificando factura adjunta: {invoice_path}")
         warnings = []
         
-        # 1. Extraer texto del PDF adjunto
-        from ia_processor.utils.ocr_utils import extract_text_from_file
-        invoice_text = extract_text_from_file(invoice_path)
+        # 1. Extraer texto del PDF adjunto (se deja de leer al tener número y total)
+        invoice_text = extract_text_until(
+            invoice_path, lambda text: INVOICE_NUMBER_RE.search(text) and INVOICE_TOTAL_RE.search(text)
+        )
         if not invoice_text:
             print(f"[WARNING] No se pudo extraer texto de la factura adjunta.")
             warnings.append("No se pudo extraer texto de la factura PDF")
             return False, warnings
         
         # 2. Extraer número de factura del PDF adjunto (usando regex)
-        import re
-        invoice_number_match = re.search(r'(?:Factura|Nº)[:\s]*([A-Z0-9\-\/]+)', invoice_text, re.IGNORECASE)
+        invoice_number_match = INVOICE_NUMBER_RE.search(invoice_text)
         if not invoice_number_match:
             print(f"[WARNING] No se encontró número de factura en el PDF adjunto.")
             warnings.append("No se encontró número de factura en el PDF")
@@ -570,7 +534,7 @@ class AutoTextWindow(QMainWindow):
             warnings.append(f"Número de factura '{invoice_number}' no encontrado en el mensaje")
             
         # 4. Extraer importe de la factura
-        importe_match = re.search(r'(?:total)[^\w\n]*euros?[^\w\n]*([0-9.,]+)', invoice_text, re.IGNORECASE)
+        importe_match = INVOICE_TOTAL_RE.search(invoice_text)
         if importe_match:
             factura_importe = importe_match.group(1).replace('.', '').replace(',', '.')
             try:
@@ -638,9 +602,11 @@ class AutoTextWindow(QMainWindow):
             show_warning_dialog(self, "Advertencia", "El mensaje está vacío. No se puede verificar la factura.")
             return False, "Mensaje vacío"
 
-        # 5. Extraer importe de la factura PDF
-        from ia_processor.utils.ocr_utils import extract_text_from_file
-        invoice_text = extract_text_from_file(pdf_path)
+        # 5. Extraer importe de la factura PDF (se deja de leer al tener número de factura y total)
+        invoice_text = extract_text_until(
+            pdf_path,
+            lambda text: INVOICE_NUMBER_RE.search(text) and self._extract_amount_from_invoice_text(text) is not None
+        )
         if not invoice_text:
             show_warning_dialog(self, "Error", "No se pudo extraer texto de la factura PDF.")
             return False, "No se pudo leer la factura PDF"
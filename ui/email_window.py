@@ -3,9 +3,9 @@ from PyQt6.QtWidgets import (
     QMainWindow, QVBoxLayout, QHBoxLayout, QPushButton, QTextEdit, QLabel, QWidget, QLineEdit, QMessageBox, QListWidget
 )
 from PyQt6.QtWidgets import QInputDialog, QApplication
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QIcon
-from ui.auto_text_window import AutoTextWindow 
+from ui.auto_text_window import AutoTextWindow, INVOICE_NUMBER_RE
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
@@ -31,7 +31,11 @@ from utils.dialog_utils import load_company_options
 from utils.excel_utils import load_dataframe
 from utils.gui_utils import create_button, create_navbar
 from utils.file_utils import select_files
-from utils.mail_utills import clear_mail_message, load_inbox, load_drafts, get_mail_connection
+from utils.mail_utills import clear_mail_message, load_inbox, load_drafts, get_mail_pool, get_mail_connection, fetch_headers, format_header_listing, get_outbound_queue, get_gmail_service, GmailAuthError
+from utils.mail_idle import MailIdleListener
+from utils.mail_cache import get_mail_cache
+from utils.mail_sender import STATUS_SENT, STATUS_FAILED
+from utils.mail_mime import open_message, download_attachment
 from config import EMAIL_ADDRESS, APP_PASSWORD, SMTP_SERVER, SMTP_PORT, IMAP_SERVER
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.compose', 'https://www.googleapis.com/auth/gmail.readonly']
@@ -40,6 +44,11 @@ SCOPES = ['https://www.googleapis.com/auth/gmail.compose', 'https://www.googleap
 IMAP_SERVER = "imap.gmail.com"
 
 class EmailWindow(QMainWindow):    
+    # Estado de los envíos en segundo plano (id, estado, detalle); se emite desde el hilo de la cola
+    mail_status = pyqtSignal(str, str, str)
+    # Resumen de una tanda de envíos (enviados, [(asunto, detalle) de los fallidos])
+    mail_batch_done = pyqtSignal(int, list)
+
     def __init__(self, main_window, has_internet=True):
         super().__init__()
         self.main_window = main_window
@@ -51,8 +60,19 @@ class EmailWindow(QMainWindow):
         self.setWindowIcon(QIcon(os.path.join("data", "icon", "gmail.png")))
         self.setGeometry(100, 100, 800, 800)
         
-        # Inicializar mail_connection como None
-        self.mail = None
+        # Pool de sesiones IMAP (se conecta bajo demanda y se reconecta si el servidor cierra la sesión)
+        self.mail_pool = None
+        # Escucha de correo nuevo (IMAP IDLE) en segundo plano
+        self.idle_listener = None
+        self.showing_inbox = True
+        # Buzón y cabeceras (con UID) del listado visible, para abrir mensajes bajo demanda
+        self.current_mailbox = "inbox"
+        self.listed_headers = []
+        # Cola de envío SMTP en segundo plano (datos de cada envío pendiente por id, para
+        # poder recuperarlo en el formulario si falla)
+        self.pending_sends = {}
+        self.mail_status.connect(self.on_mail_status)
+        self.mail_batch_done.connect(self.on_mail_batch_done)
         
         # Verificar conexión y mostrar mensaje si es necesario
         if not self.has_internet:
@@ -170,6 +190,11 @@ class EmailWindow(QMainWindow):
             "email_receive.png",
             self.load_received_messages
         ))
+        additional_buttons_layout.addWidget(create_button(
+            " Abrir",
+            "email_receive.png",
+            self.open_listed_message
+        ))
         additional_buttons_layout.addWidget(create_button(
             " Autotext",
             "autotext.png",
@@ -189,52 +214,124 @@ class EmailWindow(QMainWindow):
         # Cargar datos iniciales solo si hay conexión
         if self.has_internet:
             try:
-                self.mail = get_mail_connection()
+                self.mail_pool = get_mail_pool()
                 self.load_received_messages()
+                self.start_idle_listener()
             except Exception as e:
                 print(f"[WARNING] No se pudo conectar a Gmail: {e}")
                 # No mostrar error aquí, solo cuando el usuario intente usar la función
         else:
             print("[INFO] Modo offline - no se intenta conexión a Gmail")
 
+    def start_idle_listener(self):
+        """Arrancar el hilo que avisa de correo nuevo en la bandeja de entrada."""
+        if self.idle_listener is not None:
+            return
+        self.idle_listener = MailIdleListener(get_mail_connection, mailbox="inbox", parent=self)
+        self.idle_listener.new_mail.connect(self.on_new_mail)
+        self.idle_listener.start()
+
+    def on_new_mail(self, count):
+        """Slot de la señal new_mail: sincroniza solo lo nuevo si se está viendo la bandeja de entrada."""
+        print(f"[INFO] {count} correo(s) nuevo(s) en la bandeja de entrada.")
+        if self.showing_inbox:
+            self.load_received_messages()
+
+    def closeEvent(self, event):
+        if self.idle_listener is not None:
+            self.idle_listener.stop()
+            self.idle_listener.wait(5000)
+            self.idle_listener = None
+        super().closeEvent(event)
+
     def load_received_messages(self):
         """Cargar mensajes recibidos con manejo de conexión"""
+        self.showing_inbox = True
         if not self.has_internet:
             self.received_messages_area.setPlainText("Modo offline: No hay mensajes disponibles.")
             return
             
-        if not self.mail:
-            try:
-                self.mail = get_mail_connection()
-            except Exception as e:
-                self.received_messages_area.setPlainText(f"Error de conexión: {e}")
-                return
+        # Mostrar primero lo que hay en caché (apertura instantánea) y después sincronizar lo nuevo
+        mail_cache = get_mail_cache()
+        cached_messages = format_header_listing(mail_cache.list_headers("inbox", 5))
+        if cached_messages:
+            self.received_messages_area.setPlainText("\n\n".join(cached_messages))
+            QApplication.processEvents()
+
+        if not self.mail_pool:
+            self.mail_pool = get_mail_pool()
         
         try:
-            inbox_messages = load_inbox(self.mail, LIMIT=5)
-            self.received_messages_area.setPlainText("\n".join(inbox_messages))
+            inbox_messages = self.mail_pool.run(load_inbox, LIMIT=5, cache=mail_cache)
+            self.received_messages_area.setPlainText("\n\n".join(inbox_messages or []))
+            self.current_mailbox = "inbox"
+            self.listed_headers = mail_cache.list_headers("inbox", 5)
         except Exception as e:
             self.received_messages_area.setPlainText(f"Error al cargar mensajes: {e}")
 
     def load_drafts(self):
         """Cargar borradores con manejo de conexión"""
+        self.showing_inbox = False
         if not self.has_internet:
             self.received_messages_area.setPlainText("Modo offline: No hay borradores disponibles.")
             return
             
-        if not self.mail:
-            try:
-                self.mail = get_mail_connection()
-            except Exception as e:
-                self.received_messages_area.setPlainText(f"Error de conexión: {e}")
-                return
+        mail_cache = get_mail_cache()
+        cached_drafts = format_header_listing(mail_cache.list_headers('[Gmail]/Borradores', 10))
+        if cached_drafts:
+            self.received_messages_area.setPlainText("\n\n".join(cached_drafts))
+            QApplication.processEvents()
+
+        if not self.mail_pool:
+            self.mail_pool = get_mail_pool()
         
         try:
-            draft_messages = load_drafts(self.mail, LIMIT=10)
-            self.received_messages_area.setPlainText("\n".join(draft_messages))
+            draft_messages = self.mail_pool.run(load_drafts, LIMIT=10, cache=mail_cache)
+            self.received_messages_area.setPlainText("\n\n".join(draft_messages or []))
+            self.current_mailbox = '[Gmail]/Borradores'
+            self.listed_headers = mail_cache.list_headers('[Gmail]/Borradores', 10)
         except Exception as e:
             self.received_messages_area.setPlainText(f"Error al cargar borradores: {e}")
 
+    def open_listed_message(self):
+        """
+        Abrir uno de los mensajes listados. Solo se descarga la estructura y el texto;
+        los adjuntos se descargan únicamente si el usuario los pide.
+        """
+        if not self.listed_headers or not self.mail_pool:
+            show_warning_dialog(self, "Advertencia", "No hay mensajes listados para abrir.")
+            return
+        options = [f"{h['from']} - {h['subject']}" for h in self.listed_headers]
+        choice, ok = QInputDialog.getItem(self, "Abrir correo", "Selecciona el mensaje:", options, 0, False)
+        if not ok:
+            return
+        header = self.listed_headers[options.index(choice)]
+        mailbox = self.current_mailbox
+        try:
+            text, files = self.mail_pool.run(open_message, mailbox, header["uid"], cache=get_mail_cache())
+        except Exception as e:
+            show_error_dialog(self, "Error", f"No se pudo abrir el correo: {e}")
+            return
+
+        lines = [f"De: {header['from']}", f"Asunto: {header['subject']}", f"Fecha: {header['date']}", "", text]
+        if files:
+            lines += ["", "Adjuntos:"] + [f"  - {f['filename']} ({f['size'] // 1024} KB)" for f in files]
+        self.received_messages_area.setPlainText("\n".join(lines))
+        if files:
+            self.download_message_attachment(mailbox, header["uid"], files)
+
+    def download_message_attachment(self, mailbox, uid, files):
+        """Descargar bajo demanda uno de los adjuntos del mensaje abierto."""
+        names = [f["filename"] or f"Parte {f['part']}" for f in files]
+        choice, ok = QInputDialog.getItem(self, "Adjuntos", "¿Descargar un adjunto?", names, 0, False)
+        if not ok:
+            return
+        try:
+            path = self.mail_pool.run(download_attachment, mailbox, uid, files[names.index(choice)])
+            show_info_dialog(self, "Adjunto descargado", f"Guardado en:\n{path}")
+        except Exception as e:
+            show_error_dialog(self, "Error", f"No se pudo descargar el adjunto: {e}")
+
     def send_email(self):
         """
         Envía el correo electrónico con archivos adjuntos.
@@ -255,45 +352,63 @@ class EmailWindow(QMainWindow):
             if not success:
                 return False, message
         
-        # 4. Continuar con el envío normal (resto del código existente)
-        message = MIMEMultipart()
-        message['Subject'] = asunto
-        message['From'] = EMAIL_ADDRESS
-        message['To'] = destination
-        message.attach(MIMEText(message_text, "plain"))
-        
-        # Adjuntar archivos
+        # 4. Encolar el envío: la cola reutiliza la sesión SMTP, lee los adjuntos del disco
+        #    al enviarlos y reintenta los fallos transitorios sin bloquear la interfaz
+        attachments = [path for path in self.attached_files if os.path.isfile(path)]
         for file_path in self.attached_files:
-            if os.path.isfile(file_path):
-                try:
-                    with open(file_path, "rb") as file:
-                        part = MIMEBase("application", "octet-stream")
-                        part.set_payload(file.read())
-                    encoders.encode_base64(part)
-                    filename = os.path.basename(file_path)
-                    part.add_header("Content-Disposition", f"attachment; filename= {filename}")
-                    message.attach(part)
-                    print(f"[INFO] Archivo adjuntado: {file_path}")
-                except Exception as e:
-                    error_msg = f"Falló al adjuntar {file_path}: {e}"
-                    print(f"[ERROR] {error_msg}")
-                    show_error_dialog(self, "Error", error_msg)
-                    continue
-        
-        # Enviar correo
-        try:
-            with smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT) as server:
-                server.login(EMAIL_ADDRESS, APP_PASSWORD)
-                server.sendmail(EMAIL_ADDRESS, destination, message.as_string())
-            print("[INFO] Correo enviado exitosamente.")
-            show_info_dialog(self, "Éxito", "Correo enviado exitosamente.")
-            self.clear_current_message()
-            return True, "Correo enviado exitosamente"
-        except Exception as e:
-            error_msg = f"Error al enviar correo: {e}"
-            print(f"[ERROR] {error_msg}")
-            show_error_dialog(self, "Error", error_msg)
-            return False, error_msg
+            if file_path not in attachments:
+                print(f"[WARNING] Adjunto no encontrado, se omite: {file_path}")
+        outbound = get_outbound_queue(on_status=self.mail_status.emit)
+        message_id = outbound.submit(asunto, destination, message_text, attachments)
+        self.pending_sends[message_id] = {
+            "subject": asunto, "recipient": destination, "body": message_text, "attachments": attachments
+        }
+        # El resultado llega después por mail_status: aquí solo se confirma que está en cola
+        self.statusBar().showMessage(f"'{asunto}' en cola de envío...")
+        self.clear_current_message()
+        return True, "Correo en cola de envío"
+
+    def on_mail_status(self, message_id, status, detail):
+        """
+        Slot de mail_status: muestra el progreso de cada envío y avisa al terminar.
+        Los envíos que no salen del formulario (tandas de AutoTextWindow) solo se muestran en la
+        barra de estado: su resultado llega resumido por mail_batch_done.
+        """
+        pending = self.pending_sends.get(message_id)
+        if pending is None:
+            self.statusBar().showMessage(detail, 10000)
+            return
+        asunto = pending["subject"]
+        self.statusBar().showMessage(f"{asunto}: {detail}", 10000)
+        if status == STATUS_SENT:
+            self.pending_sends.pop(message_id, None)
+            show_info_dialog(self, "Éxito", f"Correo '{asunto}' enviado exitosamente.")
+        elif status == STATUS_FAILED:
+            self.pending_sends.pop(message_id, None)
+            restored = self.restore_failed_send(pending)
+            extra = "\nEl mensaje se ha recuperado en el formulario para reintentarlo." if restored else ""
+            show_error_dialog(self, "Error", f"No se pudo enviar '{asunto}': {detail}{extra}")
+
+    def on_mail_batch_done(self, sent, failed):
+        """Slot de mail_batch_done: un único aviso con el resultado de toda la tanda."""
+        if not failed:
+            show_info_dialog(self, "Éxito", f"{sent} correos enviados exitosamente.")
+            return
+        lines = "\n".join(f"- {asunto}: {detail}" for asunto, detail in failed)
+        show_error_dialog(self, "Error", f"{sent} correos enviados, {len(failed)} sin enviar:\n{lines}")
+
+    def restore_failed_send(self, pending):
+        """Vuelve a cargar en el formulario un envío fallido si el usuario no está escribiendo otro."""
+        if self.compose_area.toPlainText() or self.subject_input.text():
+            return False
+        self.subject_input.setText(pending["subject"])
+        self.destination_input.setText(pending["recipient"])
+        self.compose_area.setPlainText(pending["body"])
+        self.attached_files = list(pending["attachments"])
+        self.attach_list.clear()
+        for file_path in self.attached_files:
+            self.attach_list.addItem(os.path.basename(file_path))
+        return True
 
     def save_email(self):
         """
@@ -357,55 +472,17 @@ class EmailWindow(QMainWindow):
         # --- 5. Convertir el mensaje MIME a formato raw para la API de Gmail ---
         raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
 
-        # --- 6. Autenticación y Autorización con la API de Gmail ---
-        creds = None
-        token_path = os.path.join(os.path.dirname(__file__), 'token.json')
-        # Asumiendo que credentials.json está en calendar_api_setting/ en la raíz del proyecto
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        credentials_path = os.path.join(project_root, 'calendar_api_setting', 'credentials.json')
-
-        # Verificar existencia de credentials.json
-        if not os.path.exists(credentials_path):
-            error_msg = f"El archivo credentials.json no se encuentra en la ruta: {credentials_path}"
-            print(f"[ERROR] {error_msg}")
+        # --- 6. Autenticación: cliente de Gmail compartido (se construye una sola vez por sesión) ---
+        try:
+            service = get_gmail_service()
+        except GmailAuthError as e:
+            # credentials.json ausente o autorización OAuth fallida
+            error_msg = str(e)
             show_error_dialog(self, "Error", error_msg)
             return False, error_msg
 
-        # Cargar token si existe
-        if os.path.exists(token_path):
-            creds = Credentials.from_authorized_user_file(token_path, SCOPES)
-
-        # Si no hay credenciales válidas, iniciar flujo OAuth
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                try:
-                    creds.refresh(Request())
-                except Exception as e:
-                    error_msg = f"Error al refrescar el token: {e}"
-                    print(f"[ERROR] {error_msg}")
-                    show_error_dialog(self, "Error", error_msg)
-                    return False, error_msg # Detener si no se puede refrescar
-            else:
-                try:
-                    flow = InstalledAppFlow.from_client_secrets_file(credentials_path, SCOPES)
-                    creds = flow.run_local_server(port=0)
-                    # Guardar las credenciales para la próxima ejecución
-                    with open(token_path, 'w') as token:
-                        token.write(creds.to_json())
-                    print("[INFO] Nuevas credenciales guardadas.")
-                except Exception as e:
-                    error_msg = f"Error en el flujo de autenticación OAuth: {e}"
-                    print(f"[ERROR] {error_msg}")
-                    show_error_dialog(self, "Error", error_msg)
-                    return False, error_msg # Detener si falla OAuth
-
-        # ---------------------------------------------------------------
-    
         # --- 7. Interactuar con la API de Gmail para crear el borrador ---
         try:
-            # Construir el servicio de Gmail
-            service = build('gmail', 'v1', credentials=creds)
-
             # Crear el cuerpo de la solicitud para el borrador
             create_draft_request_body = {
                 'message': {
@@ -448,33 +525,9 @@ class EmailWindow(QMainWindow):
         self.sendfactura=False   
 
     def return_mail(self, mail_ids):
-        messages = []
-        for num in mail_ids:
-            # Obtener el contenido del correo
-            status, msg_data = self.mail.fetch(num, "(RFC822)")
-
-            for response_part in msg_data:
-                if isinstance(response_part, tuple):
-                    # Decodificar el mensaje
-                    msg = email.message_from_bytes(response_part[1])
-
-                    # Obtener el asunto
-                    subject, encoding = decode_header(msg["Subject"])[0]
-                    if isinstance(subject, bytes):
-                        subject = subject.decode(encoding if encoding else "utf-8")
-
-                    # Obtener el remitente
-                    from_email = msg.get("From")
-                    messages.append(f"De: {from_email}\nAsunto: {subject}\n")
-        return messages
-
-    def load_received_messages(self):
-        inbox_messages = load_inbox(self.mail, LIMIT=5)
-        self.received_messages_area.setPlainText("\n\n".join(inbox_messages))
-
-    def load_drafts(self):
-        draft_messages = load_drafts(self.mail, LIMIT=10)
-        self.received_messages_area.setPlainText("\n\n".join(draft_messages))
+        with self.mail_pool.connection() as mail:
+            headers = fetch_headers(mail, mail_ids, use_uid=False)
+        return [f"De: {header['from']}\nAsunto: {header['subject']}\n" for header in headers]
 
     # __AutoText Window__ 
     def open_autotext_window(self):
@@ -522,9 +575,12 @@ class EmailWindow(QMainWindow):
             show_warning_dialog(self, "Error", f"El archivo PDF no existe: {pdf_path}")
             return False, f"Archivo PDF no existe: {pdf_path}"
         
-        # Extraer texto del PDF
-        from ia_processor.utils.ocr_utils import extract_text_from_file
-        invoice_text = extract_text_from_file(pdf_path)
+        # Extraer texto del PDF (se deja de leer al tener número de factura y total)
+        from ia_processor.utils.ocr_utils import extract_text_until
+        invoice_text = extract_text_until(
+            pdf_path,
+            lambda text: INVOICE_NUMBER_RE.search(text) and self._extract_amount_from_invoice_text(text) is not None
+        )
         if not invoice_text:
             show_warning_dialog(self, "Error", "No se pudo extraer texto de la factura PDF.")
             return False, "No se pudo leer la factura PDF"
@@ -0,0 +1,246 @@
+# utils/auto_text_utils.py
+import calendar
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from calendar_api_setting.calendar_api import get_events_between
+from utils.excel_utils import load_dataframe
+from utils.company_utils import get_company_data, get_coop_data, get_company_name, normalize_company_name
+from config import EXCEL_FILE_PATH
+
+MONTHS_ES = [
+    "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
+    "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
+]
+
+# Mapeo inteligente: empresa → tarea típica
+EMPRESA_TAREA_DEFAULT = {
+    "IDOIPE": "Técnico de Video",
+    "TELEPIXEL S.L.U.": "Técnico de Video",
+    "VISUALMAX S.L.": "Técnico pantalla Led",
+    "CRAMBO ALQUILER S.L.": "Técnico pantalla Led",
+    "LAST LAP S.L.": "Técnico pantalla Led",
+    "DAIGON": "Técnico pantalla Led",
+    "KENZO STUDIO": "Técnico de Streaming",
+    "MADWORKS": "LedMapping",
+    "PEAK ENTERTAINMENT S.L.U.": "LedMapping",
+
+}
+
+ALTA_SS = "Dar alta S.S."
+PEDIR_FACTURA = "Pedir Factura"
+ENVIAR_FACTURA = "Enviar Factura"
+
+_AMOUNT_RE = re.compile(r'(\d+(?:[.,]\d+)?)\s*€')
+_TOTAL_RE = re.compile(r'\(Total:\s*(\d+(?:[.,]\d+)?)\s*€\)')
+
+
+# Format
+def format_days_spanish(days_list, month_name):
+    """
+    Convierte una lista de días [1, 2, 3, 5, 7, 8, 9] en texto legible:
+    "1 al 3, 5 y del 7 al 9 de enero"
+    """
+    if not days_list:
+        return "[días]"
+
+    # Ordenar y eliminar duplicados
+    days = sorted(set(days_list))
+    ranges = []
+    start = days[0]
+    end = days[0]
+
+    for day in days[1:]:
+        if day == end + 1:
+            end = day
+        else:
+            ranges.append(str(start) if start == end else f"{start} al {end}")
+            start = day
+            end = day
+
+    # Añadir último rango
+    ranges.append(str(start) if start == end else f"{start} al {end}")
+
+    # Formatear según número de rangos
+    if len(ranges) == 1:
+        result = ranges[0]
+    elif len(ranges) == 2:
+        result = f"{ranges[0]} y {ranges[1]}"
+    else:
+        result = ", ".join(ranges[:-1]) + f" y {ranges[-1]}"
+
+    return f"{result} de {month_name.lower()}"
+
+
+def extract_amount_from_text(text):
+    """
+    Extrae el importe más alto de un texto, buscando:
+    - Números seguidos de '€'
+    - Números entre paréntesis al final: (Total: XXX€)
+    """
+    amounts = []
+    for match in _AMOUNT_RE.finditer(text):
+        try:
+            amounts.append(float(match.group(1).replace(',', '.')))
+        except ValueError:
+            continue
+    total_match = _TOTAL_RE.search(text)
+    if total_match:
+        try:
+            amounts.append(float(total_match.group(1).replace(',', '.')))
+        except ValueError:
+            pass
+    return max(amounts) if amounts else 0.0
+
+
+def coop_payment_sections(coop_data):
+    """Devuelve (métodos de pago, sección de cuentas bancarias) para el texto de 'Enviar Factura'."""
+    metodos_raw = coop_data.get('Metodo_de_pago', "[Métodos]")
+    if metodos_raw and metodos_raw != "[Métodos]":
+        metodos = f"Transferencia Bancaria:\n{metodos_raw}"
+    else:
+        metodos = "Transferencia Bancaria:\n[Métodos]"
+
+    cuentas_raw = coop_data.get('Cuenta_Bancaria', "").strip()
+    cuentas_section = ""
+    if cuentas_raw and cuentas_raw != "[Cuenta Bancaria]":
+        if ';' in cuentas_raw:
+            cuentas = "\n".join(c.strip() for c in cuentas_raw.split(';'))
+        else:
+            cuentas = cuentas_raw
+        cuentas_section = f"Cuenta bancaria:\n{cuentas}\n\n"
+    return metodos, cuentas_section
+
+
+def company_task(empresa):
+    return EMPRESA_TAREA_DEFAULT.get(normalize_company_name(empresa), "servicios")
+
+
+# Templates
+def text_alta_ss(texto_fechas):
+    subject = "Alta en S.S."
+    text = (
+        f"Hola buenos días\n\n"
+        f"Querría darme de alta para los días {texto_fechas}.\n\n"
+        f"Muchas gracias,\nUn saludo,\nJavier"
+    )
+    return subject, text
+
+
+def text_pedir_factura(empresa, importe_str, company_data, month_name, year):
+    cif = company_data.get('CIF', "[CIF]")
+    direccion = company_data.get('Direccion', "[Dirección]")
+    subject = f"Pedir Factura {empresa} {month_name} {year}"
+    text = (
+        f"Hola buenos días\n\n"
+        f"Querría hacer una factura de {importe_str}€ + IVA,\n"
+        f"para el evento [nombre_evento] en [location], como {company_task(empresa)},\n\n"
+        f"Por favor indiquen concepto de referencia en la factura [ref_cliente]\n\n"
+        f"Os dejo los datos del cliente:\n"
+        f"Nombre: {empresa}\n"
+        f"CIF: {cif}\n"
+        f"Dirección: {direccion}\n\n"
+        f"Muchas gracias\nUn saludo\nJavier"
+    )
+    return subject, text
+
+
+def text_enviar_factura(empresa, importe_str, coop_data, month_name, year):
+    metodos, cuentas_section = coop_payment_sections(coop_data)
+    subject = f"Factura {empresa} {month_name} {year} [ref_cliente]"
+    text = (
+        f"Hola buenos días\n\n"
+        f"Os mando la factura {month_name} {year} con un importe total de {importe_str}€ + IVA,\n"
+        f"para el evento [nombre_evento] en [location], como {company_task(empresa)}.\n\n"
+        f"Por favor indiquen concepto de referencia en la factura [ref_coop].\n\n"
+        f"{metodos}\n\n"
+        f"{cuentas_section}"
+        f"Muchas gracias\nUn saludo\nJavier"
+    )
+    return subject, text
+
+
+def format_amount(total_importe):
+    return f"{total_importe:.2f}" if total_importe > 0 else "[importe]"
+
+
+# Bulk (todas las empresas de un mes)
+def collect_month_events(events, year, month):
+    """
+    Agrupa en una sola pasada los eventos del mes por empresa (descripción "tarifa€ empresa").
+    Returns:
+        dict: empresa -> {'tarifa', 'days' (set de días del mes), 'total' (importe acumulado)}
+    """
+    companies = {}
+    for ev in events:
+        desc = ev.get('description', '')
+        if '€' not in desc:
+            continue
+        tarifa = desc.split('€', 1)[0].strip()
+        empresa = get_company_name(ev)
+        if not empresa or empresa == "Empresa desconocida":
+            continue
+        start = ev.get('start', {})
+        start = start.get('dateTime', start.get('date'))
+        if not start:
+            continue
+        ev_year, ev_month, ev_day = map(int, start.split('T')[0].split('-'))
+        if ev_year != year or ev_month != month:
+            continue
+        info = companies.setdefault(empresa, {'tarifa': tarifa, 'days': set(), 'total': 0.0})
+        info['days'].add(ev_day)
+        info['total'] += extract_amount_from_text(desc + " " + ev.get('summary', ''))
+    return companies
+
+
+def load_month_sources(year, month):
+    """
+    Carga en paralelo los eventos del mes (una consulta por rango) y las hojas de empresas y
+    cooperativas del Excel, que son independientes entre sí.
+    Returns:
+        tuple: (eventos, df_empresas, df_cooperativas)
+    """
+    first_day = date(year, month, 1)
+    last_day = date(year, month, calendar.monthrange(year, month)[1])
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        events = executor.submit(get_events_between, first_day, last_day)
+        df_empresas = executor.submit(load_dataframe, EXCEL_FILE_PATH, 'datos_empresa')
+        df_coops = executor.submit(load_dataframe, EXCEL_FILE_PATH, 'datos_cooperativas')
+        return events.result(), df_empresas.result(), df_coops.result()
+
+
+def generate_month_texts(option, year, month, coop_name=None, sources=None):
+    """
+    Genera el texto de `option` (ALTA_SS, PEDIR_FACTURA o ENVIAR_FACTURA) para cada empresa
+    con eventos en el mes, listo para guardarse como borrador o enviarse por la cola de correo.
+    Los textos se generan en serie: es formateo en memoria, y lo que tarda (la consulta al
+    calendario y la lectura del Excel) ya se hace en paralelo en load_month_sources.
+    Args:
+        coop_name (str, optional): Cooperativa destinataria; su correo ('Mails') se usa como destinatario.
+        sources (tuple, optional): (eventos, df_empresas, df_cooperativas) ya cargados.
+    Returns:
+        list: Diccionarios {'empresa', 'subject', 'recipient', 'body'}, ordenados por empresa.
+    """
+    events, df_empresas, df_coops = sources or load_month_sources(year, month)
+    month_name = MONTHS_ES[month - 1]
+    coop_data = get_coop_data(coop_name, df_coops) if coop_name else {}
+    recipient = str(coop_data.get('Mails', '') or '').strip()
+
+    texts = []
+    for empresa, info in sorted(collect_month_events(events, year, month).items()):
+        importe_str = format_amount(info['total'])
+        if option == ALTA_SS:
+            subject, body = text_alta_ss(format_days_spanish(info['days'], month_name))
+            # Un alta por empresa: el asunto indica a cuál corresponde
+            subject = f"{subject} {empresa} {month_name} {year}"
+        elif option == PEDIR_FACTURA:
+            company_data = get_company_data(empresa, df_empresas) if df_empresas is not None else {}
+            subject, body = text_pedir_factura(empresa, importe_str, company_data, month_name, year)
+        elif option == ENVIAR_FACTURA:
+            subject, body = text_enviar_factura(empresa, importe_str, coop_data, month_name, year)
+        else:
+            raise ValueError(f"Tipo de texto desconocido: {option}")
+        texts.append({'empresa': empresa, 'subject': subject, 'recipient': recipient, 'body': body})
+    print(f"[INFO] Textos '{option}' generados para {len(texts)} empresas ({month_name} {year}).")
+    return texts
@@ -0,0 +1,144 @@
+# utils/gmail_drafts.py
+import base64
+import mimetypes
+import os
+
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from config import EMAIL_ADDRESS
+from utils.mail_utills import get_gmail_service
+
+# Gmail admite hasta 100 peticiones por lote, pero recomienda no pasar de 50 para no agotar la cuota
+GMAIL_BATCH_SIZE = 50
+# Respuestas parciales: solo los campos que se usan
+DRAFT_LIST_FIELDS = "drafts(id,message/id),nextPageToken"
+DRAFT_METADATA_FIELDS = "id,payload/headers"
+DRAFT_WRITE_FIELDS = "id,message/id"
+
+
+def build_raw_message(subject, recipient, body, attachments=()):
+    """Mensaje MIME codificado en base64url, tal como lo espera la API de Gmail."""
+    message = MIMEMultipart()
+    message['Subject'] = subject
+    message['From'] = EMAIL_ADDRESS
+    message['To'] = recipient
+    message.attach(MIMEText(body, "plain"))
+    for file_path in attachments:
+        if not os.path.isfile(file_path):
+            print(f"[WARNING] Adjunto no encontrado, se omite: {file_path}")
+            continue
+        subtype = (mimetypes.guess_type(file_path)[0] or "application/octet-stream").split("/")[-1]
+        with open(file_path, "rb") as f:
+            part = MIMEApplication(f.read(), _subtype=subtype)
+        part.add_header("Content-Disposition", "attachment", filename=os.path.basename(file_path))
+        message.attach(part)
+    return base64.urlsafe_b64encode(message.as_bytes()).decode()
+
+
+def _run_batch(service, requests):
+    """
+    Ejecuta las peticiones en lotes HTTP de GMAIL_BATCH_SIZE.
+    Returns:
+        list: (respuesta, error) por petición, en el mismo orden.
+    """
+    results = [(None, None)] * len(requests)
+
+    def callback(request_id, response, exception):
+        results[int(request_id)] = (response, exception)
+
+    for start in range(0, len(requests), GMAIL_BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=callback)
+        for offset, request in enumerate(requests[start:start + GMAIL_BATCH_SIZE]):
+            batch.add(request, request_id=str(start + offset))
+        batch.execute()
+    return results
+
+
+def list_drafts(limit=10, service=None):
+    """
+    Lista los borradores con una petición de ids y un lote de cabeceras (format=metadata),
+    sin descargar cuerpos ni adjuntos.
+    Returns:
+        list: Diccionarios {'id', 'message_id', 'subject', 'to', 'date'}.
+    """
+    service = service or get_gmail_service()
+    response = service.users().drafts().list(
+        userId='me', maxResults=limit, fields=DRAFT_LIST_FIELDS
+    ).execute()
+    drafts = response.get('drafts', [])
+    if not drafts:
+        return []
+
+    messages = service.users().messages()
+    requests = [
+        messages.get(userId='me', id=draft['message']['id'], format='metadata',
+                     metadataHeaders=['Subject', 'To', 'Date'], fields=DRAFT_METADATA_FIELDS)
+        for draft in drafts
+    ]
+    listing = []
+    for draft, (message, error) in zip(drafts, _run_batch(service, requests)):
+        if error is not None:
+            print(f"[WARNING] No se pudieron leer las cabeceras del borrador {draft['id']}: {error}")
+            continue
+        headers = {h['name'].lower(): h['value'] for h in message.get('payload', {}).get('headers', [])}
+        listing.append({
+            'id': draft['id'],
+            'message_id': draft['message']['id'],
+            'subject': headers.get('subject', ''),
+            'to': headers.get('to', ''),
+            'date': headers.get('date', '')
+        })
+    return listing
+
+
+def save_drafts_batch(drafts, service=None):
+    """
+    Crea o actualiza varios borradores en lotes HTTP (una sola ida y vuelta cada GMAIL_BATCH_SIZE).
+    Args:
+        drafts (list): Diccionarios {'subject', 'recipient', 'body', 'attachments' (opcional),
+                       'draft_id' (opcional: si está, se actualiza ese borrador en vez de crear uno)}.
+    Returns:
+        list: (ok, id del borrador o mensaje de error) por borrador, en el mismo orden.
+    """
+    if not drafts:
+        return []
+    service = service or get_gmail_service()
+    api = service.users().drafts()
+    requests = []
+    for draft in drafts:
+        raw = build_raw_message(draft['subject'], draft['recipient'], draft['body'], draft.get('attachments', ()))
+        body = {'message': {'raw': raw}}
+        if draft.get('draft_id'):
+            requests.append(api.update(userId='me', id=draft['draft_id'], body=body, fields=DRAFT_WRITE_FIELDS))
+        else:
+            requests.append(api.create(userId='me', body=body, fields=DRAFT_WRITE_FIELDS))
+
+    results = []
+    for draft, (response, error) in zip(drafts, _run_batch(service, requests)):
+        if error is not None:
+            print(f"[ERROR] Error al guardar el borrador '{draft['subject']}': {error}")
+            results.append((False, str(error)))
+        else:
+            results.append((True, response['id']))
+    saved = sum(1 for ok, _ in results if ok)
+    print(f"[INFO] Borradores guardados: {saved}/{len(drafts)}.")
+    return results
+
+
+def upsert_drafts(drafts, service=None):
+    """
+    Igual que save_drafts_batch, pero si ya existe un borrador con el mismo asunto y destinatario
+    se actualiza en lugar de duplicarlo (p. ej. al regenerar los textos de un mes).
+    """
+    service = service or get_gmail_service()
+    drafts = [dict(draft) for draft in drafts]
+    pending = [d for d in drafts if not d.get('draft_id')]
+    if pending:
+        existing = {(d['subject'], d['to'].lower()): d['id'] for d in list_drafts(limit=500, service=service)}
+        for draft in pending:
+            draft_id = existing.get((draft['subject'], draft['recipient'].lower()))
+            if draft_id:
+                draft['draft_id'] = draft_id
+    return save_drafts_batch(drafts, service=service)
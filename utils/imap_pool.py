@@ -0,0 +1,195 @@
+# utils/imap_pool.py
+import imaplib
+import threading
+import time
+from contextlib import contextmanager
+
+# Errores que indican que la sesión IMAP ya no sirve (timeout del servidor, socket cerrado...)
+CONNECTION_ERRORS = (imaplib.IMAP4.abort, OSError, EOFError)
+
+
+class PooledImapConnection:
+    """
+    Envoltorio de una sesión IMAP4 que recuerda el buzón seleccionado para no repetir
+    SELECT/EXAMINE innecesarios. El resto de comandos se delegan en la sesión real,
+    así que funciona con las funciones existentes de mail_utills (load_inbox, load_drafts...).
+    """
+    def __init__(self, imap, pool):
+        self._imap = imap
+        self._pool = pool
+        self.selected_mailbox = None
+        self.selected_readonly = None
+        self.last_used = time.monotonic()
+
+    def __getattr__(self, name):
+        return getattr(self._imap, name)
+
+    def select(self, mailbox='INBOX', readonly=False):
+        if mailbox == self.selected_mailbox and readonly == self.selected_readonly:
+            self._pool._count('selects_avoided')
+            return 'OK', [self._last_exists()]
+        typ, data = self._imap.select(mailbox, readonly)
+        self._pool._count('selects')
+        if typ == 'OK':
+            self.selected_mailbox = mailbox
+            self.selected_readonly = readonly
+        else:
+            self.selected_mailbox = self.selected_readonly = None
+        return typ, data
+
+    def _last_exists(self):
+        # imaplib guarda el último EXISTS recibido; es lo que devolvería SELECT
+        exists = self._imap.untagged_responses.get('EXISTS', [b'0'])
+        return exists[-1] if exists else b'0'
+
+    def close(self):
+        self.selected_mailbox = self.selected_readonly = None
+        return self._imap.close()
+
+    def unselect(self):
+        self.selected_mailbox = self.selected_readonly = None
+        return self._imap.unselect()
+
+    def noop(self):
+        return self._imap.noop()
+
+    def logout(self):
+        self.selected_mailbox = self.selected_readonly = None
+        try:
+            return self._imap.logout()
+        except CONNECTION_ERRORS:
+            return 'BYE', []
+
+
+class ImapConnectionPool:
+    """
+    Pool de sesiones IMAP autenticadas.
+    - Reutiliza sesiones ya abiertas (evita el handshake TLS + LOGIN en cada operación).
+    - Antes de entregar una sesión que lleva tiempo inactiva comprueba que sigue viva con NOOP
+      y, si el servidor la ha cerrado, abre otra automáticamente.
+    - Lleva métricas de handshakes realizados/evitados, reconexiones y SELECT evitados.
+    Args:
+        connection_factory (callable): Devuelve una sesión imaplib ya autenticada.
+        max_size (int): Número máximo de sesiones abiertas a la vez.
+        noop_interval (float): Segundos de inactividad tras los que se comprueba la sesión con NOOP.
+    """
+    def __init__(self, connection_factory, max_size=2, noop_interval=60.0):
+        self._factory = connection_factory
+        self.max_size = max_size
+        self.noop_interval = noop_interval
+        self._idle = []
+        self._in_use = 0
+        self._lock = threading.Condition()
+        self._closed = False
+        self.metrics = {
+            'handshakes': 0,
+            'handshakes_avoided': 0,
+            'noops': 0,
+            'reconnects': 0,
+            'selects': 0,
+            'selects_avoided': 0,
+        }
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.metrics[key] += amount
+
+    def _connect(self):
+        imap = self._factory()
+        self._count('handshakes')
+        return PooledImapConnection(imap, self)
+
+    def _is_alive(self, conn):
+        if time.monotonic() - conn.last_used < self.noop_interval:
+            return True
+        try:
+            self._count('noops')
+            typ, _ = conn.noop()
+            return typ == 'OK'
+        except CONNECTION_ERRORS:
+            return False
+
+    def acquire(self, timeout=None):
+        """Obtiene una sesión viva del pool (o abre una nueva si hay hueco)."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("El pool IMAP está cerrado")
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self._idle and self._in_use >= self.max_size:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("No hay sesiones IMAP libres en el pool")
+                self._lock.wait(remaining)
+            conn = self._idle.pop() if self._idle else None
+            self._in_use += 1
+
+        try:
+            if conn is not None:
+                if self._is_alive(conn):
+                    self._count('handshakes_avoided')
+                else:
+                    print("[INFO] Sesión IMAP caducada, reconectando...")
+                    conn.logout()
+                    self._count('reconnects')
+                    conn = self._connect()
+            else:
+                conn = self._connect()
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+                self._lock.notify()
+            raise
+        return conn
+
+    def release(self, conn, broken=False):
+        """Devuelve una sesión al pool. Las sesiones rotas se cierran y se descartan."""
+        conn.last_used = time.monotonic()
+        with self._lock:
+            self._in_use -= 1
+            keep = not broken and not self._closed
+            if keep:
+                self._idle.append(conn)
+            self._lock.notify()
+        if not keep:
+            conn.logout()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """
+        Uso:
+            with pool.connection() as mail:
+                load_inbox(mail)
+        """
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        except CONNECTION_ERRORS:
+            self.release(conn, broken=True)
+            raise
+        except BaseException:
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def run(self, func, *args, **kwargs):
+        """
+        Ejecuta func(conexion, *args, **kwargs) con una sesión del pool.
+        Si la sesión se cae a mitad de la operación se reintenta una vez con una sesión nueva.
+        """
+        try:
+            with self.connection() as conn:
+                return func(conn, *args, **kwargs)
+        except CONNECTION_ERRORS as e:
+            print(f"[WARNING] Conexión IMAP perdida ({e}), reintentando con una sesión nueva...")
+            self._count('reconnects')
+            with self.connection() as conn:
+                return func(conn, *args, **kwargs)
+
+    def close_all(self):
+        """Cierra todas las sesiones inactivas y no admite más peticiones."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.logout()
@@ -0,0 +1,207 @@
+# utils/mail_cache.py
+import os
+import re
+import sqlite3
+import threading
+
+from utils.mail_utills import fetch_headers
+
+DEFAULT_CACHE_PATH = os.path.join("data", "mail_cache.sqlite")
+# En la primera sincronización de un buzón solo se descargan las cabeceras más recientes
+INITIAL_SYNC_LIMIT = 200
+
+_STATUS_ITEM_RE = re.compile(rb'([A-Z]+) (\d+)')
+_FLAGS_RE = re.compile(rb'FLAGS \(([^)]*)\)')
+_UID_RE = re.compile(rb'UID (\d+)')
+
+
+class MailCache:
+    """
+    Caché local (SQLite) de cabeceras y cuerpos de correo, con clave (buzón, UIDVALIDITY, UID).
+    La sincronización es incremental: solo se piden al servidor los UID >= UIDNEXT guardado y,
+    si el servidor soporta CONDSTORE, los cambios de flags desde el último HIGHESTMODSEQ.
+    Si cambia UIDVALIDITY se descarta la caché de ese buzón.
+    """
+    def __init__(self, db_path=DEFAULT_CACHE_PATH):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS mailbox_state (
+                    mailbox TEXT PRIMARY KEY,
+                    uidvalidity INTEGER NOT NULL,
+                    uidnext INTEGER NOT NULL,
+                    highestmodseq INTEGER,
+                    messages INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS messages (
+                    mailbox TEXT NOT NULL,
+                    uidvalidity INTEGER NOT NULL,
+                    uid INTEGER NOT NULL,
+                    from_addr TEXT,
+                    subject TEXT,
+                    date TEXT,
+                    flags TEXT,
+                    body BLOB,
+                    PRIMARY KEY (mailbox, uidvalidity, uid)
+                );
+            """)
+
+    # --- Lectura ---
+    def get_state(self, mailbox):
+        row = self._conn.execute(
+            "SELECT uidvalidity, uidnext, highestmodseq, messages FROM mailbox_state WHERE mailbox = ?", (mailbox,)
+        ).fetchone()
+        if not row:
+            return None
+        return {"uidvalidity": row[0], "uidnext": row[1], "highestmodseq": row[2], "messages": row[3]}
+
+    def list_headers(self, mailbox, limit=5):
+        """Cabeceras en caché del buzón, de la más reciente a la más antigua."""
+        state = self.get_state(mailbox)
+        if not state:
+            return []
+        rows = self._conn.execute(
+            "SELECT uid, from_addr, subject, date, flags FROM messages "
+            "WHERE mailbox = ? AND uidvalidity = ? ORDER BY uid DESC LIMIT ?",
+            (mailbox, state["uidvalidity"], limit)
+        ).fetchall()
+        return [{"uid": r[0], "from": r[1], "subject": r[2], "date": r[3], "flags": r[4]} for r in rows]
+
+    def get_body(self, mailbox, uid):
+        state = self.get_state(mailbox)
+        if not state:
+            return None
+        row = self._conn.execute(
+            "SELECT body FROM messages WHERE mailbox = ? AND uidvalidity = ? AND uid = ?",
+            (mailbox, state["uidvalidity"], uid)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put_body(self, mailbox, uid, body):
+        state = self.get_state(mailbox)
+        if not state:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE messages SET body = ? WHERE mailbox = ? AND uidvalidity = ? AND uid = ?",
+                (body, mailbox, state["uidvalidity"], uid)
+            )
+
+    # --- Sincronización ---
+    def sync(self, mail_connection, mailbox):
+        """
+        Sincroniza el buzón con el servidor descargando solo lo nuevo.
+        Returns:
+            int: Número de mensajes nuevos añadidos a la caché.
+        """
+        condstore = "CONDSTORE" in getattr(mail_connection, "capabilities", ())
+        items = "(MESSAGES UIDNEXT UIDVALIDITY HIGHESTMODSEQ)" if condstore else "(MESSAGES UIDNEXT UIDVALIDITY)"
+        status, data = mail_connection.status(mailbox, items)
+        if status != "OK" or not data:
+            return 0
+        server = {key.decode(): int(value) for key, value in _STATUS_ITEM_RE.findall(data[0])}
+        uidvalidity, uidnext = server["UIDVALIDITY"], server["UIDNEXT"]
+        highestmodseq = server.get("HIGHESTMODSEQ")
+        server_messages = server.get("MESSAGES", 0)
+
+        state = self.get_state(mailbox)
+        if state and state["uidvalidity"] != uidvalidity:
+            print(f"[INFO] UIDVALIDITY de '{mailbox}' ha cambiado; se descarta la caché del buzón.")
+            self._drop_mailbox(mailbox)
+            state = None
+
+        if (state and state["uidnext"] == uidnext and state["messages"] == server_messages
+                and (not condstore or state["highestmodseq"] == highestmodseq)):
+            return 0  # Nada nuevo: ni siquiera hace falta SELECT
+
+        status, _ = mail_connection.select(mailbox)
+        if status != "OK":
+            return 0
+
+        # 1. Mensajes nuevos: UID >= UIDNEXT guardado
+        first_uid = state["uidnext"] if state else 1
+        status, data = mail_connection.uid("SEARCH", None, f"UID {first_uid}:*")
+        new_uids = []
+        if status == "OK" and data and data[0]:
+            # "n:*" devuelve siempre el último mensaje aunque su UID sea menor que n
+            new_uids = [uid for uid in data[0].split() if int(uid) >= first_uid]
+        # Si hay menos mensajes de los esperados (anteriores + nuevos) es que se ha borrado alguno
+        expunged = bool(state) and server_messages < state["messages"] + len(new_uids)
+        if not state:
+            new_uids = new_uids[-INITIAL_SYNC_LIMIT:]
+        headers = fetch_headers(mail_connection, new_uids)
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO messages (mailbox, uidvalidity, uid, from_addr, subject, date, flags) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(mailbox, uidvalidity, h["uid"], h["from"], h["subject"], h["date"], h.get("flags", ""))
+                 for h in headers if h["uid"] is not None]
+            )
+
+        # 2. Cambios de flags desde el último MODSEQ (CONDSTORE)
+        if condstore and state and state["highestmodseq"] and state["highestmodseq"] != highestmodseq:
+            self._sync_flags(mail_connection, mailbox, uidvalidity, state["highestmodseq"])
+
+        # 3. Mensajes borrados: solo se pide la lista completa de UIDs si el recuento no cuadra
+        if expunged:
+            self._prune_expunged(mail_connection, mailbox, uidvalidity)
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO mailbox_state (mailbox, uidvalidity, uidnext, highestmodseq, messages) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (mailbox, uidvalidity, uidnext, highestmodseq, server_messages)
+            )
+        if headers:
+            print(f"[INFO] Caché de correo '{mailbox}': {len(headers)} mensajes nuevos.")
+        return len(headers)
+
+    def _sync_flags(self, mail_connection, mailbox, uidvalidity, modseq):
+        status, data = mail_connection.uid("FETCH", "1:*", "(UID FLAGS)", f"(CHANGEDSINCE {modseq})")
+        if status != "OK":
+            return
+        updates = []
+        for line in data:
+            if isinstance(line, tuple):
+                line = line[0]
+            if not line:
+                continue
+            uid_match, flags_match = _UID_RE.search(line), _FLAGS_RE.search(line)
+            if uid_match and flags_match:
+                updates.append((flags_match.group(1).decode(), mailbox, uidvalidity, int(uid_match.group(1))))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE messages SET flags = ? WHERE mailbox = ? AND uidvalidity = ? AND uid = ?", updates
+            )
+
+    def _prune_expunged(self, mail_connection, mailbox, uidvalidity):
+        status, data = mail_connection.uid("SEARCH", None, "ALL")
+        if status != "OK":
+            return
+        server_uids = {int(uid) for uid in (data[0].split() if data and data[0] else [])}
+        cached_uids = {row[0] for row in self._conn.execute(
+            "SELECT uid FROM messages WHERE mailbox = ? AND uidvalidity = ?", (mailbox, uidvalidity)
+        )}
+        removed = [(mailbox, uidvalidity, uid) for uid in cached_uids - server_uids]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM messages WHERE mailbox = ? AND uidvalidity = ? AND uid = ?", removed
+            )
+
+    def _drop_mailbox(self, mailbox):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM messages WHERE mailbox = ?", (mailbox,))
+            self._conn.execute("DELETE FROM mailbox_state WHERE mailbox = ?", (mailbox,))
+
+
+_mail_cache = None
+
+def get_mail_cache():
+    """Devuelve la caché de correo compartida por la aplicación (se crea la primera vez)."""
+    global _mail_cache
+    if _mail_cache is None:
+        _mail_cache = MailCache()
+    return _mail_cache
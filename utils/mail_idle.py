@@ -0,0 +1,171 @@
+# utils/mail_idle.py
+import itertools
+import select
+import ssl
+import threading
+import time
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from utils.imap_pool import CONNECTION_ERRORS
+
+# RFC 2177: el cliente debe renovar IDLE antes de 29 minutos para que el servidor no corte la sesión
+IDLE_RENEW_SECONDS = 29 * 60
+# Cada cuánto se comprueba si hay que parar mientras se espera en IDLE
+WAIT_SLICE_SECONDS = 2.0
+
+
+class IdleSession:
+    """
+    Comando IDLE (RFC 2177) sobre una sesión imaplib, usando solo su API pública
+    (send/readline/sock/file). Las etiquetas son propias ("IDLE1", "IDLE2"...) y no
+    consumen la secuencia interna de imaplib.
+    """
+    _tags = itertools.count(1)
+
+    def __init__(self, mail):
+        self.mail = mail
+        self.tag = None
+
+    def start(self):
+        self.tag = f"IDLE{next(self._tags)}".encode()
+        self.mail.send(self.tag + b" IDLE\r\n")
+        response = self.mail.readline()
+        if not response.startswith(b"+"):
+            raise RuntimeError(f"IDLE rechazado por el servidor: {response!r}")
+
+    def wait_line(self, timeout):
+        """Siguiente línea no etiquetada, o None si no llega nada en `timeout` segundos."""
+        if not self._has_buffered_data():
+            readable, _, _ = select.select([self.mail.sock], [], [], timeout)
+            if not readable:
+                return None
+        line = self.mail.readline()
+        if not line:
+            raise EOFError("El servidor cerró la conexión durante IDLE")
+        return line
+
+    def done(self):
+        """Sale de IDLE y devuelve las líneas no etiquetadas recibidas hasta la respuesta final."""
+        self.mail.send(b"DONE\r\n")
+        lines = []
+        while True:
+            line = self.mail.readline()
+            if not line:
+                raise EOFError("El servidor cerró la conexión al salir de IDLE")
+            if line.startswith(self.tag + b" "):
+                return lines
+            lines.append(line)
+
+    def _has_buffered_data(self):
+        """
+        Indica, sin bloquear, si ya hay datos por leer: en el buffer de imaplib (mail.file),
+        descifrados en el socket SSL o en el propio socket. select() solo ve estos últimos,
+        así que "* n EXISTS" llegado en el mismo paquete que la línea anterior se quedaría
+        esperando al siguiente paquete.
+        """
+        sock = self.mail.sock
+        timeout = sock.gettimeout()
+        sock.setblocking(False)
+        try:
+            return bool(self.mail.file.peek(1))
+        except (BlockingIOError, ssl.SSLWantReadError):
+            return False
+        finally:
+            sock.settimeout(timeout)
+
+
+class MailIdleListener(QThread):
+    """
+    Hilo que mantiene una sesión IMAP propia en IDLE sobre un buzón y avisa a la interfaz
+    (señal new_mail) cuando el servidor notifica mensajes nuevos (* n EXISTS).
+    Si el servidor no anuncia IDLE, se cae a un sondeo con NOOP cada poll_interval segundos.
+    Args:
+        connection_factory (callable): Devuelve una sesión imaplib ya autenticada (p. ej. get_mail_connection).
+        mailbox (str): Buzón a vigilar.
+        poll_interval (float): Intervalo de sondeo cuando no hay IDLE.
+    """
+    new_mail = pyqtSignal(int)          # Número de mensajes nuevos
+    connection_error = pyqtSignal(str)
+
+    def __init__(self, connection_factory, mailbox="inbox", poll_interval=60.0, parent=None):
+        super().__init__(parent)
+        self._factory = connection_factory
+        self.mailbox = mailbox
+        self.poll_interval = poll_interval
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """Pide al hilo que termine (sale de IDLE con DONE y cierra la sesión)."""
+        self._stop_event.set()
+
+    def run(self):
+        retry_delay = 5
+        while not self._stop_event.is_set():
+            mail = None
+            try:
+                mail = self._factory()
+                status, data = mail.select(self.mailbox, readonly=True)
+                if status != "OK":
+                    raise RuntimeError(f"No se pudo seleccionar el buzón '{self.mailbox}'")
+                exists = int(data[0] or 0)
+                retry_delay = 5
+                if "IDLE" in mail.capabilities:
+                    self._idle_loop(mail, exists)
+                else:
+                    print("[INFO] El servidor no soporta IDLE; se comprobará el correo por sondeo.")
+                    self._poll_loop(mail, exists)
+            except (*CONNECTION_ERRORS, RuntimeError) as e:
+                if self._stop_event.is_set():
+                    break
+                print(f"[WARNING] Escucha IMAP interrumpida: {e}. Reintentando en {retry_delay}s.")
+                self.connection_error.emit(str(e))
+                self._stop_event.wait(retry_delay)
+                retry_delay = min(retry_delay * 2, 300)
+            finally:
+                if mail is not None:
+                    try:
+                        mail.logout()
+                    except Exception:
+                        pass
+
+    # --- IDLE ---
+    def _idle_loop(self, mail, exists):
+        idle = IdleSession(mail)
+        while not self._stop_event.is_set():
+            idle.start()
+            started = time.monotonic()
+            while not self._stop_event.is_set() and time.monotonic() - started < IDLE_RENEW_SECONDS:
+                line = idle.wait_line(WAIT_SLICE_SECONDS)
+                if line is not None:
+                    exists = self._handle_untagged(line, exists)
+
+            # Salir de IDLE (para renovar o para terminar) y esperar la respuesta etiquetada
+            for line in idle.done():
+                exists = self._handle_untagged(line, exists)
+
+    def _handle_untagged(self, line, exists):
+        parts = line.split()
+        if len(parts) >= 3 and parts[0] == b"*" and parts[1].isdigit():
+            count, kind = int(parts[1]), parts[2].upper()
+            if kind == b"EXISTS":
+                if count > exists:
+                    self.new_mail.emit(count - exists)
+                return count
+            if kind == b"EXPUNGE":
+                return max(exists - 1, 0)
+        return exists
+
+    # --- Sondeo (servidores sin IDLE) ---
+    def _poll_loop(self, mail, exists):
+        while not self._stop_event.wait(self.poll_interval):
+            mail.noop()
+            _, expunged = mail.response("EXPUNGE")
+            exists -= len([value for value in expunged if value])
+            _, data = mail.response("EXISTS")
+            counts = [int(value) for value in data if value]
+            if counts:
+                count = counts[-1]
+                if count > exists:
+                    self.new_mail.emit(count - exists)
+                exists = count
@@ -0,0 +1,276 @@
+# utils/mail_mime.py
+import base64
+import binascii
+import html
+import os
+import quopri
+import re
+import tempfile
+from email.header import decode_header, make_header
+
+# Tamaño de cada FETCH parcial BODY.PEEK[parte]<offset.tamaño> al descargar adjuntos
+ATTACHMENT_CHUNK_BYTES = 1024 * 1024
+DEFAULT_DOWNLOAD_DIR = os.path.join(tempfile.gettempdir(), "auto_wcm_adjuntos")
+
+_TOKEN_RE = re.compile(rb'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|\{(\d+)\}|([^\s()"]+))')
+_HTML_TAG_RE = re.compile(r'<(script|style)\b.*?</\1>|<[^>]+>', re.IGNORECASE | re.DOTALL)
+_UNSAFE_FILENAME_RE = re.compile(r'[\\/:*?"<>|\r\n]+')
+
+
+# --- BODYSTRUCTURE ---
+def _parse_fetch_response(data):
+    """
+    Convierte la respuesta de imaplib a un FETCH en listas anidadas (str/int/None/list).
+    Los literales {n} llegan como tuplas (línea, contenido) y se insertan en su posición.
+    """
+    buffer, literals = b"", []
+    for item in data:
+        if isinstance(item, tuple):
+            buffer += item[0]
+            literals.append(item[1])
+        elif item:
+            buffer += item
+
+    stack = [[]]
+    pos = 0
+    while pos < len(buffer):
+        match = _TOKEN_RE.match(buffer, pos)
+        if not match:
+            break
+        pos = match.end()
+        open_paren, close_paren, quoted, literal_size, atom = match.groups()
+        if open_paren:
+            stack.append([])
+        elif close_paren:
+            if len(stack) > 1:
+                finished = stack.pop()
+                stack[-1].append(finished)
+        elif quoted is not None:
+            stack[-1].append(re.sub(rb'\\(.)', rb'\1', quoted).decode("utf-8", errors="replace"))
+        elif literal_size is not None:
+            literal = literals.pop(0) if literals else b""
+            stack[-1].append(literal.decode("utf-8", errors="replace"))
+        elif atom is not None:
+            value = atom.decode("utf-8", errors="replace")
+            if value.upper() == "NIL":
+                stack[-1].append(None)
+            elif value.isdigit():
+                stack[-1].append(int(value))
+            else:
+                stack[-1].append(value)
+    return stack[0]
+
+
+def _find_item(tokens, name):
+    """Busca recursivamente el valor que sigue al atributo name (p. ej. BODYSTRUCTURE)."""
+    for i, token in enumerate(tokens):
+        if isinstance(token, str) and token.upper() == name and i + 1 < len(tokens):
+            return tokens[i + 1]
+        if isinstance(token, list):
+            found = _find_item(token, name)
+            if found is not None:
+                return found
+    return None
+
+
+def _params(value):
+    """Lista IMAP ("clave" "valor" ...) -> dict con claves en minúsculas."""
+    if not isinstance(value, list):
+        return {}
+    return {str(value[i]).lower(): value[i + 1] for i in range(0, len(value) - 1, 2)}
+
+
+def _decode_filename(value):
+    """Los nombres de adjunto pueden venir codificados como cabecera MIME (=?utf-8?...?=)."""
+    try:
+        return str(make_header(decode_header(value)))
+    except (UnicodeDecodeError, LookupError):
+        return value
+
+
+def _walk_structure(node, part_id, parts):
+    if isinstance(node, list) and node and isinstance(node[0], list):
+        # multipart: (parte1)(parte2)... "subtipo" ...
+        children = [child for child in node if isinstance(child, list)]
+        for index, child in enumerate(children, start=1):
+            _walk_structure(child, f"{part_id}.{index}" if part_id else str(index), parts)
+        return
+    if not isinstance(node, list) or len(node) < 7:
+        return
+
+    main_type, subtype = str(node[0]).lower(), str(node[1]).lower()
+    params = _params(node[2])
+    # Campos de extensión: tras el MD5 viene la disposición ("attachment" ("filename" "x.pdf")).
+    # text/* tiene un campo más (líneas) y message/rfc822 tres más (envelope, body, líneas)
+    disposition_index = 9 if main_type == "text" else 8
+    if main_type == "message" and subtype == "rfc822":
+        disposition_index = 11
+    disposition, disposition_params = None, {}
+    value = node[disposition_index] if len(node) > disposition_index else None
+    if isinstance(value, list) and value and isinstance(value[0], str):
+        disposition = value[0].lower()
+        disposition_params = _params(value[1] if len(value) > 1 else None)
+
+    filename = disposition_params.get("filename") or params.get("name")
+    parts.append({
+        "part": part_id or "1",
+        "type": f"{main_type}/{subtype}",
+        "charset": params.get("charset") or "utf-8",
+        "encoding": str(node[5] or "7bit").lower(),
+        "size": node[6] if isinstance(node[6], int) else 0,
+        "filename": _decode_filename(filename) if filename else None,
+        "disposition": disposition,
+    })
+
+
+def fetch_structure(mail_connection, uid):
+    """
+    Pide solo BODYSTRUCTURE del mensaje (sin descargar el contenido).
+    Returns:
+        list: Partes hoja {'part', 'type', 'charset', 'encoding', 'size', 'filename', 'disposition'}.
+    """
+    status, data = mail_connection.uid("FETCH", str(uid), "(BODYSTRUCTURE)")
+    if status != "OK" or not data or data[0] is None:
+        return []
+    structure = _find_item(_parse_fetch_response(data), "BODYSTRUCTURE")
+    parts = []
+    _walk_structure(structure, "", parts)
+    return parts
+
+
+def is_attachment(part):
+    return part["disposition"] == "attachment" or (
+        part["filename"] is not None and not part["type"].startswith("text/")
+    )
+
+
+def text_part(parts):
+    """Parte de texto a mostrar: text/plain si existe, si no text/html."""
+    candidates = [part for part in parts if not is_attachment(part)]
+    for wanted in ("text/plain", "text/html"):
+        for part in candidates:
+            if part["type"] == wanted:
+                return part
+    return None
+
+
+def attachments(parts):
+    return [part for part in parts if is_attachment(part)]
+
+
+# --- Contenido ---
+def _fetch_section(mail_connection, uid, section):
+    status, data = mail_connection.uid("FETCH", str(uid), f"(BODY.PEEK[{section}])")
+    if status != "OK":
+        return b""
+    for item in data:
+        if isinstance(item, tuple):
+            return item[1]
+    return b""
+
+
+def _fetch_partial(mail_connection, uid, section, offset, size):
+    status, data = mail_connection.uid("FETCH", str(uid), f"(BODY.PEEK[{section}]<{offset}.{size}>)")
+    if status != "OK":
+        raise RuntimeError(f"No se pudo descargar la parte {section} del mensaje {uid}")
+    for item in data:
+        if isinstance(item, tuple):
+            return item[1]
+    return b""
+
+
+def _decode_transfer(payload, encoding):
+    if encoding == "base64":
+        try:
+            return base64.b64decode(payload)
+        except binascii.Error:
+            return base64.b64decode(payload + b"=" * (-len(payload) % 4), validate=False)
+    if encoding == "quoted-printable":
+        return quopri.decodestring(payload)
+    return payload
+
+
+def fetch_text(mail_connection, uid, part):
+    """Descarga y decodifica solo la parte de texto indicada (no marca el mensaje como leído)."""
+    payload = _decode_transfer(_fetch_section(mail_connection, uid, part["part"]), part["encoding"])
+    try:
+        text = payload.decode(part["charset"], errors="replace")
+    except LookupError:
+        text = payload.decode("utf-8", errors="replace")
+    if part["type"] == "text/html":
+        text = html.unescape(_HTML_TAG_RE.sub("", text))
+    return text.strip()
+
+
+def open_message(mail_connection, mailbox, uid, cache=None):
+    """
+    Abre un mensaje de forma perezosa: BODYSTRUCTURE y después solo la parte de texto.
+    Los adjuntos no se descargan; se devuelven sus descriptores para pedirlos bajo demanda.
+    Con cache (utils.mail_cache.MailCache) el texto ya leído no se vuelve a descargar.
+    Returns:
+        tuple: (texto, lista de adjuntos)
+    """
+    mail_connection.select(mailbox, readonly=True)
+    parts = fetch_structure(mail_connection, uid)
+    cached = cache.get_body(mailbox, uid) if cache is not None else None
+    if cached is not None:
+        return cached.decode("utf-8", errors="replace"), attachments(parts)
+    part = text_part(parts)
+    text = fetch_text(mail_connection, uid, part) if part else ""
+    if cache is not None:
+        cache.put_body(mailbox, uid, text.encode("utf-8"))
+    return text, attachments(parts)
+
+
+class _StreamDecoder:
+    """Decodifica base64 / quoted-printable por bloques, guardando el resto incompleto."""
+    def __init__(self, encoding):
+        self.encoding = encoding
+        self.pending = b""
+
+    def feed(self, chunk):
+        data = self.pending + chunk
+        if self.encoding == "base64":
+            data = b"".join(data.split())
+            cut = len(data) - len(data) % 4
+        elif self.encoding == "quoted-printable":
+            cut = data.rfind(b"\n") + 1
+        else:
+            return data
+        self.pending = data[cut:]
+        return _decode_transfer(data[:cut], self.encoding)
+
+    def flush(self):
+        data, self.pending = self.pending, b""
+        return _decode_transfer(data, self.encoding) if data else b""
+
+
+def download_attachment(mail_connection, mailbox, uid, part, dest_dir=DEFAULT_DOWNLOAD_DIR,
+                        chunk_size=ATTACHMENT_CHUNK_BYTES):
+    """
+    Descarga un adjunto bajo demanda con FETCH parciales BODY.PEEK[parte]<offset.tamaño>,
+    decodificando y escribiendo cada bloque en disco (nunca se tiene el adjunto entero en memoria).
+    Returns:
+        str: Ruta del fichero descargado.
+    """
+    mail_connection.select(mailbox, readonly=True)
+    os.makedirs(dest_dir, exist_ok=True)
+    filename = _UNSAFE_FILENAME_RE.sub("_", part["filename"] or f"adjunto_{part['part']}")
+    path = os.path.join(dest_dir, f"{uid}_{part['part']}_{filename}")
+    tmp_path = f"{path}.part"
+
+    decoder = _StreamDecoder(part["encoding"])
+    offset = 0
+    with open(tmp_path, "wb") as f:
+        while True:
+            chunk = _fetch_partial(mail_connection, uid, part["part"], offset, chunk_size)
+            if chunk:
+                f.write(decoder.feed(chunk))
+                offset += len(chunk)
+            if len(chunk) < chunk_size:
+                break
+        f.write(decoder.flush())
+    os.replace(tmp_path, path)
+    print(f"[INFO] Adjunto descargado: {path} ({offset} bytes codificados)")
+    return path
+
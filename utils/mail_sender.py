@@ -0,0 +1,318 @@
+# utils/mail_sender.py
+import base64
+import errno
+import mimetypes
+import os
+import queue
+import smtplib
+import socket
+import ssl
+import threading
+import time
+import uuid
+from email.header import Header
+from email.utils import formatdate, make_msgid, encode_rfc2231
+
+# Bytes de fichero por línea base64 (57 bytes -> 76 caracteres, límite de RFC 2045)
+_B64_LINE_BYTES = 57
+# Se leen los adjuntos del disco en bloques de este tamaño (múltiplo de 57)
+_READ_CHUNK_BYTES = _B64_LINE_BYTES * 1024
+
+STATUS_QUEUED = "queued"
+STATUS_SENDING = "sending"
+STATUS_RETRYING = "retrying"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+# Errores de red sin subclase propia (ConnectionError y TimeoutError ya lo son)
+_TRANSIENT_ERRNOS = {errno.ENETUNREACH, errno.EHOSTUNREACH, errno.ENETDOWN, errno.ETIMEDOUT}
+
+
+def _is_transient(error):
+    """
+    Decide si merece la pena reintentar: desconexiones, errores de red y respuestas 4xx.
+    Las respuestas 5xx (destinatario inexistente, mensaje rechazado...) son definitivas, igual
+    que los errores locales (adjunto borrado o sin permisos de lectura).
+    """
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    if isinstance(error, (ConnectionError, TimeoutError, socket.gaierror, ssl.SSLEOFError)):
+        return True
+    return isinstance(error, OSError) and error.errno in _TRANSIENT_ERRNOS
+
+
+def _header_value(value):
+    try:
+        value.encode("ascii")
+        return value
+    except UnicodeEncodeError:
+        return Header(value, "utf-8").encode()
+
+
+def _base64_lines(data):
+    for i in range(0, len(data), _B64_LINE_BYTES):
+        yield base64.b64encode(data[i:i + _B64_LINE_BYTES]) + b"\r\n"
+
+
+def iter_mime_lines(sender, recipient, subject, body, attachments=()):
+    """
+    Genera el mensaje MIME línea a línea (bytes terminados en CRLF) sin cargar los adjuntos
+    en memoria: cada fichero se lee del disco por bloques y se codifica en base64 al vuelo.
+    """
+    boundary = f"=_{uuid.uuid4().hex}"
+    yield f"From: {sender}\r\n".encode()
+    yield f"To: {recipient}\r\n".encode()
+    yield f"Subject: {_header_value(subject)}\r\n".encode()
+    yield f"Date: {formatdate(localtime=True)}\r\n".encode()
+    yield f"Message-ID: {make_msgid()}\r\n".encode()
+    yield b"MIME-Version: 1.0\r\n"
+    yield f'Content-Type: multipart/mixed; boundary="{boundary}"\r\n\r\n'.encode()
+
+    yield f"--{boundary}\r\n".encode()
+    yield b'Content-Type: text/plain; charset="utf-8"\r\n'
+    yield b"Content-Transfer-Encoding: base64\r\n\r\n"
+    yield from _base64_lines(body.encode("utf-8"))
+
+    for file_path in attachments:
+        filename = os.path.basename(file_path)
+        content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        try:
+            filename.encode("ascii")
+            disposition = f'attachment; filename="{filename}"'
+        except UnicodeEncodeError:
+            disposition = f"attachment; filename*={encode_rfc2231(filename, 'utf-8')}"
+        yield f"--{boundary}\r\n".encode()
+        yield f"Content-Type: {content_type}\r\n".encode()
+        yield b"Content-Transfer-Encoding: base64\r\n"
+        yield f"Content-Disposition: {disposition}\r\n\r\n".encode()
+        with open(file_path, "rb") as f:
+            while True:
+                chunk = f.read(_READ_CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield from _base64_lines(chunk)
+
+    yield f"--{boundary}--\r\n".encode()
+
+
+def send_streaming(server, sender, recipient, lines):
+    """
+    Envía un mensaje por una sesión SMTP abierta escribiendo las líneas directamente en el
+    socket durante el comando DATA (con dot-stuffing), en vez de construir el mensaje entero.
+    """
+    code, resp = server.mail(sender)
+    if code != 250:
+        raise smtplib.SMTPSenderRefused(code, resp, sender)
+    code, resp = server.rcpt(recipient)
+    if code not in (250, 251):
+        raise smtplib.SMTPRecipientsRefused({recipient: (code, resp)})
+    server.putcmd("data")
+    code, resp = server.getreply()
+    if code != 354:
+        raise smtplib.SMTPDataError(code, resp)
+
+    buffer = []
+    buffered = 0
+    for line in lines:
+        if line.startswith(b"."):
+            line = b"." + line
+        buffer.append(line)
+        buffered += len(line)
+        if buffered >= 64 * 1024:
+            server.send(b"".join(buffer))
+            buffer, buffered = [], 0
+    buffer.append(b".\r\n")
+    server.send(b"".join(buffer))
+
+    code, resp = server.getreply()
+    if code != 250:
+        raise smtplib.SMTPDataError(code, resp)
+
+
+class OutboundMailQueue:
+    """
+    Cola de correo saliente atendida por un hilo de trabajo.
+    - Reutiliza una única sesión SMTP autenticada para las ráfagas de mensajes y la cierra
+      tras idle_timeout segundos sin trabajo.
+    - Los adjuntos se leen del disco y se codifican mientras se envían (ver iter_mime_lines).
+    - Los fallos transitorios (desconexión, códigos 4xx) se reintentan con espera exponencial.
+    - Informa del estado de cada mensaje con on_status(message_id, estado, detalle), llamado
+      desde el hilo de trabajo (en Qt, conectar a una señal para pasar al hilo de la interfaz).
+      Cada submit puede indicar su propio on_status, que sustituye al de la cola para ese mensaje.
+    Args:
+        connection_factory (callable): Devuelve una sesión smtplib ya autenticada.
+        sender (str): Dirección del remitente.
+    """
+    def __init__(self, connection_factory, sender, on_status=None,
+                 max_retries=3, backoff=2.0, idle_timeout=60.0):
+        self._factory = connection_factory
+        self.sender = sender
+        self.on_status = on_status
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.idle_timeout = idle_timeout
+        self._queue = queue.Queue()
+        self._server = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self.metrics = {'sessions_opened': 0, 'messages_sent': 0, 'messages_failed': 0, 'retries': 0}
+
+    def submit(self, subject, recipient, body, attachments=(), on_status=None):
+        """Encola un mensaje y devuelve su identificador."""
+        message_id = uuid.uuid4().hex[:12]
+        item = {
+            "id": message_id,
+            "subject": subject,
+            "recipient": recipient,
+            "body": body,
+            "attachments": [path for path in attachments if os.path.isfile(path)],
+            "on_status": on_status
+        }
+        self._report(item, STATUS_QUEUED, f"En cola: {subject}")
+        self._queue.put(item)
+        self._ensure_worker()
+        return message_id
+
+    def join(self):
+        """Espera a que se hayan procesado todos los mensajes encolados."""
+        self._queue.join()
+
+    def stop(self):
+        """Detiene el hilo de trabajo cuando termine la cola y cierra la sesión SMTP."""
+        with self._lock:
+            thread = self._thread
+            # Sin hilo vivo no se encola la marca de parada: la recogería el siguiente hilo
+            if thread is None or not thread.is_alive():
+                return
+            self._queue.put(None)
+        thread.join()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="OutboundMailQueue", daemon=True)
+                self._thread.start()
+
+    def _report(self, item, status, detail=""):
+        on_status = item["on_status"] or self.on_status
+        if on_status:
+            try:
+                on_status(item["id"], status, detail)
+            except Exception as e:
+                print(f"[WARNING] Error al notificar el estado del correo {item['id']}: {e}")
+
+    def _worker(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                self._close_server()
+                continue
+            try:
+                if item is None:
+                    self._close_server()
+                    return
+                self._deliver(item)
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, item):
+        for attempt in range(self.max_retries + 1):
+            self._report(item, STATUS_SENDING, f"Enviando a {item['recipient']}")
+            try:
+                server = self._get_server()
+                lines = iter_mime_lines(self.sender, item["recipient"], item["subject"],
+                                        item["body"], item["attachments"])
+                send_streaming(server, self.sender, item["recipient"], lines)
+                self.metrics['messages_sent'] += 1
+                self._report(item, STATUS_SENT, "Correo enviado exitosamente")
+                return True
+            except Exception as e:
+                # Tras un error a mitad de DATA la sesión queda en estado desconocido
+                self._close_server()
+                if not _is_transient(e) or attempt == self.max_retries:
+                    self.metrics['messages_failed'] += 1
+                    print(f"[ERROR] Error al enviar correo a {item['recipient']}: {e}")
+                    self._report(item, STATUS_FAILED, f"Error al enviar correo: {e}")
+                    return False
+                delay = self.backoff * (2 ** attempt)
+                self.metrics['retries'] += 1
+                self._report(item, STATUS_RETRYING, f"Error transitorio ({e}); reintento en {delay:.0f}s")
+                time.sleep(delay)
+
+    def _get_server(self):
+        if self._server is not None:
+            try:
+                if self._server.noop()[0] == 250:
+                    return self._server
+            except OSError:
+                pass
+            self._close_server()
+        self._server = self._factory()
+        self.metrics['sessions_opened'] += 1
+        return self._server
+
+    def _close_server(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except Exception:
+            try:
+                self._server.close()
+            except Exception:
+                pass
+        self._server = None
+
+
+class SendBatch:
+    """
+    Tanda de envíos (p. ej. los correos de un mes) que se resume en un solo aviso.
+    Cada mensaje se encola con su propio on_status; cuando todos han terminado (enviados o
+    fallidos) y la tanda está cerrada se llama una vez a on_done(enviados, fallidos), con
+    fallidos = [(asunto, detalle), ...]. on_progress, si se indica, recibe cada estado.
+    Ambas llamadas llegan desde el hilo de la cola.
+    """
+    def __init__(self, on_done, on_progress=None):
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self._pending = 0
+        self._sent = 0
+        self._failed = []
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def submit(self, outbound, subject, recipient, body, attachments=()):
+        with self._lock:
+            self._pending += 1
+        on_status = lambda message_id, status, detail: self._on_status(subject, message_id, status, detail)
+        return outbound.submit(subject, recipient, body, attachments, on_status=on_status)
+
+    def close(self):
+        """Indica que no se añadirán más mensajes."""
+        with self._lock:
+            self._closed = True
+            finished = self._pending == 0
+        if finished:
+            self.on_done(self._sent, list(self._failed))
+
+    def _on_status(self, subject, message_id, status, detail):
+        if self.on_progress:
+            self.on_progress(message_id, status, detail)
+        if status not in (STATUS_SENT, STATUS_FAILED):
+            return
+        with self._lock:
+            self._pending -= 1
+            if status == STATUS_SENT:
+                self._sent += 1
+            else:
+                self._failed.append((subject, detail))
+            finished = self._closed and self._pending == 0
+        if finished:
+            self.on_done(self._sent, list(self._failed))
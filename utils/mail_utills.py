@@ -3,6 +3,7 @@ import base64
 import email
 import imaplib
 import os
+import re
 import smtplib
 
 from email import message_from_bytes
@@ -16,6 +17,8 @@ from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 
 from config import EMAIL_ADDRESS, APP_PASSWORD, SMTP_SERVER, SMTP_PORT, IMAP_SERVER
+from utils.imap_pool import ImapConnectionPool
+from utils.mail_sender import OutboundMailQueue
 
 SCOPES = [
     'https://www.googleapis.com/auth/gmail.compose', 
@@ -42,8 +45,7 @@ def send_email(subject, recipient, body):
     # 2. Enviar el correo usando SMTP
     try:
         # Asegurarse de usar las variables importadas
-        with smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT) as server:
-            server.login(EMAIL_ADDRESS, APP_PASSWORD)
+        with get_smtp_connection() as server:
             server.sendmail(EMAIL_ADDRESS, recipient, message.as_string())
         print("[INFO] Correo enviado exitosamente.")
         return True, "Correo enviado exitosamente"
@@ -65,80 +67,160 @@ def save_draft(subject, recipient, body):
     raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
     
     try:
-        creds = _get_google_credentials()
-        service = build('gmail', 'v1', credentials=creds)
+        service = get_gmail_service()
         draft = service.users().drafts().create(userId='me', body={'message': {'raw': raw_message}}).execute()
         return True, f"Borrador guardado con ID: {draft['id']}"
     except Exception as e:
         return False, f"Error al guardar borrador: {str(e)}"
 
-def load_inbox(mail_connection, LIMIT=5):
+# Solo las cabeceras necesarias para los listados (sin cuerpo ni adjuntos, sin marcar como leído)
+HEADER_FIELDS_QUERY = "(UID FLAGS BODY.PEEK[HEADER.FIELDS (FROM SUBJECT DATE)])"
+
+def _decode_header_value(value):
+    """Decodifica una cabecera MIME completa (todas sus partes) a str."""
+    if not value:
+        return ""
+    parts = []
+    for fragment, encoding in decode_header(value):
+        if isinstance(fragment, bytes):
+            try:
+                fragment = fragment.decode(encoding or "utf-8", errors="replace")
+            except LookupError:
+                fragment = fragment.decode("utf-8", errors="replace")
+        parts.append(fragment)
+    return "".join(parts)
+
+def _message_set(ids, as_range):
+    """Conjunto de mensajes IMAP: rango "a:b" o lista "a,b,c"."""
+    ids = [i.decode() if isinstance(i, bytes) else str(i) for i in ids]
+    if as_range and len(ids) > 1:
+        return f"{ids[0]}:{ids[-1]}"
+    return ",".join(ids)
+
+def fetch_headers(mail_connection, ids, use_uid=True):
+    """
+    Descarga en una sola petición FETCH las cabeceras From/Subject/Date de varios mensajes.
+    Args:
+        mail_connection: Sesión IMAP con el buzón ya seleccionado.
+        ids (list): UIDs en orden ascendente que forman un tramo completo del buzón
+                    (p. ej. los últimos N de un UID SEARCH ALL), o números de secuencia si use_uid=False.
+        use_uid (bool): Usar UID FETCH a:b en lugar de FETCH con la lista de números.
+    Returns:
+        list: Diccionarios {'uid', 'flags', 'from', 'subject', 'date'} en el orden del servidor.
+    """
+    if not ids:
+        return []
+    message_set = _message_set(ids, as_range=use_uid)
+    if use_uid:
+        status, data = mail_connection.uid("FETCH", message_set, HEADER_FIELDS_QUERY)
+    else:
+        status, data = mail_connection.fetch(message_set, HEADER_FIELDS_QUERY)
+    if status != "OK":
+        return []
+
+    headers = []
+    for response_part in data:
+        if not isinstance(response_part, tuple):
+            continue
+        uid_match = re.search(rb'UID (\d+)', response_part[0])
+        flags_match = re.search(rb'FLAGS \(([^)]*)\)', response_part[0])
+        msg = message_from_bytes(response_part[1])
+        headers.append({
+            "uid": int(uid_match.group(1)) if uid_match else None,
+            "flags": flags_match.group(1).decode() if flags_match else "",
+            "from": _decode_header_value(msg.get("From")),
+            "subject": _decode_header_value(msg.get("Subject")),
+            "date": msg.get("Date", "")
+        })
+    return headers
+
+def _last_uids(mail_connection, mailbox, limit):
+    status, _ = mail_connection.select(mailbox)
+    if status != "OK":
+        return []
+    status, data = mail_connection.uid("SEARCH", None, "ALL")
+    if status != "OK" or not data or not data[0]:
+        return []
+    return data[0].split()[-limit:]
+
+def format_header_listing(headers):
+    return [f"De: {header['from']}\nAsunto: {header['subject']}" for header in headers]
+
+def load_inbox(mail_connection, LIMIT=5, cache=None):
+    """
+    Lista los últimos LIMIT mensajes recibidos.
+    Con cache (utils.mail_cache.MailCache) solo se descargan los mensajes nuevos y se lista desde la caché.
+    """
     try:
-        mail_connection.select("inbox")
-        status, messages = mail_connection.search(None, "ALL")
-        if status != "OK":
-            return []
-        
-        mail_ids = messages[0].split()
-        if not mail_ids:
-            return []
-        
-        if len(mail_ids) > LIMIT:
-            mail_ids = mail_ids[-LIMIT:]  
-            return process_messages(mail_connection, mail_ids)
+        if cache is not None:
+            cache.sync(mail_connection, "inbox")
+            return format_header_listing(cache.list_headers("inbox", LIMIT))
+        mail_uids = _last_uids(mail_connection, "inbox", LIMIT)
+        return process_messages(mail_connection, mail_uids)
     except Exception as e:
         print(f"Error al cargar mensajes recibidos: {e}")
         return []
 
-def process_messages(mail_connection, mail_ids):
-    messages = []
-    for num in mail_ids:
-        _, msg_data = mail_connection.fetch(num, "(RFC822)")
-        for response_part in msg_data:
-            if isinstance(response_part, tuple):
-                msg = message_from_bytes(response_part[1])
-                subject, encoding = decode_header(msg["Subject"])[0]
-                if isinstance(subject, bytes):
-                    subject = subject.decode(encoding or "utf-8")
-                from_email = msg.get("From")
-                messages.append(f"De: {from_email}\nAsunto: {subject}")
-    return messages
+def process_messages(mail_connection, mail_uids):
+    # fetch_headers devuelve el orden del servidor (ascendente); se lista del más reciente al más antiguo
+    return format_header_listing(reversed(fetch_headers(mail_connection, mail_uids)))
 
 def get_mail_connection():
     mail = imaplib.IMAP4_SSL(IMAP_SERVER)
     mail.login(EMAIL_ADDRESS, APP_PASSWORD)
     return mail
 
-def load_drafts(mail_connection, LIMIT=10):
+_mail_pool = None
+
+def get_mail_pool():
+    """
+    Devuelve el pool IMAP compartido por la aplicación (se crea la primera vez).
+    Las sesiones se abren con get_mail_connection y se reutilizan entre operaciones.
+    """
+    global _mail_pool
+    if _mail_pool is None:
+        _mail_pool = ImapConnectionPool(get_mail_connection)
+    return _mail_pool
+
+def get_smtp_connection():
+    """
+    Abre una sesión SMTP autenticada: SSL directo en el puerto 465, STARTTLS en el resto (587).
+    """
+    if SMTP_PORT == 465:
+        server = smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT, timeout=30)
+    else:
+        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=30)
+        server.starttls()
+    server.login(EMAIL_ADDRESS, APP_PASSWORD)
+    return server
+
+_outbound_queue = None
+
+def get_outbound_queue(on_status=None):
+    """
+    Devuelve la cola de envío compartida por la aplicación (se crea la primera vez).
+    Los mensajes se envían en segundo plano reutilizando la misma sesión SMTP.
+    """
+    global _outbound_queue
+    if _outbound_queue is None:
+        _outbound_queue = OutboundMailQueue(get_smtp_connection, EMAIL_ADDRESS)
+    if on_status is not None:
+        _outbound_queue.on_status = on_status
+    return _outbound_queue
+
+def load_drafts(mail_connection, LIMIT=10, cache=None):
     try:
-        mail_connection.select('[Gmail]/Borradores')
-        status, messages = mail_connection.search(None, "ALL")
-        if status != "OK":
-            return []
-        
-        mail_ids = messages[0].split()  
-        if not mail_ids:
-            return []
-        
-        if len(mail_ids) > LIMIT:
-            mail_ids = mail_ids[-LIMIT:]  
-        return process_emails(mail_connection, mail_ids)
+        if cache is not None:
+            cache.sync(mail_connection, '[Gmail]/Borradores')
+            return format_header_listing(cache.list_headers('[Gmail]/Borradores', LIMIT))
+        mail_uids = _last_uids(mail_connection, '[Gmail]/Borradores', LIMIT)
+        return process_emails(mail_connection, mail_uids)
     except Exception as e:
         print(f"Error al cargar borradores: {str(e)}")
         return []
 
-def process_emails(mail_connection, mail_ids):
-    messages = []
-    for num in mail_ids:
-        _, msg_data = mail_connection.fetch(num, "(RFC822)")
-        for part in msg_data:
-            if isinstance(part, tuple):
-                msg = message_from_bytes(part[1])
-                subject, _ = decode_header(msg["Subject"])[0]
-                subject = subject.decode() if isinstance(subject, bytes) else subject
-                from_email = msg.get("From")
-                messages.append(f"De: {from_email}\nAsunto: {subject}")
-    return messages
+def process_emails(mail_connection, mail_uids):
+    return process_messages(mail_connection, mail_uids)
 
 def clear_mail_message(subject_input, destination_input, compose_area, attach_list):
     subject_input.clear()
@@ -147,69 +229,76 @@ def clear_mail_message(subject_input, destination_input, compose_area, attach_li
     attach_list.clear()
 
 
+_gmail_service = None
+
+class GmailAuthError(RuntimeError):
+    """No se pudieron obtener credenciales de Google (el mensaje es apto para mostrarlo al usuario)."""
+
+def get_gmail_service():
+    """
+    Devuelve el cliente de la API de Gmail compartido por la aplicación.
+    Se construye una sola vez (credenciales + documento de discovery); las llamadas siguientes lo reutilizan.
+    Raises:
+        GmailAuthError: Si falta credentials.json o falla la autorización.
+    """
+    global _gmail_service
+    if _gmail_service is None:
+        creds = _get_google_credentials()
+        _gmail_service = build('gmail', 'v1', credentials=creds, cache_discovery=False)
+    return _gmail_service
+
 def _get_google_credentials():
     """
     Obtiene credenciales válidas de Google para la API de Gmail.
-    Usa run_console() para evitar errores con run_local_server().
+    El token se guarda en calendar_api_setting/token.json; si solo existe el token que guardaba
+    antes la ventana de correo (ui/token.json), se reutiliza para no volver a pedir autorización.
+    La autorización usa run_local_server() (run_console() no existe en google-auth-oauthlib >= 1.0).
     """
-    import os
-    from google.oauth2.credentials import Credentials
-    from google_auth_oauthlib.flow import InstalledAppFlow
-    from google.auth.transport.requests import Request
-
-    # Rutas correctas
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     token_path = os.path.join(project_root, 'calendar_api_setting', 'token.json')
+    legacy_token_path = os.path.join(project_root, 'ui', 'token.json')
     credentials_path = os.path.join(project_root, 'calendar_api_setting', 'credentials.json')
-    
-    SCOPES = ['https://www.googleapis.com/auth/gmail.compose', 'https://www.googleapis.com/auth/gmail.readonly']
-    
+
+    if not os.path.exists(token_path) and os.path.exists(legacy_token_path):
+        token_source = legacy_token_path
+    else:
+        token_source = token_path
+
     creds = None
-    
-    # Cargar token si existe
-    if os.path.exists(token_path):
+    if os.path.exists(token_source):
         try:
-            creds = Credentials.from_authorized_user_file(token_path, SCOPES)
+            creds = Credentials.from_authorized_user_file(token_source, SCOPES)
         except Exception as e:
             print(f"[WARNING] Error al cargar credenciales desde token: {e}")
-            # Si hay un error al cargar el token, lo eliminamos para forzar una nueva autenticación
-            os.remove(token_path)
             creds = None
 
-    # Si no hay credenciales válidas, iniciar flujo OAuth
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            try:
-                creds.refresh(Request())
-                print("[DEBUG] Token refrescado exitosamente.")
-            except Exception as e:
-                print(f"[WARNING] No se pudo refrescar el token: {e}. Iniciando nuevo login.")
-                # Eliminar token si no se puede refrescar
-                if os.path.exists(token_path):
-                    os.remove(token_path)
-                creds = None
-        
-        # Si aún no hay credenciales, iniciar flujo de autenticación por consola
-        if not creds:
-            if os.path.exists(credentials_path):
-                try:
-                    flow = InstalledAppFlow.from_client_secrets_file(credentials_path, SCOPES)
-                    
-                    # <-- USAR run_console() EN LUGAR DE run_local_server() -->
-                    print("[INFO] Iniciando flujo de autenticación por consola...")
-                    creds = flow.run_console()
-                    # <-- FIN DEL CAMBIO -->
-
-                    # Guardar las credenciales en la ubicación correcta
-                    with open(token_path, 'w') as token:
-                        token.write(creds.to_json())
-                    print(f"[INFO] Nuevas credenciales guardadas en: {token_path}")
-                    
-                except Exception as e:
-                    print(f"[ERROR] Error en el flujo OAuth: {e}")
-                    return None
-            else:
-                print(f"[ERROR] Archivo credentials.json no encontrado en: {credentials_path}")
-                return None
+    if creds and creds.valid:
+        return creds
+
+    if creds and creds.expired and creds.refresh_token:
+        try:
+            creds.refresh(Request())
+        except Exception as e:
+            print(f"[WARNING] No se pudo refrescar el token: {e}. Iniciando nuevo login.")
+            creds = None
+    else:
+        creds = None
+
+    if creds is None:
+        if not os.path.exists(credentials_path):
+            error_msg = f"El archivo credentials.json no se encuentra en la ruta: {credentials_path}"
+            print(f"[ERROR] {error_msg}")
+            raise GmailAuthError(error_msg)
+        try:
+            flow = InstalledAppFlow.from_client_secrets_file(credentials_path, SCOPES)
+            creds = flow.run_local_server(port=0)
+        except Exception as e:
+            error_msg = f"Error en el flujo de autenticación OAuth: {e}"
+            print(f"[ERROR] {error_msg}")
+            raise GmailAuthError(error_msg) from e
 
+    # Guardar las credenciales (nuevas o refrescadas) para la próxima ejecución
+    with open(token_path, 'w') as token:
+        token.write(creds.to_json())
+    print(f"[INFO] Credenciales de Google guardadas en: {token_path}")
     return creds
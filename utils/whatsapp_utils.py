@@ -7,7 +7,7 @@ from PyQt6.QtWidgets import QListWidget, QTextEdit
 from PyQt6.QtCore import Qt
 from utils.calendar_utils import create_event_api, get_company_color, refresh_calendar
 from models.chat_parser import (
-    load_chats, highlight_keywords, infer_date,
+    load_chats, highlight_keywords, infer_date, prefilter_messages, precompute_availability,
     handle_chat_message, check_availability, nlp, extract_location, extract_time
 )
 from utils.common_functions import show_info_dialog, show_error_dialog
@@ -33,11 +33,17 @@ def process_chat(messages, calendar_window):
     html_output = ''
     previous_date = None
 
-    for msg in messages:
+    # Pre-filtro de relevancia: solo los mensajes relevantes pasan por spaCy e infer_date
+    relevant_flags, _ = prefilter_messages(messages)
+    # Disponibilidad de todas las fechas mencionadas con una sola consulta al calendario
+    precompute_availability(messages, relevant_flags)
+
+    for msg, is_relevant in zip(messages, relevant_flags):
         date_str = msg.get("date", "")
         time_str = msg.get("time", "")
         sender = msg.get("sender", "")
-        styled_message = msg.get("message", "")
+        raw_message = msg.get("message", "")
+        styled_message = raw_message
 
         if not date_str:
             continue
@@ -78,18 +84,21 @@ def process_chat(messages, calendar_window):
             styled_message += f'<div class="time-info" style="color: #00d4ff; font-style: italic; margin: 5px 0;">Horario Indicado: {extracted_time_str}</div>'
             
        # 4. Procesamiento con spaCy para fechas (ya se hizo highlight_keywords, pero este es para acciones)
-        doc = nlp(styled_message)
-        for ent in doc.ents:
-            if ent.label_ == 'DATE':
-                styled_message = styled_message.replace(
-                    ent.text,
-                    f'<span class="highlight">{ent.text}</span>' # Mantener estilo highlight
-                )
+        # Los mensajes descartados por el pre-filtro se muestran sin pasar por spaCy ni infer_date
+        if is_relevant:
+            doc = nlp(styled_message)
+            for ent in doc.ents:
+                if ent.label_ == 'DATE':
+                    styled_message = styled_message.replace(
+                        ent.text,
+                        f'<span class="highlight">{ent.text}</span>' # Mantener estilo highlight
+                    )
 
         # 5. Generar botones de disponibilidad si se detectan palabras clave
-        if "disponible" in styled_message.lower() or "libre" in styled_message.lower():
-            # Llamar a infer_date que debe devolver (date, time)
-            inferred_result = infer_date(styled_message)
+        if is_relevant and ("disponible" in styled_message.lower() or "libre" in styled_message.lower()):
+            # Usar la fecha precalculada; si no existe, llamar a infer_date que debe devolver (date, time)
+            # Se usa el texto original (sin HTML) para que la caché de infer_date sea efectiva
+            inferred_result = msg.get("inferred_date") or infer_date(raw_message)
 
             # Manejar el resultado de infer_date que puede ser date sola o (date, time)
             inferred_date = None
@@ -111,7 +120,7 @@ def process_chat(messages, calendar_window):
 
             # Asegurarse de que inferred_date sea un objeto date
             if inferred_date and isinstance(inferred_date, dt):
-                response = handle_chat_message(styled_message, calendar_window)
+                response = handle_chat_message(raw_message, calendar_window, available=msg.get("available"))
                 # Usar la hora extraída o la hora inferida por infer_date, o por defecto
                 final_time_obj = None
                 if extracted_time_str: